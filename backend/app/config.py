@@ -1,6 +1,6 @@
 import os
 from dotenv import load_dotenv
-from supabase import create_client, Client
+from supabase import create_client, Client, ClientOptions
 import httpx
 
 load_dotenv()
@@ -8,11 +8,18 @@ load_dotenv()
 SUPABASE_URL = os.getenv("SUPABASE_URL")
 SUPABASE_KEY = os.getenv("SUPABASE_KEY")  
 JWT_SECRET = os.getenv("JWT_SECRET")
+# Optional SQLite file for rate-limit buckets shared by all workers on a host
+RATE_LIMIT_STORE = os.getenv("RATE_LIMIT_STORE")
+# Hard cap on one PostgREST round trip. app/db.py applies tighter per-operation
+# timeouts; this bounds maintenance RPCs and any worker thread left behind
+POSTGREST_TIMEOUT = 60
 
 if not SUPABASE_URL or not SUPABASE_KEY:
     raise ValueError("Missing Supabase credentials in environment variables")
 
 try:
-    supabase: Client = create_client(SUPABASE_URL, SUPABASE_KEY)
+    supabase: Client = create_client(
+        SUPABASE_URL, SUPABASE_KEY, options=ClientOptions(postgrest_client_timeout=POSTGREST_TIMEOUT)
+    )
 except Exception:
     supabase = None
\ No newline at end of file
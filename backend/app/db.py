@@ -0,0 +1,189 @@
+import asyncio
+import logging
+import random
+import time
+from typing import Optional
+
+import httpx
+from fastapi import HTTPException
+from postgrest.exceptions import APIError
+
+from . import deadline
+from .services.load_shedder import load_shedder
+
+logger = logging.getLogger(__name__)
+
+READ_TIMEOUT = 5.0  # Seconds; per-operation defaults, overridable per call
+WRITE_TIMEOUT = 10.0
+READ_RETRIES = 2  # Extra attempts for idempotent reads on transient errors
+RETRY_BASE_DELAY = 0.05
+
+# SQLSTATE classes and PostgREST codes that mean the database, not the query, failed:
+# connection exceptions, insufficient resources, operator intervention (e.g.
+# statement timeout), and PostgREST's own connection/schema-cache errors.
+_TRANSIENT_SQLSTATE_PREFIXES = ("08", "53", "57", "PGRST00")
+
+
+class DatabaseUnavailable(HTTPException):
+    """The database is failing or the circuit is open: answer 503, not 500"""
+
+    def __init__(self, detail: str, retry_after: int = 5):
+        super().__init__(status_code=503, detail=detail, headers={"Retry-After": str(retry_after)})
+
+
+def is_transient(error: BaseException) -> bool:
+    if isinstance(error, (httpx.TransportError, TimeoutError, asyncio.TimeoutError)):
+        return True
+    if isinstance(error, APIError):
+        return str(error.code or "").startswith(_TRANSIENT_SQLSTATE_PREFIXES)
+    return False
+
+
+def is_read(query) -> bool:
+    return getattr(query, "http_method", None) in ("GET", "HEAD")
+
+
+class CircuitBreaker:
+    """Fail fast while PostgREST is down instead of tying up workers on it.
+
+    ``failure_threshold`` consecutive transient failures open the circuit:
+    calls are rejected immediately for ``reset_timeout`` seconds. Then one
+    probe is let through (half-open); success closes the circuit, failure opens
+    it again. Query errors such as constraint violations don't count.
+    """
+
+    CLOSED = "closed"
+    OPEN = "open"
+    HALF_OPEN = "half_open"
+
+    def __init__(self, failure_threshold: int = 5, reset_timeout: float = 10.0):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.state = self.CLOSED
+        self._failures = 0
+        self._opened_at = 0.0
+        self._probing = False
+        self.calls = 0
+        self.failures = 0
+        self.rejected = 0
+        self.retries = 0
+        self.timeouts = 0
+        self.opened = 0
+
+    def before_call(self) -> None:
+        self.calls += 1
+        if self.state == self.OPEN:
+            if time.monotonic() - self._opened_at < self.reset_timeout:
+                self.rejected += 1
+                raise DatabaseUnavailable("Database temporarily unavailable", self.retry_after())
+            self.state = self.HALF_OPEN
+            self._probing = False
+        if self.state == self.HALF_OPEN:
+            if self._probing:
+                self.rejected += 1
+                raise DatabaseUnavailable("Database temporarily unavailable", self.retry_after())
+            self._probing = True
+
+    def record_abandoned(self) -> None:
+        """The caller gave up (deadline or cancellation): no verdict on the database"""
+        self._probing = False
+
+    def record_success(self) -> None:
+        self._failures = 0
+        self._probing = False
+        if self.state != self.CLOSED:
+            logger.info("Database circuit closed")
+        self.state = self.CLOSED
+
+    def record_failure(self, error: BaseException) -> None:
+        if not is_transient(error):
+            # The database answered; a bad query says nothing about its health
+            self.record_success()
+            return
+        self.failures += 1
+        self._failures += 1
+        self._probing = False
+        if self.state == self.HALF_OPEN or self._failures >= self.failure_threshold:
+            if self.state != self.OPEN:
+                self.opened += 1
+                logger.warning(f"Database circuit opened after {self._failures} failures: {str(error)}")
+            self.state = self.OPEN
+            self._opened_at = time.monotonic()
+
+    def retry_after(self) -> int:
+        remaining = self.reset_timeout - (time.monotonic() - self._opened_at)
+        return max(1, int(remaining + 0.999))
+
+    def stats(self) -> dict:
+        return {
+            "state": self.state,
+            "consecutive_failures": self._failures,
+            "calls": self.calls,
+            "failures": self.failures,
+            "timeouts": self.timeouts,
+            "retries": self.retries,
+            "rejected": self.rejected,
+            "opened": self.opened,
+        }
+
+
+breaker = CircuitBreaker()
+
+
+def _retry_delay(attempt: int) -> float:
+    # Full jitter: spread retries from many requests instead of synchronizing them
+    return random.uniform(0, RETRY_BASE_DELAY * (2 ** attempt))
+
+
+def _attempts(query) -> int:
+    return 1 + READ_RETRIES if is_read(query) else 1
+
+
+def _unavailable(error: BaseException) -> DatabaseUnavailable:
+    return DatabaseUnavailable(f"Database unavailable: {str(error) or type(error).__name__}")
+
+
+async def run_query(query, timeout: Optional[float] = None):
+    """Execute a PostgREST query builder without blocking the event loop.
+
+    The supabase client is synchronous, so ``.execute()`` runs in a worker
+    thread; independent queries awaited together then actually overlap. Each
+    round trip's latency feeds the load shedder. Calls go through the circuit
+    breaker, are bounded by ``timeout`` (read or write default), and reads are
+    retried with jittered backoff on transient errors. Writes are never
+    retried. Transient failures surface as 503. Within a request, no call
+    waits past the request's deadline (504 once it has passed).
+    """
+    if timeout is None:
+        timeout = READ_TIMEOUT if is_read(query) else WRITE_TIMEOUT
+    attempts = _attempts(query)
+    for attempt in range(attempts):
+        left = deadline.check()
+        budget = timeout if left is None else min(timeout, left)
+        breaker.before_call()
+        started = time.monotonic()
+        try:
+            result = await asyncio.wait_for(asyncio.to_thread(query.execute), budget)
+        except asyncio.CancelledError:
+            breaker.record_abandoned()
+            raise
+        except Exception as e:
+            if isinstance(e, asyncio.TimeoutError):
+                if budget < timeout:
+                    # The request's deadline ran out, not the database's time
+                    breaker.record_abandoned()
+                    deadline.record_exceeded()
+                    raise deadline.DeadlineExceeded()
+                breaker.timeouts += 1
+            breaker.record_failure(e)
+            if not is_transient(e):
+                raise
+            if attempt + 1 == attempts:
+                raise _unavailable(e)
+            breaker.retries += 1
+            await asyncio.sleep(_retry_delay(attempt))
+            continue
+        finally:
+            load_shedder.record_db_latency(time.monotonic() - started)
+        breaker.record_success()
+        return result
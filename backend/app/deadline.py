@@ -0,0 +1,83 @@
+from contextvars import ContextVar
+from typing import Optional, Tuple
+import time
+
+from fastapi import HTTPException
+
+DEADLINE_HEADER = "x-request-timeout"  # Seconds the client will wait, e.g. "4.5"
+DEFAULT_BUDGET = 10.0
+MIN_BUDGET = 0.1
+
+# Longest a request may run, by method and path prefix (first match wins). A
+# client header can only shorten it. None means no deadline: the event stream
+# is meant to stay open.
+ROUTE_BUDGETS: Tuple[Tuple[str, str, Optional[float]], ...] = (
+    ("GET", "/api/events", None),
+    ("POST", "/api/plants/import", 30.0),
+    ("POST", "/api/plants/harvest/user", 30.0),
+    ("POST", "/api/admin/", 120.0),
+)
+
+_deadline: ContextVar[Optional[float]] = ContextVar("request_deadline", default=None)
+exceeded = 0
+
+
+class DeadlineExceeded(HTTPException):
+    def __init__(self):
+        super().__init__(status_code=504, detail="Request deadline exceeded")
+
+
+def route_budget(method: str, path: str) -> Optional[float]:
+    for route_method, prefix, budget in ROUTE_BUDGETS:
+        if method == route_method and path.startswith(prefix):
+            return budget
+    return DEFAULT_BUDGET
+
+
+def request_budget(method: str, path: str, header: Optional[str]) -> Optional[float]:
+    """Seconds this request may take: the route's budget, shortened by the client's header"""
+    budget = route_budget(method, path)
+    if budget is None or not header:
+        return budget
+    try:
+        requested = float(header)
+    except ValueError:
+        return budget
+    if requested != requested:  # NaN
+        return budget
+    return max(MIN_BUDGET, min(budget, requested))
+
+
+def start(budget: Optional[float]):
+    """Set the deadline for the current request; returns a token for reset()"""
+    return _deadline.set(time.monotonic() + budget if budget is not None else None)
+
+
+def reset(token) -> None:
+    _deadline.reset(token)
+
+
+def remaining() -> Optional[float]:
+    """Seconds left before the current request's deadline, or None without one"""
+    deadline = _deadline.get()
+    if deadline is None:
+        return None
+    return deadline - time.monotonic()
+
+
+def check() -> Optional[float]:
+    """Remaining budget; raises DeadlineExceeded if it has run out"""
+    left = remaining()
+    if left is not None and left <= 0:
+        record_exceeded()
+        raise DeadlineExceeded()
+    return left
+
+
+def record_exceeded() -> None:
+    global exceeded
+    exceeded += 1
+
+
+def stats() -> dict:
+    return {"default_budget_seconds": DEFAULT_BUDGET, "exceeded": exceeded}
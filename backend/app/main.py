@@ -1,8 +1,14 @@
-from fastapi import FastAPI
+from fastapi import FastAPI, HTTPException, Query, Request
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import StreamingResponse
+from fastapi.security import HTTPAuthorizationCredentials
 from contextlib import asynccontextmanager
-from .routers import plants, users, admin, friends
+from typing import Optional
+from .routers import plants, users, admin, friends, bootstrap, batch, analytics
 from .services.scheduler_service import scheduler_service
+from .services.event_service import EventService
+from .services.auth import get_current_user_id
+from .middleware import LoadSheddingMiddleware, DeadlineMiddleware
 import logging
 
 logging.basicConfig(level=logging.INFO)
@@ -20,6 +26,11 @@ async def lifespan(app: FastAPI):
 
 app = FastAPI(title="Task Garden API", version="1.0.0", lifespan=lifespan)
 
+# Innermost first: the deadline covers only admitted requests, and CORS wraps
+# both so browsers can read 503/504s and Retry-After
+app.add_middleware(DeadlineMiddleware)
+app.add_middleware(LoadSheddingMiddleware)
+
 app.add_middleware(
     CORSMiddleware,
     allow_origins=[
@@ -36,6 +47,9 @@ app.include_router(plants.router, prefix="/api/plants", tags=["plants"])
 app.include_router(users.router, prefix="/api/users", tags=["users"])
 app.include_router(admin.router, prefix="/api/admin", tags=["admin"])
 app.include_router(friends.router, prefix="/api/friends", tags=["friends"])
+app.include_router(bootstrap.router, prefix="/api/bootstrap", tags=["bootstrap"])
+app.include_router(batch.router, prefix="/api/batch", tags=["batch"])
+app.include_router(analytics.router, prefix="/api/analytics", tags=["analytics"])
 
 
 @app.get("/")
@@ -46,3 +60,26 @@ async def root():
 @app.get("/health")
 async def health_check():
     return {"status": "healthy", "service": "Task Garden API"}
+
+
+@app.get("/api/events")
+async def event_stream(request: Request, token: Optional[str] = Query(None)):
+    """Server-Sent Events push channel for garden, progress and leaderboard changes.
+
+    Browsers' EventSource cannot set headers, so the access token may be passed
+    as the ``token`` query parameter instead of an Authorization header.
+    """
+    authorization = request.headers.get("authorization", "")
+    if not token and authorization.lower().startswith("bearer "):
+        token = authorization[7:]
+    if not token:
+        raise HTTPException(status_code=401, detail="Not authenticated")
+
+    user_id = await get_current_user_id(
+        HTTPAuthorizationCredentials(scheme="Bearer", credentials=token)
+    )
+    return StreamingResponse(
+        EventService.stream(user_id),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
@@ -0,0 +1,112 @@
+import asyncio
+
+import orjson
+
+from . import deadline
+from .services.load_shedder import load_shedder, classify
+
+
+async def _send_error(send, status: int, detail: str, headers=()):
+    body = orjson.dumps({"detail": detail})
+    await send({
+        "type": "http.response.start",
+        "status": status,
+        "headers": [
+            (b"content-type", b"application/json"),
+            (b"content-length", str(len(body)).encode()),
+            *headers,
+        ],
+    })
+    await send({"type": "http.response.body", "body": body})
+
+
+class LoadSheddingMiddleware:
+    """Reject low-priority requests with 503 before they queue behind a slow database.
+
+    Pure ASGI rather than BaseHTTPMiddleware so streaming responses (the SSE
+    channel) pass through untouched. Event streams are not counted as in-flight
+    requests, since an open connection holds no database work.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        path = scope["path"]
+        priority = classify(scope["method"], path)
+        retry_after = load_shedder.should_shed(priority)
+        if retry_after is not None:
+            await _send_error(send, 503, "Server is busy, please retry later", [(b"retry-after", str(retry_after).encode())])
+            return
+
+        if path == "/api/events":
+            await self.app(scope, receive, send)
+            return
+
+        load_shedder.in_flight += 1
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            load_shedder.in_flight -= 1
+
+
+class DeadlineMiddleware:
+    """Give each request a deadline and stop working on it once that passes.
+
+    The budget is the route default (app/deadline.py), shortened by an
+    X-Request-Timeout header in seconds. It is kept in a contextvar so every
+    database call only waits for what is left. When it runs out before a
+    response has started, the handler is cancelled and the client gets 504.
+    After that the response is already on its way and runs to completion.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        header = None
+        for name, value in scope["headers"]:
+            if name == b"x-request-timeout":
+                header = value.decode("latin-1")
+                break
+        budget = deadline.request_budget(scope["method"], scope["path"], header)
+        if budget is None:
+            await self.app(scope, receive, send)
+            return
+
+        response_started = False
+
+        async def send_wrapper(message):
+            nonlocal response_started
+            if message["type"] == "http.response.start":
+                response_started = True
+            await send(message)
+
+        token = deadline.start(budget)
+        try:
+            task = asyncio.ensure_future(self.app(scope, receive, send_wrapper))
+            done, _ = await asyncio.wait({task}, timeout=budget)
+            if task in done:
+                task.result()
+                return
+            if response_started:
+                await task  # Too late to answer 504; let the response finish
+                return
+            task.cancel()
+            try:
+                await task
+            except (asyncio.CancelledError, Exception):
+                pass
+            if not response_started:
+                deadline.record_exceeded()
+                await _send_error(send, 504, "Request deadline exceeded")
+        finally:
+            deadline.reset(token)
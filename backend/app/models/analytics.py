@@ -0,0 +1,40 @@
+from pydantic import BaseModel, Field
+from typing import Dict, List, Optional
+from datetime import date
+from enum import Enum
+
+
+class AnalyticsGranularity(str, Enum):
+    DAY = "day"
+    WEEK = "week"  # ISO weeks, starting Monday
+    MONTH = "month"
+
+
+class AnalyticsBucket(BaseModel):
+    period_start: date
+    hours_worked: float = 0.0
+    experience_gained: int = 0
+    log_count: int = 0
+    hours_by_category: Dict[str, float] = Field(default={}, description="Hours per productivity category")
+
+
+class AnalyticsSeriesResponse(BaseModel):
+    granularity: AnalyticsGranularity
+    start_date: date
+    end_date: date
+    category: Optional[str] = None
+    buckets: List[AnalyticsBucket]
+    total_hours: float
+    total_experience: int
+
+
+class StreakRun(BaseModel):
+    start_date: date
+    end_date: date
+    length: int
+
+
+class StreakHistoryResponse(BaseModel):
+    current_streak: int
+    longest_streak: int
+    streaks: List[StreakRun] = Field(..., description="Runs of consecutive days with work, newest first")
@@ -0,0 +1,14 @@
+from pydantic import BaseModel, Field
+from typing import Any, Dict, List, Optional
+
+from .plant import PlantResponse, TaskWorkResponse, UserProgressResponse
+from .friend import UserProfile, LeaderboardEntry
+
+class BootstrapResponse(BaseModel):
+    plants: Optional[List[PlantResponse]] = None
+    progress: Optional[UserProgressResponse] = None
+    xp: Optional[Dict[str, Any]] = Field(None, description="Level breakdown, as returned by /api/users/progress")
+    work_today: Optional[List[TaskWorkResponse]] = None
+    friends: Optional[List[UserProfile]] = None
+    leaderboard: Optional[List[LeaderboardEntry]] = None
+    errors: Dict[str, str] = Field(default={}, description="Sections that failed to load, by name")
@@ -81,3 +81,19 @@ class LeaderboardEntry(BaseModel):
     plants_grown: int = Field(default=0)
     longest_streak: int = Field(default=0)
     current_streak: int = Field(default=0)
+
+
+class ActivityType(str, Enum):
+    PLANT_COMPLETED = "plant_completed"
+    PLANT_HARVESTED = "plant_harvested"
+    LEVEL_UP = "level_up"
+
+
+class ActivityEvent(BaseModel):
+    id: str
+    actor_id: UUID4
+    type: ActivityType
+    plant_id: Optional[str] = None
+    plant_name: Optional[str] = None
+    level: Optional[int] = None
+    created_at: datetime
@@ -1,8 +1,12 @@
 from pydantic import BaseModel, Field
-from typing import Optional, List
-from datetime import datetime
+from typing import Any, Dict, Optional, List
+from datetime import date, datetime
 from enum import Enum
 
+# Garden grid dimensions (positions are 0-based: x in 0..8, y in 0..6)
+GRID_WIDTH = 9
+GRID_HEIGHT = 7
+
 class TaskStep(BaseModel):
     id: Optional[str] = None
     title: str = Field(..., min_length=1, max_length=100)
@@ -36,8 +40,8 @@ class PlantCreate(BaseModel):
     task_description: Optional[str] = Field(None, max_length=500)  # Optional task description
     productivity_category: ProductivityCategory
     plant_sprite: str = Field(..., min_length=1, max_length=50)
-    position_x: int = Field(..., ge=0, le=8)  # Updated for 9x7 grid (0-8)
-    position_y: int = Field(..., ge=0, le=6)  # Updated for 9x7 grid (0-6)
+    position_x: int = Field(..., ge=0, le=GRID_WIDTH - 1)  # Updated for 9x7 grid (0-8)
+    position_y: int = Field(..., ge=0, le=GRID_HEIGHT - 1)  # Updated for 9x7 grid (0-6)
     task_steps: Optional[List[TaskStep]] = Field(default=[], description="Steps for multi-step tasks")
     is_multi_step: bool = Field(default=False, description="Whether this is a multi-step task")
 
@@ -46,8 +50,8 @@ class PlantUpdate(BaseModel):
     task_description: Optional[str] = Field(None, max_length=500)
     task_status: Optional[str] = Field(None, pattern="^(active|completed|harvested)$")
     plant_sprite: Optional[str] = Field(None, min_length=1, max_length=50)
-    position_x: Optional[int] = Field(None, ge=0, le=8)  # Updated for 9x7 grid
-    position_y: Optional[int] = Field(None, ge=0, le=6)
+    position_x: Optional[int] = Field(None, ge=0, le=GRID_WIDTH - 1)  # Updated for 9x7 grid
+    position_y: Optional[int] = Field(None, ge=0, le=GRID_HEIGHT - 1)
     is_active: Optional[bool] = None
     task_steps: Optional[List[TaskStep]] = None
 
@@ -78,6 +82,91 @@ class PlantResponse(BaseModel):
     completed_steps: Optional[int] = Field(default=0, description="Number of completed steps")
     total_steps: Optional[int] = Field(default=0, description="Total number of steps")
 
+class PlantTombstone(BaseModel):
+    id: str
+    reason: str  # harvested, dead, deleted
+
+class GridCell(BaseModel):
+    position_x: int
+    position_y: int
+
+class FreeCellsResponse(BaseModel):
+    cells: List[GridCell]
+    count: int
+
+class PlantMove(BaseModel):
+    plant_id: str
+    position_x: int = Field(..., ge=0, le=GRID_WIDTH - 1)
+    position_y: int = Field(..., ge=0, le=GRID_HEIGHT - 1)
+
+class GardenLayoutUpdate(BaseModel):
+    moves: List[PlantMove] = Field(..., min_items=1, max_items=GRID_WIDTH * GRID_HEIGHT)
+
+class GardenLayoutResponse(BaseModel):
+    success: bool
+    moved: int
+    moves: List[PlantMove]
+
+class PlantImportRow(BaseModel):
+    name: str = Field(..., min_length=1, max_length=100)
+    task_description: Optional[str] = Field(None, max_length=500)
+    productivity_category: ProductivityCategory = ProductivityCategory.WORK
+    plant_sprite: str = Field("carrot", min_length=1, max_length=50)
+    position_x: Optional[int] = Field(None, ge=0, le=GRID_WIDTH - 1)  # Omit both to auto-assign a free cell
+    position_y: Optional[int] = Field(None, ge=0, le=GRID_HEIGHT - 1)
+    steps: List[str] = Field(default=[], description="Step titles; any steps make it a multi-step task")
+
+class PlantImportRequest(BaseModel):
+    # Raw rows, validated one by one so a bad row is reported instead of failing the import
+    tasks: List[Dict[str, Any]] = Field(..., min_items=1, max_items=GRID_WIDTH * GRID_HEIGHT)
+
+class PlantImportResult(BaseModel):
+    row: int
+    success: bool
+    plant_id: Optional[str] = None
+    position_x: Optional[int] = None
+    position_y: Optional[int] = None
+    error: Optional[str] = None
+
+class PlantImportResponse(BaseModel):
+    results: List[PlantImportResult]
+    created: int
+    failed: int
+
+class ArchiveReason(str, Enum):
+    HARVESTED = "harvested"
+    DEAD = "dead"
+    DELETED = "deleted"
+
+class ArchivedPlant(BaseModel):
+    id: str
+    name: str
+    task_description: Optional[str] = None
+    task_status: Optional[str] = None
+    plant_type: Optional[str] = None
+    plant_sprite: Optional[str] = None
+    experience_points: int = 0
+    decay_status: Optional[str] = None
+    is_multi_step: bool = False
+    completed_steps: Optional[int] = 0
+    total_steps: Optional[int] = 0
+    created_at: datetime
+    updated_at: datetime
+    completion_date: Optional[datetime] = None
+    archived_at: datetime
+    archive_reason: ArchiveReason
+
+class ArchivedPlantsResponse(BaseModel):
+    plants: List[ArchivedPlant]
+    next_before: Optional[str] = Field(None, description="Opaque cursor; pass as `before` to fetch the next page")
+
+class PlantChangesResponse(BaseModel):
+    plants: List[PlantResponse] = Field(default=[], description="Active plants created or changed since the cursor")
+    removed: List[PlantTombstone] = Field(default=[], description="Plants harvested or deactivated since the cursor")
+    cursor: Optional[str] = Field(None, description="Pass back as `since` on the next sync")
+    full_sync: bool = False
+    has_more: bool = Field(False, description="More changes are waiting: fetch again with `cursor` right away")
+
 
 class TaskWorkCreate(BaseModel):
     plant_id: str
@@ -94,6 +183,20 @@ class TaskStepPartial(BaseModel):
     hours_worked: float = Field(..., gt=0, le=24)
     mark_partial: bool = Field(default=True, description="Mark step as partially complete")
 
+class StepAction(str, Enum):
+    COMPLETE = "complete"
+    PARTIAL = "partial"
+
+class TaskStepBulkItem(BaseModel):
+    step_id: str
+    action: StepAction = StepAction.COMPLETE
+    hours_worked: Optional[float] = Field(None, gt=0, le=24)  # Required for partial
+    mark_partial: bool = Field(default=True, description="Mark step as partially complete (partial only)")
+
+class TaskStepBulk(BaseModel):
+    plant_id: str
+    steps: List[TaskStepBulkItem] = Field(..., min_items=1, max_items=50, description="Applied in order")
+
 class PlantConvertToMultiStep(BaseModel):
     plant_id: str
     task_steps: List[TaskStep] = Field(..., min_items=1, description="Steps to add to the task")
@@ -107,6 +210,19 @@ class TaskWorkResponse(BaseModel):
     description: Optional[str] = None
     created_at: datetime
 
+class DailyWorkSummary(BaseModel):
+    work_date: date
+    hours_worked: float = 0.0
+    experience_gained: int = 0
+    log_count: int = 0
+
+class WorkHistoryResponse(BaseModel):
+    start_date: date
+    end_date: date
+    days: List[DailyWorkSummary]
+    total_hours: float
+    total_experience: int
+
 class UserProgressResponse(BaseModel):
     id: str
     user_id: str
@@ -118,4 +234,39 @@ class UserProgressResponse(BaseModel):
     current_streak: int
     last_activity_date: Optional[datetime]
     created_at: datetime
-    updated_at: datetime
\ No newline at end of file
+    updated_at: datetime
+
+class BatchOperationType(str, Enum):
+    WORK = "work"
+    STEP_COMPLETE = "step_complete"
+    STEP_PARTIAL = "step_partial"
+    UPDATE = "update"
+    HARVEST = "harvest"
+
+class BatchOperation(BaseModel):
+    op: BatchOperationType
+    plant_id: str
+    hours_worked: Optional[float] = Field(None, gt=0, le=24)  # work, step_complete, step_partial
+    step_id: Optional[str] = None  # step_complete, step_partial
+    mark_partial: bool = True  # step_partial
+    update: Optional[PlantUpdate] = None  # update
+
+class BatchRequest(BaseModel):
+    operations: List[BatchOperation] = Field(..., min_items=1, max_items=100)
+
+class BatchOperationResult(BaseModel):
+    index: int
+    op: BatchOperationType
+    plant_id: str
+    success: bool
+    status_code: int
+    result: Optional[Dict[str, Any]] = None
+    error: Optional[str] = None
+
+class BatchResponse(BaseModel):
+    results: List[BatchOperationResult]
+    succeeded: int
+    failed: int
+    experience_gained: int = Field(default=0, description="Merged XP earned by the operations, applied to the user in one update")
+    xp_applied: bool = Field(default=True, description="False if the merged XP update failed; plant changes still stand")
+    xp_error: Optional[str] = None
@@ -0,0 +1,32 @@
+from typing import Any, Dict, Optional, Set
+
+from fastapi.responses import ORJSONResponse
+from pydantic import TypeAdapter
+
+
+# PERFORMANCE OPTIMIZATION: Fast serialization path for hot read routes.
+# Returning models through response_model makes FastAPI validate them a second
+# time and walk them with jsonable_encoder. Content served here has already been
+# validated once (when it was read from the database or cache), so it is dumped
+# in a single pydantic-core pass and encoded with orjson instead.
+_adapters: Dict[Any, TypeAdapter] = {}
+
+
+def fast_json_response(
+    content: Any,
+    response_type: Any,
+    headers: Optional[Dict[str, str]] = None,
+    include: Optional[Set[str]] = None,
+    many: bool = False,
+) -> ORJSONResponse:
+    """Serialize trusted, already-validated content of ``response_type`` straight to JSON.
+
+    ``include`` limits the output to a sparse fieldset; pass ``many=True`` when
+    the content is a list so the fieldset applies to every item.
+    """
+    adapter = _adapters.get(response_type)
+    if adapter is None:
+        adapter = _adapters[response_type] = TypeAdapter(response_type)
+    if include is not None and many:
+        include = {"__all__": include}
+    return ORJSONResponse(adapter.dump_python(content, include=include), headers=headers)
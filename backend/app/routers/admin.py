@@ -1,6 +1,6 @@
 from fastapi import APIRouter, Depends, HTTPException
 from fastapi.security import HTTPBearer
-from typing import List
+from typing import List, Optional
 from ..services.auth import require_admin, get_current_user_id
 from ..services.admin_service import AdminService
 from ..models.user import AdminUserListResponse
@@ -29,6 +29,11 @@ async def get_system_stats(credentials = Depends(security)):
     await require_admin(credentials)
     return await AdminService.get_system_stats()
 
+@router.get("/metrics")
+async def get_runtime_metrics(credentials = Depends(security)):
+    await require_admin(credentials)
+    return await AdminService.get_runtime_metrics()
+
 @router.delete("/users/{user_id}")
 async def delete_user(
     user_id: str,
@@ -52,9 +57,39 @@ async def manually_run_decay(credentials = Depends(security)):
     try:
         await scheduler_service.run_daily_decay()
         return {"message": "Daily decay process completed manually"}
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Failed to run decay: {str(e)}")
 
+@router.post("/archive/run")
+async def manually_run_plant_archive(credentials = Depends(security)):
+    await require_admin(credentials)
+    from ..services.archive_service import ArchiveService
+    try:
+        moved = await ArchiveService.compact()
+        return {"message": "Inactive plants archived", "archived_count": moved}
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Failed to archive plants: {str(e)}")
+
+@router.post("/analytics/rebuild")
+async def rebuild_work_rollups(
+    user_id: Optional[str] = None,
+    credentials = Depends(security)
+):
+    """Backfill the analytics rollups from the work log history (one user or everyone)"""
+    await require_admin(credentials)
+    from ..services.analytics_service import AnalyticsService
+    try:
+        rows = await AnalyticsService.rebuild_rollups(user_id)
+        return {"message": "Work rollups rebuilt", "category_buckets": rows}
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Failed to rebuild rollups: {str(e)}")
+
 @router.post("/harvest/run")
 async def manually_run_auto_harvest(credentials = Depends(security)):
     await require_admin(credentials)
@@ -62,5 +97,7 @@ async def manually_run_auto_harvest(credentials = Depends(security)):
     try:
         await AutoHarvestService.check_and_harvest_completed_tasks(force_harvest=True)
         return {"message": "Auto-harvest process completed manually - all trophy plants cleared"}
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Failed to run auto-harvest: {str(e)}")
\ No newline at end of file
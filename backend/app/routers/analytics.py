@@ -0,0 +1,35 @@
+from fastapi import APIRouter, Depends, Query
+from fastapi.security import HTTPBearer
+from datetime import date
+from typing import Optional
+
+from app.services.auth import get_authenticated_supabase
+from app.services.analytics_service import AnalyticsService
+from app.models.analytics import AnalyticsGranularity, AnalyticsSeriesResponse, StreakHistoryResponse
+from app.models.plant import ProductivityCategory
+
+router = APIRouter()
+security = HTTPBearer()
+
+@router.get("/series", response_model=AnalyticsSeriesResponse)
+async def get_analytics_series(
+    granularity: AnalyticsGranularity = Query(AnalyticsGranularity.DAY),
+    start: Optional[date] = Query(None, description="First day (default depends on granularity)"),
+    end: Optional[date] = Query(None, description="Last day (default today, UTC)"),
+    category: Optional[ProductivityCategory] = Query(None),
+    credentials = Depends(security)
+):
+    """Hours and XP per day, week or month from pre-aggregated daily buckets"""
+    auth_supabase, user_id = await get_authenticated_supabase(credentials)
+    return await AnalyticsService.get_series(
+        user_id, granularity, start, end, category.value if category else None, auth_supabase
+    )
+
+@router.get("/streaks", response_model=StreakHistoryResponse)
+async def get_streak_history(
+    days: int = Query(365, ge=1, le=1100),
+    credentials = Depends(security)
+):
+    """Current, longest and past streaks of consecutive days with work"""
+    auth_supabase, user_id = await get_authenticated_supabase(credentials)
+    return await AnalyticsService.get_streak_history(user_id, days, auth_supabase)
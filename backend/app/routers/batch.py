@@ -0,0 +1,25 @@
+from fastapi import APIRouter, Depends, Request, Response
+from fastapi.security import HTTPBearer
+
+from app.services.auth import get_authenticated_supabase
+from app.services.batch_service import BatchService
+from app.services.idempotency_store import idempotency_store
+from app.services.rate_limiter import rate_limiter
+from app.models.plant import BatchRequest, BatchResponse
+
+router = APIRouter()
+security = HTTPBearer()
+
+@router.post("", response_model=BatchResponse)
+async def run_batch(
+    batch: BatchRequest,
+    request: Request,
+    response: Response,
+    credentials = Depends(security)
+):
+    """Run several plant operations (work, step complete/partial, update, harvest) in one call"""
+    auth_supabase, user_id = await get_authenticated_supabase(credentials)
+    return await idempotency_store.run(
+        request, response, user_id, batch,
+        rate_limiter.guard("batch", user_id, lambda: BatchService.run(user_id, batch.operations, auth_supabase))
+    )
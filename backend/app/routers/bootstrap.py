@@ -0,0 +1,60 @@
+from fastapi import APIRouter, Depends, HTTPException, Query
+from fastapi.security import HTTPBearer
+from typing import Optional
+import asyncio
+
+from app.services.auth import get_authenticated_supabase
+from app.services.plant_service import PlantService
+from app.services.friend_service import FriendService
+from app.services.xp_service import XPService
+from app.deadline import DeadlineExceeded
+from app.models.bootstrap import BootstrapResponse
+from app.responses import fast_json_response
+
+router = APIRouter()
+security = HTTPBearer()
+
+BOOTSTRAP_SECTIONS = ("plants", "progress", "xp", "work_today", "friends", "leaderboard")
+
+@router.get("", response_model=BootstrapResponse)
+async def get_bootstrap(
+    exclude: Optional[str] = Query(None, description=f"Comma-separated sections to skip: {', '.join(BOOTSTRAP_SECTIONS)}"),
+    fields: Optional[str] = Query(None, description="Plant fields to return, as for GET /api/plants/"),
+    credentials = Depends(security)
+):
+    """Everything the dashboard needs on load, authenticated once and fetched concurrently"""
+    excluded = {s.strip() for s in (exclude or "").split(",") if s.strip()}
+    unknown = excluded - set(BOOTSTRAP_SECTIONS)
+    if unknown:
+        raise HTTPException(status_code=400, detail=f"Unknown sections: {', '.join(sorted(unknown))}")
+    plant_fields = PlantService.resolve_fields(fields)
+    
+    auth_supabase, user_id = await get_authenticated_supabase(credentials)
+    
+    loaders = {
+        "plants": lambda: PlantService.get_user_plants(user_id, auth_supabase),
+        "progress": lambda: PlantService.get_user_progress(user_id, auth_supabase),
+        "xp": lambda: XPService.get_progress_summary(user_id),
+        "work_today": lambda: PlantService.get_todays_work_logs(user_id, auth_supabase),
+        "friends": lambda: FriendService.get_friends(user_id),
+        "leaderboard": lambda: FriendService.get_leaderboard(user_id),
+    }
+    sections = [name for name in BOOTSTRAP_SECTIONS if name not in excluded]
+    results = await asyncio.gather(*(loaders[name]() for name in sections), return_exceptions=True)
+    
+    # A failing section is reported instead of failing the whole dashboard
+    payload, errors = {}, {}
+    for name, result in zip(sections, results):
+        if isinstance(result, DeadlineExceeded):
+            # Past the deadline the client has given up; a partial 200 would be wasted
+            raise result
+        if isinstance(result, HTTPException):
+            errors[name] = str(result.detail)
+        elif isinstance(result, Exception):
+            errors[name] = str(result)
+        else:
+            payload[name] = result
+    
+    include = {name: True for name in BootstrapResponse.model_fields}
+    include["plants"] = {"__all__": plant_fields}
+    return fast_json_response(BootstrapResponse(**payload, errors=errors), BootstrapResponse, include=include)
@@ -1,5 +1,5 @@
 from typing import Any, List
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, HTTPException, Query, Request
 from fastapi.security import HTTPAuthorizationCredentials, HTTPBearer
 from pydantic import UUID4
 
@@ -11,9 +11,14 @@ from ..models.friend import (
     FriendRequest,
     LeaderboardEntry,
     FriendshipRequest,
+    ActivityEvent,
 )
 from ..services.friend_service import FriendService
+from ..services.activity_service import ActivityService
 from ..services.auth import get_current_user_id
+from ..services.version_service import VersionService, LEADERBOARD
+from ..services.single_flight import single_flight
+from ..responses import fast_json_response
 
 router = APIRouter()
 security = HTTPBearer()
@@ -92,10 +97,26 @@ async def get_friends(credentials: HTTPAuthorizationCredentials = Depends(securi
 # NOTE: look here later lol
 @router.get("/leaderboard", response_model=List[LeaderboardEntry])
 async def get_leaderboard(
+    request: Request,
     credentials: HTTPAuthorizationCredentials = Depends(security),
 ):
     user_id = await get_current_user_id(credentials)
-    return FriendService.get_leaderboard(user_id)
+    etag = VersionService.etag(user_id, LEADERBOARD)
+    if VersionService.not_modified(request, etag):
+        return VersionService.not_modified_response(etag)
+    # Concurrent identical requests join this one
+    leaderboard = await single_flight.do("leaderboard", (user_id, etag), lambda: FriendService.get_leaderboard(user_id))
+    return fast_json_response(leaderboard, List[LeaderboardEntry], VersionService.cache_headers(etag))
+
+
+@router.get("/activity", response_model=List[ActivityEvent])
+async def get_activity_feed(
+    limit: int = Query(50, ge=1, le=100),
+    credentials: HTTPAuthorizationCredentials = Depends(security),
+):
+    """Recent activity (completions, harvests, level-ups) from friends"""
+    user_id = await get_current_user_id(credentials)
+    return ActivityService.get_feed(user_id, limit)
 
 
 @router.get("/profile/{user_id}", response_model=UserProfile)
@@ -1,14 +1,25 @@
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, Response
 from fastapi.security import HTTPBearer
-from typing import List
-from app.services.auth import get_current_user_id, get_authenticated_supabase
-from app.services.plant_service import PlantService
+from pydantic import ValidationError
+from typing import List, Optional
+from app.services.auth import get_current_user_id, get_authenticated_supabase, get_supabase_with_auth
+from app.services.version_service import VersionService, PLANTS, PROGRESS
+from app.services.plant_service import PlantService, SYNC_PAGE_SIZE
 from app.services.auto_harvest_service import AutoHarvestService
-from app.models.plant import PlantCreate, PlantUpdate, PlantResponse, TaskWorkCreate, TaskWorkResponse, UserProgressResponse, TaskStepComplete, TaskStepPartial, PlantConvertToMultiStep
+from app.services.work_log_service import WorkLogService
+from app.services.archive_service import ArchiveService
+from app.services.import_service import ImportService
+from app.services.idempotency_store import idempotency_store
+from app.services.single_flight import single_flight
+from app.services.rate_limiter import rate_limiter
+from app.responses import fast_json_response
+from app.models.plant import PlantCreate, PlantUpdate, PlantResponse, TaskWorkCreate, TaskWorkResponse, WorkHistoryResponse, UserProgressResponse, TaskStepComplete, TaskStepPartial, TaskStepBulk, PlantConvertToMultiStep, PlantChangesResponse, ArchiveReason, ArchivedPlantsResponse, FreeCellsResponse, GardenLayoutUpdate, GardenLayoutResponse, PlantImportRequest, PlantImportResponse
 
 router = APIRouter()
 security = HTTPBearer()
 
+MAX_IMPORT_BYTES = 512 * 1024
+
 @router.post("/", response_model=PlantResponse)
 async def create_plant(
     plant_data: PlantCreate,
@@ -18,52 +29,178 @@ async def create_plant(
     return await PlantService.create_plant(user_id, plant_data, auth_supabase)
 
 @router.get("/", response_model=List[PlantResponse])
-async def get_plants(credentials = Depends(security)):
-    auth_supabase, user_id = await get_authenticated_supabase(credentials)
-    return await PlantService.get_user_plants(user_id, auth_supabase)
+async def get_plants(
+    request: Request,
+    fields: Optional[str] = Query(None, description="Comma-separated fields to return, or * for all (task_steps is omitted by default)"),
+    credentials = Depends(security)
+):
+    user_id = await get_current_user_id(credentials)
+    include = PlantService.resolve_fields(fields)
+    # Conditional GET: answer 304 before building a client or touching the database.
+    # Each field projection is its own representation, so it gets its own ETag.
+    version = VersionService.etag(user_id, PLANTS)
+    etag = VersionService.etag(user_id, PLANTS, include)
+    if VersionService.not_modified(request, etag):
+        return VersionService.not_modified_response(etag)
+    auth_supabase = get_supabase_with_auth(credentials.credentials)
+    # Duplicate tabs/effects loading the same garden version share one query (rows are projected per response)
+    plants = await single_flight.do("plants", (user_id, version), lambda: PlantService.get_user_plants(user_id, auth_supabase))
+    return fast_json_response(plants, List[PlantResponse], VersionService.cache_headers(etag), include=include, many=True)
 
 # SPECIFIC ROUTES FIRST (before parameterized routes)
+@router.get("/changes", response_model=PlantChangesResponse)
+async def get_plant_changes(
+    since: Optional[str] = Query(None, description="Cursor from the previous sync; omit for a full snapshot"),
+    limit: int = Query(SYNC_PAGE_SIZE, ge=1, le=500, description="Most plants to return; see `has_more`"),
+    credentials = Depends(security)
+):
+    """Incremental garden sync: plants changed since the cursor plus tombstones"""
+    auth_supabase, user_id = await get_authenticated_supabase(credentials)
+    return await PlantService.get_plant_changes(user_id, since, auth_supabase, limit)
+
+@router.get("/free-cells", response_model=FreeCellsResponse)
+async def get_free_cells(credentials = Depends(security)):
+    """Empty garden cells, column by column"""
+    auth_supabase, user_id = await get_authenticated_supabase(credentials)
+    return await PlantService.get_free_cells(user_id, auth_supabase)
+
+@router.post("/import", response_model=PlantImportResponse)
+async def import_plants(
+    request: Request,
+    credentials = Depends(security)
+):
+    """Create many plants from JSON ({"tasks": [...]}) or CSV in one insert; free cells are auto-assigned"""
+    auth_supabase, user_id = await get_authenticated_supabase(credentials)
+    await rate_limiter.check("plants.import", user_id)
+    body = await request.body()
+    if len(body) > MAX_IMPORT_BYTES:
+        raise HTTPException(status_code=413, detail="Import is too large")
+    
+    content_type = request.headers.get("content-type", "").split(";")[0].strip().lower()
+    if content_type in ("text/csv", "application/csv"):
+        try:
+            rows = ImportService.parse_csv(body.decode("utf-8"))
+        except UnicodeDecodeError:
+            raise HTTPException(status_code=400, detail="CSV must be UTF-8")
+    else:
+        try:
+            rows = PlantImportRequest.model_validate_json(body).tasks
+        except ValidationError as e:
+            raise HTTPException(status_code=422, detail=e.errors(include_url=False, include_context=False, include_input=False))
+    
+    return await ImportService.import_plants(user_id, rows, auth_supabase)
+
+@router.put("/layout", response_model=GardenLayoutResponse)
+async def update_garden_layout(
+    layout: GardenLayoutUpdate,
+    credentials = Depends(security)
+):
+    """Move or swap many plants in one atomic write"""
+    auth_supabase, user_id = await get_authenticated_supabase(credentials)
+    return await PlantService.apply_layout(user_id, layout, auth_supabase)
+
+@router.get("/archive", response_model=ArchivedPlantsResponse)
+async def get_archived_plants(
+    reason: Optional[ArchiveReason] = Query(None),
+    before: Optional[str] = Query(None, description="next_before from the previous page"),
+    limit: int = Query(50, ge=1, le=200),
+    credentials = Depends(security)
+):
+    """Harvested, deleted and dead plants moved out of the live garden, newest first"""
+    auth_supabase, user_id = await get_authenticated_supabase(credentials)
+    return await ArchiveService.get_archived_plants(user_id, reason.value if reason else None, before, limit, auth_supabase)
+
 @router.post("/work")
 async def log_task_work(
     work_data: TaskWorkCreate,
+    request: Request,
+    response: Response,
     credentials = Depends(security)
 ):
     auth_supabase, user_id = await get_authenticated_supabase(credentials)
-    return await PlantService.log_task_work(user_id, work_data, auth_supabase)
+    return await idempotency_store.run(
+        request, response, user_id, work_data,
+        rate_limiter.guard("plants.work", user_id, lambda: PlantService.log_task_work(user_id, work_data, auth_supabase))
+    )
 
 @router.get("/work/today", response_model=List[TaskWorkResponse])
 async def get_todays_work_logs(credentials = Depends(security)):
     auth_supabase, user_id = await get_authenticated_supabase(credentials)
     return await PlantService.get_todays_work_logs(user_id, auth_supabase)
 
-@router.get("/progress/me", response_model=UserProgressResponse)
-async def get_user_progress(credentials = Depends(security)):
+@router.get("/work/week", response_model=WorkHistoryResponse)
+async def get_weekly_work(credentials = Depends(security)):
+    """Hours and XP for each of the last 7 days"""
     auth_supabase, user_id = await get_authenticated_supabase(credentials)
-    return await PlantService.get_user_progress(user_id, auth_supabase)
+    return await WorkLogService.get_week(user_id, auth_supabase)
+
+@router.get("/work/heatmap", response_model=WorkHistoryResponse)
+async def get_work_heatmap(
+    days: int = Query(365, ge=1, le=366, description="Days back from today"),
+    credentials = Depends(security)
+):
+    """Calendar heatmap of daily work; days without work are omitted"""
+    auth_supabase, user_id = await get_authenticated_supabase(credentials)
+    return await WorkLogService.get_heatmap(user_id, days, auth_supabase)
+
+@router.get("/progress/me", response_model=UserProgressResponse)
+async def get_user_progress(request: Request, credentials = Depends(security)):
+    user_id = await get_current_user_id(credentials)
+    etag = VersionService.etag(user_id, PROGRESS)
+    if VersionService.not_modified(request, etag):
+        return VersionService.not_modified_response(etag)
+    auth_supabase = get_supabase_with_auth(credentials.credentials)
+    progress = await PlantService.get_user_progress(user_id, auth_supabase)
+    return fast_json_response(progress, UserProgressResponse, VersionService.cache_headers(etag))
 
 @router.post("/harvest/user")
 async def harvest_user_trophies(credentials = Depends(security)):
     """Harvest all trophy plants for the current user"""
     auth_supabase, user_id = await get_authenticated_supabase(credentials)
+    await rate_limiter.check("plants.harvest_user", user_id)
     return await AutoHarvestService.check_and_harvest_completed_tasks(user_id, auth_supabase, force_harvest=True)
 
 @router.post("/steps/complete")
 async def complete_task_step(
     step_data: TaskStepComplete,
+    request: Request,
+    response: Response,
     credentials = Depends(security)
 ):
     """Complete a task step using milestone-based growth"""
     auth_supabase, user_id = await get_authenticated_supabase(credentials)
-    return await PlantService.complete_task_step(user_id, step_data, auth_supabase)
+    return await idempotency_store.run(
+        request, response, user_id, step_data,
+        rate_limiter.guard("plants.steps", user_id, lambda: PlantService.complete_task_step(user_id, step_data, auth_supabase))
+    )
 
 @router.post("/steps/partial")
 async def update_task_step_partial(
     step_data: TaskStepPartial,
+    request: Request,
+    response: Response,
     credentials = Depends(security)
 ):
     """Add work hours to a task step and mark as partial"""
     auth_supabase, user_id = await get_authenticated_supabase(credentials)
-    return await PlantService.update_task_step_partial(user_id, step_data, auth_supabase)
+    return await idempotency_store.run(
+        request, response, user_id, step_data,
+        rate_limiter.guard("plants.steps", user_id, lambda: PlantService.update_task_step_partial(user_id, step_data, auth_supabase))
+    )
+
+@router.post("/steps/bulk")
+async def update_task_steps_bulk(
+    bulk_data: TaskStepBulk,
+    request: Request,
+    response: Response,
+    credentials = Depends(security)
+):
+    """Complete or add partial work to several steps of one plant in one write"""
+    auth_supabase, user_id = await get_authenticated_supabase(credentials)
+    return await idempotency_store.run(
+        request, response, user_id, bulk_data,
+        rate_limiter.guard("plants.steps", user_id, lambda: PlantService.update_task_steps_bulk(user_id, bulk_data, auth_supabase))
+    )
 
 @router.post("/convert-to-multi-step")
 async def convert_plant_to_multi_step(
@@ -78,10 +215,13 @@ async def convert_plant_to_multi_step(
 @router.get("/{plant_id}", response_model=PlantResponse)
 async def get_plant(
     plant_id: str,
+    fields: Optional[str] = Query(None, description="Comma-separated fields to return, or * for all (task_steps is omitted by default)"),
     credentials = Depends(security)
 ):
+    include = PlantService.resolve_fields(fields)
     auth_supabase, user_id = await get_authenticated_supabase(credentials)
-    return await PlantService.get_plant_by_id(user_id, plant_id, auth_supabase)
+    plant = await PlantService.get_plant_by_id(user_id, plant_id, auth_supabase, fields=include)
+    return fast_json_response(plant, PlantResponse, include=include)
 
 @router.put("/{plant_id}", response_model=PlantResponse)
 async def update_plant(
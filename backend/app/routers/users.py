@@ -1,4 +1,5 @@
-from fastapi import APIRouter, HTTPException, Depends
+from fastapi import APIRouter, HTTPException, Depends, Request
+from fastapi.responses import ORJSONResponse
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
 from typing import Union
 from datetime import datetime
@@ -9,6 +10,8 @@ from ..config import supabase
 from ..models import UserRegister, UserLogin, Token, UserResponse, RegistrationResponse
 from ..services.auth import get_current_user_id, get_authenticated_supabase
 from ..services.xp_service import XPService
+from ..services.version_service import VersionService, PROGRESS
+from ..services.single_flight import single_flight
 
 router = APIRouter()
 security = HTTPBearer()
@@ -134,40 +137,20 @@ async def get_current_user(credentials: HTTPAuthorizationCredentials = Depends(s
         raise HTTPException(status_code=401, detail="Authentication failed")
 
 @router.get("/progress")
-async def get_user_progress(credentials: HTTPAuthorizationCredentials = Depends(security)):
+async def get_user_progress(request: Request, credentials: HTTPAuthorizationCredentials = Depends(security)):
     """Get user's XP progress including level, total XP, and streaks"""
     try:
         user_id = await get_current_user_id(credentials)
         
-        # Get user progress from database
-        progress_result = supabase.table("user_progress").select("*").eq("user_id", user_id).execute()
+        etag = VersionService.etag(user_id, PROGRESS)
+        if VersionService.not_modified(request, etag):
+            return VersionService.not_modified_response(etag)
         
-        if not progress_result.data:
-            # Create initial progress record
-            initial_progress = await XPService.update_user_xp(user_id, 0)
-            return initial_progress
-        
-        progress = progress_result.data[0]
-        
-        # Check what's stored vs calculated
-        stored_level = progress.get("level", 0)
-        stored_total_xp = progress["total_experience"]
-        
-        # Calculate level breakdown
-        level, current_level_xp, xp_to_next = XPService.calculate_level_from_xp(stored_total_xp)
-        
-        return {
-            "user_id": user_id,
-            "total_experience": stored_total_xp,
-            "level": level,  # Return calculated level instead of stored level
-            "current_level_experience": current_level_xp,
-            "experience_to_next_level": xp_to_next,
-            "current_streak": progress.get("current_streak", 0),
-            "longest_streak": progress.get("longest_streak", 0),
-            "tasks_completed": progress.get("tasks_completed", 0),
-            "plants_grown": progress.get("plants_grown", 0)
-        }
+        progress = await single_flight.do("progress", (user_id, etag), lambda: XPService.get_progress_summary(user_id))
+        return ORJSONResponse(progress, headers=VersionService.cache_headers(etag))
         
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Failed to get user progress: {str(e)}")
 
@@ -178,6 +161,8 @@ async def apply_daily_decay(credentials: HTTPAuthorizationCredentials = Depends(
         user_id = await get_current_user_id(credentials)
         result = await XPService.apply_daily_decay(user_id)
         return result
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Failed to apply daily decay: {str(e)}")
 
@@ -192,5 +177,7 @@ async def logout(credentials: HTTPAuthorizationCredentials = Depends(security)):
         
         return {"message": "Logged out successfully."}
         
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Logout failed: {str(e)}")
@@ -0,0 +1,68 @@
+from collections import OrderedDict, deque
+from datetime import datetime
+from itertools import islice
+from typing import Deque, List, Optional
+import logging
+import uuid
+
+from ..models.friend import ActivityEvent, ActivityType
+from .friend_service import FriendService
+
+logger = logging.getLogger(__name__)
+
+
+# PERFORMANCE OPTIMIZATION: Fan-out-on-write activity timelines.
+# Each event is pushed once into a bounded ring buffer per friend when it
+# happens, so reading a feed is a single slice instead of a join across every
+# friend's plants and progress. Timelines live in process memory; the least
+# recently written ones are dropped once _max_timelines is reached.
+_timelines: "OrderedDict[str, Deque[ActivityEvent]]" = OrderedDict()
+_timeline_size = 100  # Events kept per user
+_max_timelines = 10000
+
+
+class ActivityService:
+
+    @staticmethod
+    async def record(
+        actor_id: str,
+        activity_type: ActivityType,
+        plant_id: Optional[str] = None,
+        plant_name: Optional[str] = None,
+        level: Optional[int] = None,
+    ) -> None:
+        """Fan an activity event out to the timelines of the actor's friends"""
+        try:
+            event = ActivityEvent(
+                id=str(uuid.uuid4()),
+                actor_id=actor_id,
+                type=activity_type,
+                plant_id=plant_id,
+                plant_name=plant_name,
+                level=level,
+                created_at=datetime.now(),
+            )
+
+            for friend_id in await FriendService.get_friend_ids(actor_id):
+                timeline = _timelines.get(friend_id)
+                if timeline is None:
+                    timeline = deque(maxlen=_timeline_size)
+                    _timelines[friend_id] = timeline
+                else:
+                    _timelines.move_to_end(friend_id)
+                timeline.append(event)
+
+            while len(_timelines) > _max_timelines:
+                _timelines.popitem(last=False)
+
+        except Exception as e:
+            # The feed is best-effort and must never fail the action itself
+            logger.warning(f"Failed to record {activity_type.value} activity for {actor_id}: {str(e)}")
+
+    @staticmethod
+    def get_feed(user_id: str, limit: int = 50) -> List[ActivityEvent]:
+        """Return the newest events from a user's timeline, newest first"""
+        timeline = _timelines.get(str(user_id))
+        if not timeline:
+            return []
+        return list(islice(reversed(timeline), limit))
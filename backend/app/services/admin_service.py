@@ -2,22 +2,31 @@ from typing import List
 from datetime import datetime
 from fastapi import HTTPException
 from ..config import supabase
+from ..db import run_query, breaker
+from .. import deadline
 from ..models.user import AdminUserListResponse, UserRole
+from .garden_cache import garden_cache
+from .occupancy_index import occupancy_index
+from .idempotency_store import idempotency_store
+from .optimistic_writer import optimistic_writer
+from .single_flight import single_flight
+from .rate_limiter import rate_limiter
+from .load_shedder import load_shedder
 
 class AdminService:
     @staticmethod
     async def get_all_users() -> List[AdminUserListResponse]:
         try:
-            result = supabase.table("profiles").select("""
+            result = await run_query(supabase.table("profiles").select("""
                 id, email, username, role, created_at,
                 user_progress(total_experience, level, last_activity_date)
-            """).execute()
+            """))
             
             users = []
             for user_data in result.data:
                 progress = user_data.get("user_progress", [{}])[0] if user_data.get("user_progress") else {}
                 
-                plants_result = supabase.table("plants").select("id").eq("user_id", user_data["id"]).eq("is_active", True).execute()
+                plants_result = await run_query(supabase.table("plants").select("id").eq("user_id", user_data["id"]).eq("is_active", True))
                 total_plants = len(plants_result.data)
                 
                 users.append(AdminUserListResponse(
@@ -34,29 +43,33 @@ class AdminService:
             
             return users
             
+        except HTTPException:
+            raise
         except Exception as e:
             raise HTTPException(status_code=500, detail=f"Failed to fetch users: {str(e)}")
 
     @staticmethod
     async def promote_user_to_admin(user_id: str) -> bool:
         try:
-            result = supabase.table("profiles").update({
+            result = await run_query(supabase.table("profiles").update({
                 "role": UserRole.ADMIN.value
-            }).eq("id", user_id).execute()
+            }).eq("id", user_id))
             
             return len(result.data) > 0
             
+        except HTTPException:
+            raise
         except Exception as e:
             raise HTTPException(status_code=500, detail=f"Failed to promote user: {str(e)}")
 
     @staticmethod
     async def get_system_stats() -> dict:
         try:
-            users_result = supabase.table("profiles").select("id").execute()
-            plants_result = supabase.table("plants").select("id").eq("is_active", True).execute()
-            tasks_result = supabase.table("tasks").select("id").execute()
+            users_result = await run_query(supabase.table("profiles").select("id"))
+            plants_result = await run_query(supabase.table("plants").select("id").eq("is_active", True))
+            tasks_result = await run_query(supabase.table("tasks").select("id"))
             
-            total_xp_result = supabase.table("user_progress").select("total_experience").execute()
+            total_xp_result = await run_query(supabase.table("user_progress").select("total_experience"))
             total_xp = sum(row.get("total_experience", 0) for row in total_xp_result.data)
             
             return {
@@ -68,18 +81,38 @@ class AdminService:
                 "last_updated": datetime.now().isoformat()
             }
             
+        except HTTPException:
+            raise
         except Exception as e:
             raise HTTPException(status_code=500, detail=f"Failed to fetch system stats: {str(e)}")
 
+    @staticmethod
+    async def get_runtime_metrics() -> dict:
+        """In-process cache and performance counters for this worker"""
+        return {
+            "garden_cache": garden_cache.stats(),
+            "occupancy_index": occupancy_index.stats(),
+            "idempotency": idempotency_store.stats(),
+            "optimistic_writes": optimistic_writer.stats(),
+            "single_flight": single_flight.stats(),
+            "rate_limiter": rate_limiter.stats(),
+            "load_shedding": load_shedder.stats(),
+            "database": breaker.stats(),
+            "deadlines": deadline.stats(),
+            "collected_at": datetime.now().isoformat()
+        }
+
     @staticmethod
     async def delete_user(user_id: str) -> bool:
         try:
-            supabase.table("plants").update({"is_active": False}).eq("user_id", user_id).execute()
-            supabase.table("tasks").delete().eq("user_id", user_id).execute()
-            supabase.table("user_progress").delete().eq("user_id", user_id).execute()
+            await run_query(supabase.table("plants").update({"is_active": False}).eq("user_id", user_id))
+            await run_query(supabase.table("tasks").delete().eq("user_id", user_id))
+            await run_query(supabase.table("user_progress").delete().eq("user_id", user_id))
             
             result = supabase.auth.admin.delete_user(user_id)
             return True
             
+        except HTTPException:
+            raise
         except Exception as e:
             raise HTTPException(status_code=500, detail=f"Failed to delete user: {str(e)}")
\ No newline at end of file
@@ -0,0 +1,144 @@
+from datetime import date, timedelta
+from typing import Dict, List, Optional
+import logging
+
+from fastapi import HTTPException
+
+from app.config import supabase, POSTGREST_TIMEOUT
+from app.db import run_query
+from app.models.analytics import (
+    AnalyticsGranularity, AnalyticsBucket, AnalyticsSeriesResponse, StreakRun, StreakHistoryResponse
+)
+from app.services.work_log_service import WorkLogService, utc_today
+
+logger = logging.getLogger(__name__)
+
+
+# Series are built from the (user, day, category) buckets in
+# user_category_daily_work, which the plant_work_logs insert trigger keeps
+# current (migrations/004_work_analytics.sql); week and month buckets are summed
+# from daily ones here, so cost grows with the number of days, not log rows.
+_max_range_days = 1100  # ~3 years per request
+_default_range_days = {
+    AnalyticsGranularity.DAY: 30,
+    AnalyticsGranularity.WEEK: 7 * 12,
+    AnalyticsGranularity.MONTH: 365,
+}
+
+
+def period_start(day: date, granularity: AnalyticsGranularity) -> date:
+    if granularity == AnalyticsGranularity.WEEK:
+        return day - timedelta(days=day.weekday())
+    if granularity == AnalyticsGranularity.MONTH:
+        return day.replace(day=1)
+    return day
+
+
+def _next_period(start: date, granularity: AnalyticsGranularity) -> date:
+    if granularity == AnalyticsGranularity.WEEK:
+        return start + timedelta(days=7)
+    if granularity == AnalyticsGranularity.MONTH:
+        return (start.replace(day=28) + timedelta(days=4)).replace(day=1)
+    return start + timedelta(days=1)
+
+
+class AnalyticsService:
+
+    @staticmethod
+    def resolve_range(granularity: AnalyticsGranularity, start: Optional[date], end: Optional[date]) -> tuple:
+        end = end or utc_today()
+        start = start or end - timedelta(days=_default_range_days[granularity] - 1)
+        if start > end:
+            raise HTTPException(status_code=400, detail="start must not be after end")
+        if (end - start).days >= _max_range_days:
+            raise HTTPException(status_code=400, detail=f"Range is limited to {_max_range_days} days")
+        return start, end
+
+    @staticmethod
+    async def get_series(
+        user_id: str,
+        granularity: AnalyticsGranularity = AnalyticsGranularity.DAY,
+        start: Optional[date] = None,
+        end: Optional[date] = None,
+        category: Optional[str] = None,
+        auth_supabase=None,
+    ) -> AnalyticsSeriesResponse:
+        """Hours/XP per day, week or month, optionally for one productivity category"""
+        client = auth_supabase or supabase
+        start, end = AnalyticsService.resolve_range(granularity, start, end)
+        
+        query = (
+            client.table("user_category_daily_work")
+            .select("work_date, productivity_category, hours_worked, experience_gained, log_count")
+            .eq("user_id", user_id)
+            .gte("work_date", start.isoformat())
+            .lte("work_date", end.isoformat())
+        )
+        if category:
+            query = query.eq("productivity_category", category)
+        try:
+            result = await run_query(query)
+        except HTTPException:
+            raise
+        except Exception as e:
+            raise HTTPException(status_code=500, detail=f"Failed to get analytics: {str(e)}")
+        
+        # Zero-filled buckets over the whole range, then one pass over the rows
+        buckets: Dict[date, AnalyticsBucket] = {}
+        cursor = period_start(start, granularity)
+        while cursor <= end:
+            buckets[cursor] = AnalyticsBucket(period_start=cursor)
+            cursor = _next_period(cursor, granularity)
+        
+        for row in result.data:
+            work_date = row["work_date"]
+            if isinstance(work_date, str):
+                work_date = date.fromisoformat(work_date)
+            bucket = buckets[period_start(work_date, granularity)]
+            hours = float(row["hours_worked"] or 0)
+            bucket.hours_worked = round(bucket.hours_worked + hours, 2)
+            bucket.experience_gained += row["experience_gained"] or 0
+            bucket.log_count += row["log_count"] or 0
+            row_category = row["productivity_category"]
+            bucket.hours_by_category[row_category] = round(bucket.hours_by_category.get(row_category, 0.0) + hours, 2)
+        
+        series = list(buckets.values())
+        return AnalyticsSeriesResponse(
+            granularity=granularity,
+            start_date=start,
+            end_date=end,
+            category=category,
+            buckets=series,
+            total_hours=round(sum(b.hours_worked for b in series), 2),
+            total_experience=sum(b.experience_gained for b in series),
+        )
+
+    @staticmethod
+    async def get_streak_history(user_id: str, days: int = 365, auth_supabase=None) -> StreakHistoryResponse:
+        """Runs of consecutive days with logged work, from the daily rollup"""
+        end = utc_today()
+        start = end - timedelta(days=days - 1)
+        worked = [d.work_date for d in await WorkLogService.get_daily_totals(user_id, start, end, auth_supabase)]
+        
+        runs: List[StreakRun] = []
+        for day in worked:
+            if runs and (day - runs[-1].end_date).days == 1:
+                runs[-1].end_date = day
+                runs[-1].length += 1
+            else:
+                runs.append(StreakRun(start_date=day, end_date=day, length=1))
+        
+        # A streak is still current if the last worked day is today or yesterday
+        current = runs[-1].length if runs and (end - runs[-1].end_date).days <= 1 else 0
+        return StreakHistoryResponse(
+            current_streak=current,
+            longest_streak=max((r.length for r in runs), default=0),
+            streaks=list(reversed(runs)),
+        )
+
+    @staticmethod
+    async def rebuild_rollups(user_id: Optional[str] = None) -> int:
+        """Backfill: recompute the daily and per-category rollups from plant_work_logs in bulk"""
+        params = {"p_user_id": user_id} if user_id else {}
+        result = await run_query(supabase.rpc("rebuild_work_rollups", params), timeout=POSTGREST_TIMEOUT)
+        return result.data or 0
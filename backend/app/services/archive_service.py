@@ -0,0 +1,104 @@
+from datetime import datetime
+from typing import Optional, Tuple
+import base64
+import logging
+import uuid
+
+from fastapi import HTTPException
+
+from app.config import supabase, POSTGREST_TIMEOUT
+from app.db import run_query
+from app.models.plant import ArchivedPlant, ArchivedPlantsResponse
+
+logger = logging.getLogger(__name__)
+
+
+ARCHIVE_COLUMNS = (
+    "id, name, task_description, task_status, plant_type, plant_sprite, "
+    "experience_points, decay_status, is_multi_step, completed_steps, total_steps, "
+    "created_at, updated_at, completion_date, archived_at, archive_reason"
+)
+
+# Compaction moves rows with one RPC per batch (migrations/005_plants_archive.sql)
+_batch_size = 500
+_max_batches = 40  # Per run; a backlog larger than this drains over several runs
+_grace_period = "1 day"  # Removed plants stay in plants this long before archiving
+
+
+class ArchiveService:
+
+    @staticmethod
+    async def compact(batch_size: int = _batch_size, max_batches: int = _max_batches) -> int:
+        """Move inactive plants into plants_archive in batches; returns rows moved"""
+        total = 0
+        for _ in range(max_batches):
+            result = await run_query(supabase.rpc("archive_inactive_plants", {
+                "p_batch_size": batch_size,
+                "p_grace": _grace_period,
+            }), timeout=POSTGREST_TIMEOUT)
+            moved = result.data or 0
+            total += moved
+            if moved < batch_size:
+                break
+        return total
+
+    @staticmethod
+    async def get_archived_plants(
+        user_id: str,
+        reason: Optional[str] = None,
+        before: Optional[str] = None,
+        limit: int = 50,
+        auth_supabase=None,
+    ) -> ArchivedPlantsResponse:
+        """A user's archived plants, newest first, paged by (archived_at, id).
+
+        A compaction batch archives every row with the same archived_at, so the
+        id breaks ties; paging on the timestamp alone would skip the rest of a
+        batch that straddles a page boundary.
+        """
+        client = auth_supabase or supabase
+        query = client.table("plants_archive").select(ARCHIVE_COLUMNS).eq("user_id", user_id)
+        if reason:
+            query = query.eq("archive_reason", reason)
+        if before:
+            archived_at, plant_id = ArchiveService._decode_page_cursor(before)
+            query = query.or_(f'archived_at.lt."{archived_at}",and(archived_at.eq."{archived_at}",id.lt.{plant_id})')
+        try:
+            result = await run_query(query.order("archived_at", desc=True).order("id", desc=True).limit(limit))
+        except HTTPException:
+            raise
+        except Exception as e:
+            raise HTTPException(status_code=500, detail=f"Failed to get archived plants: {str(e)}")
+        
+        plants = [ArchivedPlant(**row) for row in result.data]
+        last = result.data[-1] if len(result.data) == limit else None
+        next_before = ArchiveService._encode_page_cursor(last["archived_at"], last["id"]) if last else None
+        return ArchivedPlantsResponse(plants=plants, next_before=next_before)
+
+    @staticmethod
+    def _encode_page_cursor(archived_at: str, plant_id: str) -> str:
+        # Opaque and URL-safe, like the sync cursor
+        return base64.urlsafe_b64encode(f"{archived_at}|{plant_id}".encode()).decode().rstrip("=")
+
+    @staticmethod
+    def _decode_page_cursor(cursor: str) -> Tuple[str, str]:
+        try:
+            padded = cursor + "=" * (-len(cursor) % 4)
+            archived_at, plant_id = base64.urlsafe_b64decode(padded.encode()).decode().split("|")
+            # Both end up in a filter expression: accept only a timestamp and a uuid
+            datetime.fromisoformat(archived_at.replace('Z', '+00:00'))
+            return archived_at, str(uuid.UUID(plant_id))
+        except Exception:
+            raise HTTPException(status_code=400, detail="Invalid archive cursor")
+
+    @staticmethod
+    async def get_tombstones_since(user_id: str, since_ts: str, auth_supabase=None) -> list:
+        """Archived rows changed after a sync cursor (id, reason, updated_at)"""
+        client = auth_supabase or supabase
+        result = await run_query(
+            client.table("plants_archive")
+            .select("id, archive_reason, updated_at")
+            .eq("user_id", user_id)
+            .gt("updated_at", since_ts)
+        )
+        return result.data
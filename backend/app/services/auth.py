@@ -1,11 +1,12 @@
 from fastapi import HTTPException
 from fastapi.security import HTTPAuthorizationCredentials
-from supabase import create_client
+from supabase import create_client, ClientOptions
 import os
 import time
 from typing import Dict, Tuple
 
-from ..config import supabase, SUPABASE_URL, SUPABASE_KEY
+from ..config import supabase, SUPABASE_URL, SUPABASE_KEY, POSTGREST_TIMEOUT
+from ..db import run_query
 from ..models.user import UserRole
 
 
@@ -15,7 +16,7 @@ _cache_ttl = 300  # 5 minutes cache for auth tokens
 
 
 def get_supabase_with_auth(jwt_token: str):
-    client = create_client(SUPABASE_URL, SUPABASE_KEY)
+    client = create_client(SUPABASE_URL, SUPABASE_KEY, options=ClientOptions(postgrest_client_timeout=POSTGREST_TIMEOUT))
     client.postgrest.auth(jwt_token)
     return client
 
@@ -76,7 +77,7 @@ async def get_authenticated_supabase(credentials: HTTPAuthorizationCredentials):
 async def get_current_user_role(credentials: HTTPAuthorizationCredentials) -> UserRole:
     try:
         user_id = await get_current_user_id(credentials)
-        result = supabase.table("profiles").select("role").eq("id", user_id).execute()
+        result = await run_query(supabase.table("profiles").select("role").eq("id", user_id))
 
         if not result.data:
             return UserRole.USER
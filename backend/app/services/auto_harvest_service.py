@@ -1,8 +1,11 @@
 from typing import List
 from datetime import datetime, date, timedelta
 from app.config import supabase
+from app.db import run_query
 from app.models.plant import PlantResponse, DecayStatus
+from app.models.friend import ActivityType
 from app.services.plant_service import PlantService
+from app.services.activity_service import ActivityService
 from fastapi import HTTPException
 
 class AutoHarvestService:
@@ -19,7 +22,7 @@ class AutoHarvestService:
             if user_id:
                 query = query.eq("user_id", user_id)
             
-            result = query.execute()
+            result = await run_query(query)
             
             for plant_dict in result.data:
                 # Check if this is a trophy plant (stage 5) or completed task
@@ -57,10 +60,11 @@ class AutoHarvestService:
                 
                 if should_harvest:
                     # Auto-harvest this plant
-                    client.table("plants").update({
+                    await run_query(client.table("plants").update({
                         "task_status": "harvested",
                         "is_active": False  # Remove from garden
-                    }).eq("id", plant_dict["id"]).execute()
+                    }).eq("id", plant_dict["id"]))
+                    PlantService._publish_plant_event(plant_dict["user_id"], "plant.removed", {"id": plant_dict["id"], "reason": "harvested"})
                     harvested_count += 1
             
             return {
@@ -68,6 +72,8 @@ class AutoHarvestService:
                 "harvested_count": harvested_count
             }
                     
+        except HTTPException:
+            raise
         except Exception as e:
             raise HTTPException(status_code=500, detail=f"Failed to run auto-harvest: {str(e)}")
     
@@ -76,14 +82,14 @@ class AutoHarvestService:
         """Mark a task as completed"""
         client = auth_supabase or supabase
         try:
-            # Get the plant first
-            plant = await PlantService.get_plant_by_id(user_id, plant_id, auth_supabase)
+            # Get the plant first (only the columns this check needs)
+            plant = await PlantService._get_plant_row(client, user_id, plant_id, "name, task_status, growth_level")
             
-            if plant.task_status == "completed":
+            if plant.get("task_status") == "completed":
                 raise HTTPException(status_code=400, detail="Task is already completed")
             
             # Check if plant has reached stage 4+ (80+ growth_level) before allowing completion
-            plant_stage = min(5, plant.growth_level // 20)
+            plant_stage = min(5, (plant.get("growth_level") or 0) // 20)
             if plant_stage < 4:
                 raise HTTPException(
                     status_code=400, 
@@ -92,15 +98,19 @@ class AutoHarvestService:
             
             # Mark as completed
             completion_date = datetime.now()
-            result = client.table("plants").update({
+            update_data = {
                 "task_status": "completed",
                 "completion_date": completion_date.isoformat(),
                 "decay_status": DecayStatus.HEALTHY.value,  # Completed tasks are healthy
-            }).eq("id", plant_id).eq("user_id", user_id).execute()
+            }
+            result = await run_query(client.table("plants").update(update_data).eq("id", plant_id).eq("user_id", user_id))
             
             if not result.data:
                 raise HTTPException(status_code=404, detail="Plant not found")
             
+            PlantService._publish_plant_event(user_id, "plant.updated", {"id": plant_id, "changes": update_data})
+            await ActivityService.record(user_id, ActivityType.PLANT_COMPLETED, plant_id=plant_id, plant_name=plant.get("name"))
+            
             return {
                 "message": "Task completed successfully! It will be auto-harvested in 6 hours.",
                 "completion_date": completion_date.isoformat(),
@@ -117,21 +127,24 @@ class AutoHarvestService:
         """Manually harvest a completed task before auto-harvest"""
         client = auth_supabase or supabase
         try:
-            # Get the plant first
-            plant = await PlantService.get_plant_by_id(user_id, plant_id, auth_supabase)
+            # Get the plant first (only the columns this check needs)
+            plant = await PlantService._get_plant_row(client, user_id, plant_id, "name, task_status")
             
-            if plant.task_status != "completed":
+            if plant.get("task_status") != "completed":
                 raise HTTPException(status_code=400, detail="Task must be completed before harvesting")
             
             # Harvest the plant
-            result = client.table("plants").update({
+            result = await run_query(client.table("plants").update({
                 "task_status": "harvested",
                 "is_active": False
-            }).eq("id", plant_id).eq("user_id", user_id).execute()
+            }).eq("id", plant_id).eq("user_id", user_id))
             
             if not result.data:
                 raise HTTPException(status_code=404, detail="Plant not found")
             
+            PlantService._publish_plant_event(user_id, "plant.removed", {"id": plant_id, "reason": "harvested"})
+            await ActivityService.record(user_id, ActivityType.PLANT_HARVESTED, plant_id=plant_id, plant_name=plant.get("name"))
+            
             return {
                 "message": "Task harvested successfully! Great job completing your task.",
                 "harvest_date": datetime.now().isoformat()
@@ -0,0 +1,118 @@
+from typing import List, Optional
+import logging
+
+from fastapi import HTTPException
+from pydantic import ValidationError
+
+from app import deadline
+
+from app.models.plant import (
+    BatchOperation, BatchOperationType, BatchOperationResult, BatchResponse,
+    TaskWorkCreate, TaskStepComplete, TaskStepPartial
+)
+from app.services.plant_service import PlantService
+from app.services.auto_harvest_service import AutoHarvestService
+from app.services.xp_service import XPService
+
+logger = logging.getLogger(__name__)
+
+
+class BatchService:
+
+    @staticmethod
+    async def run(user_id: str, operations: List[BatchOperation], auth_supabase=None) -> BatchResponse:
+        """Apply plant operations in order, merging their XP into a single progress update.
+        
+        Only user_progress is grouped. Plant rows are still written per operation
+        (each carries its own values and version guard, and PostgREST has no
+        multi-row UPDATE with distinct values), and so are work logs, whose ids
+        are part of each work result.
+        """
+        results = []
+        deferred = {}
+        try:
+            with PlantService.deferred_xp() as deferred:
+                for index, operation in enumerate(operations):
+                    results.append(await BatchService._run_operation(index, user_id, operation, auth_supabase))
+        except BaseException:
+            # Cut short (deadline, cancellation, unexpected error): operations that
+            # already committed still get their XP, whatever budget is left
+            token = deadline.start(None)
+            try:
+                await BatchService._grant_xp(user_id, deferred.get(user_id, 0))
+            finally:
+                deadline.reset(token)
+            raise
+        
+        experience_gained = deferred.get(user_id, 0)
+        # Same policy as single operations: plant changes stand even if XP fails
+        xp_error = await BatchService._grant_xp(user_id, experience_gained)
+        
+        succeeded = sum(1 for r in results if r.success)
+        return BatchResponse(
+            results=results,
+            succeeded=succeeded,
+            failed=len(results) - succeeded,
+            experience_gained=experience_gained,
+            xp_applied=xp_error is None,
+            xp_error=xp_error
+        )
+    
+    @staticmethod
+    async def _grant_xp(user_id: str, experience_gained: int) -> Optional[str]:
+        """Apply the merged XP; returns why it failed instead of raising"""
+        if not experience_gained:
+            return None
+        try:
+            await XPService.update_user_xp(user_id, experience_gained)
+            return None
+        except Exception as e:
+            logger.warning(f"Failed to grant {experience_gained} batch XP to {user_id}: {str(e)}")
+            return str(getattr(e, "detail", e))
+    
+    @staticmethod
+    async def _run_operation(index: int, user_id: str, operation: BatchOperation, auth_supabase) -> BatchOperationResult:
+        try:
+            result = await BatchService._dispatch(user_id, operation, auth_supabase)
+            return BatchOperationResult(
+                index=index, op=operation.op, plant_id=operation.plant_id,
+                success=True, status_code=200, result=result
+            )
+        except HTTPException as e:
+            return BatchOperationResult(
+                index=index, op=operation.op, plant_id=operation.plant_id,
+                success=False, status_code=e.status_code, error=str(e.detail)
+            )
+        except ValidationError as e:
+            return BatchOperationResult(
+                index=index, op=operation.op, plant_id=operation.plant_id,
+                success=False, status_code=422, error=str(e)
+            )
+    
+    @staticmethod
+    async def _dispatch(user_id: str, operation: BatchOperation, auth_supabase) -> dict:
+        if operation.op == BatchOperationType.WORK:
+            work_data = TaskWorkCreate(plant_id=operation.plant_id, hours_worked=operation.hours_worked)
+            return await PlantService.log_task_work(user_id, work_data, auth_supabase)
+        
+        if operation.op == BatchOperationType.STEP_COMPLETE:
+            step_data = TaskStepComplete(plant_id=operation.plant_id, step_id=operation.step_id, hours_worked=operation.hours_worked)
+            return await PlantService.complete_task_step(user_id, step_data, auth_supabase)
+        
+        if operation.op == BatchOperationType.STEP_PARTIAL:
+            step_data = TaskStepPartial(
+                plant_id=operation.plant_id, step_id=operation.step_id,
+                hours_worked=operation.hours_worked, mark_partial=operation.mark_partial
+            )
+            return await PlantService.update_task_step_partial(user_id, step_data, auth_supabase)
+        
+        if operation.op == BatchOperationType.UPDATE:
+            if operation.update is None:
+                raise HTTPException(status_code=400, detail="update operations need an 'update' object")
+            plant = await PlantService.update_plant(user_id, operation.plant_id, operation.update)
+            return plant.model_dump(mode="json")
+        
+        if operation.op == BatchOperationType.HARVEST:
+            return await AutoHarvestService.manual_harvest(user_id, operation.plant_id, auth_supabase)
+        
+        raise HTTPException(status_code=400, detail=f"Unsupported operation: {operation.op}")
@@ -0,0 +1,73 @@
+import asyncio
+import json
+import logging
+from typing import AsyncIterator, Dict, Set
+
+logger = logging.getLogger(__name__)
+
+
+# Per-user set of subscriber queues for the Server-Sent Events push channel.
+# An idle connection is just one coroutine parked on its queue, so a worker can
+# hold thousands of them; events are encoded once per publish, not per client.
+_subscribers: Dict[str, Set[asyncio.Queue]] = {}
+_queue_size = 100  # Pending events per connection before the oldest are dropped
+_heartbeat_interval = 15  # Seconds between keep-alive comments
+
+
+class EventService:
+
+    @staticmethod
+    def subscribe(user_id: str) -> asyncio.Queue:
+        queue: asyncio.Queue = asyncio.Queue(maxsize=_queue_size)
+        _subscribers.setdefault(str(user_id), set()).add(queue)
+        return queue
+
+    @staticmethod
+    def unsubscribe(user_id: str, queue: asyncio.Queue) -> None:
+        queues = _subscribers.get(str(user_id))
+        if queues is None:
+            return
+        queues.discard(queue)
+        if not queues:
+            _subscribers.pop(str(user_id), None)
+
+    @staticmethod
+    def publish(user_id: str, event_type: str, data: dict) -> None:
+        """Push an event to every open connection of a user (never blocks)"""
+        queues = _subscribers.get(str(user_id))
+        if not queues:
+            return
+
+        try:
+            message = f"event: {event_type}\ndata: {json.dumps(data, default=str)}\n\n"
+        except Exception as e:
+            logger.warning(f"Failed to encode {event_type} event: {str(e)}")
+            return
+
+        for queue in list(queues):
+            if queue.full():
+                # Slow client: drop its oldest event rather than block the writer
+                try:
+                    queue.get_nowait()
+                except asyncio.QueueEmpty:
+                    pass
+            queue.put_nowait(message)
+
+    @staticmethod
+    def subscriber_count() -> int:
+        return sum(len(queues) for queues in _subscribers.values())
+
+    @staticmethod
+    async def stream(user_id: str) -> AsyncIterator[str]:
+        """Yield SSE messages for a user until the client disconnects"""
+        queue = EventService.subscribe(user_id)
+        try:
+            yield "retry: 5000\n\n"
+            while True:
+                try:
+                    message = await asyncio.wait_for(queue.get(), timeout=_heartbeat_interval)
+                    yield message
+                except asyncio.TimeoutError:
+                    yield ": keep-alive\n\n"
+        finally:
+            EventService.unsubscribe(user_id, queue)
@@ -1,4 +1,7 @@
-from typing import List, Optional
+import logging
+import time
+from collections import OrderedDict
+from typing import Dict, List, Optional, Tuple
 from fastapi import HTTPException
 from pydantic import UUID4, EmailStr
 
@@ -11,16 +14,33 @@ from ..models.friend import (
     LeaderboardEntry,
 )
 from ..config import supabase
+from ..db import run_query
+from .version_service import VersionService, LEADERBOARD
+
+logger = logging.getLogger(__name__)
+
+
+# PERFORMANCE OPTIMIZATION: In-memory email -> user_id index so friend requests
+# skip the profile lookup round trip. Emails map to a fixed user_id, so a long
+# TTL is safe; misses are never cached so new sign-ups resolve immediately.
+# Kept in least recently used order; the oldest entry goes once the index is full.
+_email_index: "OrderedDict[str, Tuple[str, float]]" = OrderedDict()
+_email_index_ttl = 3600  # 1 hour
+_email_index_max_size = 5000
+
+# Accepted friend ids per user, used for activity fan-out and the leaderboard.
+# Invalidated whenever a friendship is accepted or removed.
+_friend_ids_cache: Dict[str, Tuple[List[str], float]] = {}
+_friend_ids_ttl = 300  # 5 minutes
 
 
 class FriendService:
     @staticmethod
     async def get_user_profile(user_id: UUID4) -> Optional[UserProfile]:
-        result = (
+        result = await run_query(
             supabase.table("user_profiles")
             .select("*")
             .eq("user_id", str(user_id))
-            .execute()
         )
         if not result.data:
             return None
@@ -34,62 +54,60 @@ class FriendService:
         if not update_data:
             raise HTTPException(status_code=400, detail="No fields to update")
 
-        result = (
+        result = await run_query(
             supabase.table("user_profiles")
             .update(update_data)
             .eq("user_id", str(user_id))
-            .execute()
         )
         if not result.data:
             raise HTTPException(status_code=404, detail="Profile not found")
         return UserProfile(**result.data[0])
 
     @staticmethod
-    async def send_friend_request(
-        requester_id: UUID4, friend_email: EmailStr
-    ) -> Friendship:
-        # Get addressee user_id from email
-        profile_result = (
+    async def _resolve_user_id_by_email(email: str) -> Optional[str]:
+        """Resolve an email to a user_id, using the in-memory email index first"""
+        # One normal form for the cache key and the lookup (profiles store the
+        # lowercased address, see migrations/010_user_profiles_email_lower.sql)
+        key = email.strip().lower()
+        current_time = time.time()
+
+        cached = _email_index.get(key)
+        if cached and current_time - cached[1] < _email_index_ttl:
+            _email_index.move_to_end(key)
+            return cached[0]
+
+        profile_result = await run_query(
             supabase.table("user_profiles")
             .select("user_id")
-            .eq("email", friend_email)
-            .execute()
+            .eq("email", key)
         )
         if not profile_result.data:
-            raise HTTPException(status_code=404, detail="User not found")
+            return None
 
-        addressee_id = profile_result.data[0]["user_id"]
+        user_id = profile_result.data[0]["user_id"]
+        _email_index[key] = (user_id, current_time)
+        _email_index.move_to_end(key)
+        while len(_email_index) > _email_index_max_size:
+            _email_index.popitem(last=False)
 
-        user_pair = [str(requester_id), str(addressee_id)]
+        return user_id
 
-        existing = (
-            supabase.table("friendships")
-            .select("*")
-            .in_("user_one_id", user_pair)
-            .in_("user_two_id", user_pair)
-            .execute()
-        )
-
-        if existing.data:
-            friendship = existing.data[0]
-            status = FriendshipStatus(friendship["status"])
-            if status == FriendshipStatus.PENDING.value:
-                raise HTTPException(
-                    status_code=400, detail="Friend request already pending"
-                )
-            elif status == FriendshipStatus.ACCEPTED.value:
-                raise HTTPException(status_code=400, detail="Already friends")
-            elif status == FriendshipStatus.BLOCKED.value:
-                raise HTTPException(
-                    status_code=403, detail="Cannot send friend request"
-                )
+    @staticmethod
+    async def send_friend_request(
+        requester_id: UUID4, friend_email: EmailStr
+    ) -> Friendship:
+        addressee_id = await FriendService._resolve_user_id_by_email(friend_email)
+        if not addressee_id:
+            raise HTTPException(status_code=404, detail="User not found")
 
-        # Create new friendship
+        # The (user_one_id, user_two_id) pair is unique and always stored sorted,
+        # so a single insert that ignores conflicts replaces the old
+        # check-then-insert flow and cannot race with a concurrent request.
         user_ids = sorted([str(requester_id), str(addressee_id)])
 
-        result = (
+        result = await run_query(
             supabase.table("friendships")
-            .insert(
+            .upsert(
                 {
                     "user_one_id": user_ids[0],
                     "user_two_id": user_ids[1],
@@ -97,12 +115,65 @@ class FriendService:
                         requester_id
                     ),  # The person sending the request
                     "status": FriendshipStatus.PENDING.value,
-                }
+                },
+                on_conflict="user_one_id,user_two_id",
+                ignore_duplicates=True,
             )
-            .execute()
         )
 
-        return Friendship(**result.data[0])
+        if result.data:
+            return Friendship(**result.data[0])
+
+        # Conflict: a friendship row already exists for this pair
+        existing = await run_query(
+            supabase.table("friendships")
+            .select("status")
+            .match({"user_one_id": user_ids[0], "user_two_id": user_ids[1]})
+        )
+        status = (
+            FriendshipStatus(existing.data[0]["status"]) if existing.data else None
+        )
+        if status == FriendshipStatus.PENDING:
+            raise HTTPException(status_code=400, detail="Friend request already pending")
+        elif status == FriendshipStatus.ACCEPTED:
+            raise HTTPException(status_code=400, detail="Already friends")
+        elif status == FriendshipStatus.BLOCKED:
+            raise HTTPException(status_code=403, detail="Cannot send friend request")
+        raise HTTPException(status_code=409, detail="Friendship already exists")
+
+    @staticmethod
+    async def get_friend_ids(user_id: UUID4) -> List[str]:
+        """Return the ids of all accepted friends of a user (cached)"""
+        user_id_str = str(user_id)
+        current_time = time.time()
+
+        cached = _friend_ids_cache.get(user_id_str)
+        if cached and current_time - cached[1] < _friend_ids_ttl:
+            return cached[0]
+
+        result = await run_query(
+            supabase.table("friendships")
+            .select("user_one_id, user_two_id")
+            .or_(f"user_one_id.eq.{user_id_str},user_two_id.eq.{user_id_str}")
+            .eq("status", FriendshipStatus.ACCEPTED.value)
+        )
+
+        friend_ids = set()
+        for friendship in result.data or []:
+            if friendship["user_one_id"] == user_id_str:
+                friend_ids.add(friendship["user_two_id"])
+            else:
+                friend_ids.add(friendship["user_one_id"])
+
+        _friend_ids_cache[user_id_str] = (list(friend_ids), current_time)
+        return list(friend_ids)
+
+    @staticmethod
+    def _invalidate_friend_ids(*user_ids) -> None:
+        for user_id in user_ids:
+            _friend_ids_cache.pop(str(user_id), None)
+            # The friend set changed, so the user's leaderboard did too
+            VersionService.bump(user_id, LEADERBOARD)
 
     @staticmethod
     async def get_friend_requests(
@@ -123,7 +194,7 @@ class FriendService:
                 .eq("action_user_id", user_id_str)
             )
 
-            result = query.execute()
+            result = await run_query(query)
 
             # Post-process to create the desired `profile` field for the recipient
             processed_data = []
@@ -138,8 +209,6 @@ class FriendService:
                 del item["user_two"]
                 processed_data.append(item)
 
-            print(f"Processed data: {processed_data}")
-
             return [FriendshipRequest(**item) for item in processed_data]
 
         else:
@@ -154,7 +223,7 @@ class FriendService:
                 .or_(f"user_one_id.eq.{user_id_str},user_two_id.eq.{user_id_str}")
             )
 
-            result = query.execute()
+            result = await run_query(query)
             return [FriendshipRequest(**item) for item in result.data]
 
     @staticmethod
@@ -168,7 +237,7 @@ class FriendService:
         Accepts a friend request by updating its status.
         The user performing this action must be the recipient, not the original sender.
         """
-        result = (
+        result = await run_query(
             supabase.from_("friendships")
             .update(
                 {
@@ -184,7 +253,6 @@ class FriendService:
                 }
             )
             .neq("action_user_id", str(current_user_id))
-            .execute()
         )
 
         if not result.data:
@@ -193,6 +261,7 @@ class FriendService:
                 detail="Pending friend request not found or you are not authorized to accept it.",
             )
 
+        FriendService._invalidate_friend_ids(user_one_id, user_two_id)
         return Friendship(**result.data[0])
 
     @staticmethod
@@ -203,7 +272,7 @@ class FriendService:
         Declines/cancels a friend request by deleting the row.
         The user performing this action must be the recipient.
         """
-        result = (
+        result = await run_query(
             supabase.from_("friendships")
             .delete()
             .match(
@@ -214,7 +283,6 @@ class FriendService:
                 }
             )
             .neq("action_user_id", str(current_user_id))
-            .execute()
         )
 
         if not result.data:
@@ -230,13 +298,12 @@ class FriendService:
         # Create a list of the two user IDs involved in the friendship
         user_pair = [str(user_id), str(friend_id)]
 
-        result = (
+        result = await run_query(
             supabase.table("friendships")
             .delete()
             .in_("user_one_id", user_pair)
             .in_("user_two_id", user_pair)
             .eq("status", FriendshipStatus.ACCEPTED.value)
-            .execute()
         )
 
         # The result of a delete operation contains the deleted data.
@@ -244,20 +311,22 @@ class FriendService:
         if not result.data:
             raise HTTPException(status_code=404, detail="Friendship not found")
 
+        FriendService._invalidate_friend_ids(user_id, friend_id)
+
     @staticmethod
     async def get_friends(user_id: UUID4) -> List[UserProfile]:
-        result = supabase.rpc("get_user_friends", {"p_user_id": str(user_id)}).execute()
+        result = await run_query(supabase.rpc("get_user_friends", {"p_user_id": str(user_id)}))
 
         return [UserProfile(**item) for item in result.data]
 
     @staticmethod
-    def get_leaderboard(user_id: UUID4) -> List[LeaderboardEntry]:
+    async def get_leaderboard(user_id: UUID4) -> List[LeaderboardEntry]:
         """
         Generates a leaderboard for a user and their accepted friends.
 
         This function fetches data from multiple tables without using an RPC call:
         1.  Fetches all 'accepted' friendships for the given user_id from 'friendships'.
-        2.  Extracts the user IDs of all friends.
+        2.  Extracts the user IDs of all friends (both cached by get_friend_ids).
         3.  Fetches the email for each user from 'user_profiles'.
         4.  Fetches the corresponding progress data from 'user_progress'.
         5.  Merges the profile (for email) and progress data.
@@ -274,43 +343,28 @@ class FriendService:
         try:
             current_user_id_str = str(user_id)
 
-            # 1. Get all accepted friendships involving the current user
-            friendships_response = (
-                supabase.table("friendships")
-                .select("user_one_id, user_two_id")
-                .or_(
-                    f"user_one_id.eq.{current_user_id_str},user_two_id.eq.{current_user_id_str}"
-                )
-                .eq("status", "accepted")
-                .execute()
-            )
-
-            # 2. Collect the unique IDs of all friends
-            friend_ids = set()
-            if friendships_response.data:
-                for friendship in friendships_response.data:
-                    if friendship["user_one_id"] == current_user_id_str:
-                        friend_ids.add(friendship["user_two_id"])
-                    else:
-                        friend_ids.add(friendship["user_one_id"])
+            # 1-2. Get the ids of all accepted friends (cached)
+            friend_ids = await FriendService.get_friend_ids(current_user_id_str)
 
             # Create a list of all user IDs to fetch, including the current user
             all_user_ids = list(friend_ids)
             all_user_ids.append(current_user_id_str)
 
             # 3. Fetch user profiles (for email) and progress data sequentially
-            profiles_response = (
+            profiles_response = await run_query(
                 supabase.table("user_profiles")
                 .select("user_id, email")
                 .in_("user_id", all_user_ids)
-                .execute()
             )
-            print(f"Profiles Reponse data: {profiles_response.data}")
-
-            print(f"All user ids: {all_user_ids}")
-
-            progress_response = supabase.table("user_progress").select("*").execute()
-            print(f"Progress Response data: {progress_response.data}")
+            progress_response = await run_query(
+                supabase.table("user_progress")
+                .select("user_id, total_experience, level, tasks_completed, plants_grown, longest_streak, current_streak")
+                .in_("user_id", all_user_ids)
+            )
+            logger.debug(
+                "Leaderboard for %s: %d profiles, %d progress rows",
+                current_user_id_str, len(profiles_response.data), len(progress_response.data),
+            )
 
             if not progress_response.data:
                 return []
@@ -354,7 +408,9 @@ class FriendService:
 
             return leaderboard_entries
 
+        except HTTPException:
+            raise
         except Exception as e:
-            # Proper error logging should be implemented here
-            print(f"An error occurred while generating the leaderboard: {e}")
-            return []
+            # Don't answer an empty board: the route would cache it under the current ETag
+            logger.exception("Failed to generate leaderboard for %s", user_id)
+            raise HTTPException(status_code=500, detail=f"Failed to generate leaderboard: {str(e)}")
@@ -0,0 +1,92 @@
+from collections import OrderedDict
+from typing import Dict, List, Optional, Tuple
+import time
+
+from ..models.plant import PlantResponse, GRID_WIDTH, GRID_HEIGHT
+
+GRID_CELLS = GRID_WIDTH * GRID_HEIGHT
+
+# A garden is stored as a flat 9x7 grid, indexed x * GRID_HEIGHT + y so that
+# walking it yields plants in the same (position_x, position_y) order as the
+# database query it replaces.
+Grid = List[Optional[PlantResponse]]
+
+
+def cell_index(position_x: int, position_y: int) -> int:
+    return position_x * GRID_HEIGHT + position_y
+
+
+def in_bounds(position_x: int, position_y: int) -> bool:
+    return 0 <= position_x < GRID_WIDTH and 0 <= position_y < GRID_HEIGHT
+
+
+class GardenCache:
+    """Per-user read-through cache of active gardens with write invalidation.
+
+    Entries expire after ``ttl`` seconds and the least recently used gardens are
+    evicted beyond ``max_users``. Every plant mutation invalidates the owner's
+    entry; a per-user generation stops a read that raced with a write from
+    storing the pre-write garden.
+    """
+
+    def __init__(self, ttl: float = 60, max_users: int = 2000):
+        self.ttl = ttl
+        self.max_users = max_users
+        self._entries: "OrderedDict[str, Tuple[Grid, float]]" = OrderedDict()
+        self._generations: Dict[str, int] = {}
+        self.hits = 0
+        self.misses = 0
+        self.invalidations = 0
+        self.evictions = 0
+
+    def generation(self, user_id: str) -> int:
+        return self._generations.get(user_id, 0)
+
+    def get(self, user_id: str) -> Optional[List[PlantResponse]]:
+        entry = self._entries.get(user_id)
+        if entry is None or time.time() - entry[1] >= self.ttl:
+            if entry is not None:
+                del self._entries[user_id]
+            self.misses += 1
+            return None
+
+        self._entries.move_to_end(user_id)
+        self.hits += 1
+        return [plant for plant in entry[0] if plant is not None]
+
+    def put(self, user_id: str, plants: List[PlantResponse], generation: int) -> None:
+        if self._generations.get(user_id, 0) != generation:
+            return  # A write landed while this garden was being read
+
+        grid: Grid = [None] * GRID_CELLS
+        for plant in plants:
+            if not in_bounds(plant.position_x, plant.position_y):
+                return  # Legacy off-grid data: don't cache, always read through
+            grid[cell_index(plant.position_x, plant.position_y)] = plant
+
+        self._entries[user_id] = (grid, time.time())
+        self._entries.move_to_end(user_id)
+        while len(self._entries) > self.max_users:
+            self._entries.popitem(last=False)
+            self.evictions += 1
+
+    def invalidate(self, user_id: str) -> None:
+        self._generations[user_id] = self._generations.get(user_id, 0) + 1
+        if self._entries.pop(user_id, None) is not None:
+            self.invalidations += 1
+
+    def stats(self) -> dict:
+        lookups = self.hits + self.misses
+        return {
+            "size": len(self._entries),
+            "max_users": self.max_users,
+            "ttl_seconds": self.ttl,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0,
+            "invalidations": self.invalidations,
+            "evictions": self.evictions,
+        }
+
+
+garden_cache = GardenCache()
@@ -0,0 +1,143 @@
+from collections import OrderedDict
+from typing import Any, Awaitable, Callable, Optional, Tuple
+import asyncio
+import hashlib
+import json
+import time
+
+from fastapi import HTTPException, Request, Response
+from fastapi.encoders import jsonable_encoder
+
+IDEMPOTENCY_HEADER = "idempotency-key"
+REPLAYED_HEADER = "Idempotent-Replayed"
+_max_key_length = 255
+
+
+class _Entry:
+    __slots__ = ("fingerprint", "future", "created_at", "in_doubt")
+
+    def __init__(self, fingerprint: str):
+        self.fingerprint = fingerprint
+        self.future: asyncio.Future = asyncio.get_running_loop().create_future()
+        self.created_at = time.time()
+        self.in_doubt = False
+
+
+def _outcome_unknown() -> HTTPException:
+    return HTTPException(
+        status_code=409,
+        detail="The first request with this Idempotency-Key failed after it may have written; "
+        "check the current state instead of retrying it",
+    )
+
+
+class IdempotencyStore:
+    """Recent Idempotency-Key results for XP-granting writes, per user and route.
+
+    The first request with a key runs; a retry with the same key gets the stored
+    response without running the handler (no database writes, no extra XP). A
+    retry that arrives while the first is still running waits for its result.
+    A request rejected with a 4xx wrote nothing and is forgotten, so it can be
+    retried. Any other failure (a 5xx such as a 503 from the database, a 504 or
+    a cancellation) may have come after a write committed, so its key is kept
+    and retries get 409 instead of granting the XP twice. Keys live for
+    ``ttl`` seconds, the oldest are dropped beyond ``max_entries``, and the store
+    is per process.
+    """
+
+    def __init__(self, ttl: float = 24 * 3600, max_entries: int = 20000):
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[Tuple[str, str, str], _Entry]" = OrderedDict()
+        self.executions = 0
+        self.replays = 0
+        self.waits = 0
+        self.mismatches = 0
+        self.in_doubt = 0
+
+    async def run(
+        self,
+        request: Request,
+        response: Response,
+        user_id: str,
+        payload: Any,
+        handler: Callable[[], Awaitable[Any]],
+    ) -> Any:
+        key = request.headers.get(IDEMPOTENCY_HEADER)
+        if not key:
+            return await handler()
+        if len(key) > _max_key_length:
+            raise HTTPException(status_code=400, detail=f"Idempotency-Key must be at most {_max_key_length} characters")
+
+        store_key = (str(user_id), request.url.path, key)
+        fingerprint = hashlib.sha256(
+            json.dumps(jsonable_encoder(payload), sort_keys=True).encode()
+        ).hexdigest()
+
+        entry = self._get(store_key)
+        if entry is not None:
+            if entry.fingerprint != fingerprint:
+                self.mismatches += 1
+                raise HTTPException(status_code=422, detail="Idempotency-Key was already used with a different request body")
+            if entry.in_doubt:
+                raise _outcome_unknown()
+            if not entry.future.done():
+                self.waits += 1
+            result = await asyncio.shield(entry.future)
+            self.replays += 1
+            response.headers[REPLAYED_HEADER] = "true"
+            return result
+
+        entry = _Entry(fingerprint)
+        self._entries[store_key] = entry
+        self._evict()
+        self.executions += 1
+        try:
+            result = jsonable_encoder(await handler())
+        except BaseException as e:
+            if isinstance(e, HTTPException) and e.status_code < 500:
+                # Rejected before writing: waiters see this error, later retries run again
+                self._entries.pop(store_key, None)
+                entry.future.set_exception(e)
+            else:
+                # In doubt: the write may have committed, so this key never runs again
+                self.in_doubt += 1
+                entry.in_doubt = True
+                entry.future.set_exception(_outcome_unknown())
+            entry.future.exception()  # Mark retrieved when nobody is waiting
+            raise
+        entry.future.set_result(result)
+        return result
+
+    def _get(self, store_key) -> Optional[_Entry]:
+        entry = self._entries.get(store_key)
+        if entry is None:
+            return None
+        if entry.future.done() and time.time() - entry.created_at >= self.ttl:
+            del self._entries[store_key]
+            return None
+        return entry
+
+    def _evict(self) -> None:
+        now = time.time()
+        while self._entries:
+            oldest = next(iter(self._entries.values()))
+            expired = oldest.future.done() and now - oldest.created_at >= self.ttl
+            if not expired and len(self._entries) <= self.max_entries:
+                break
+            self._entries.popitem(last=False)
+
+    def stats(self) -> dict:
+        return {
+            "size": len(self._entries),
+            "max_entries": self.max_entries,
+            "ttl_seconds": self.ttl,
+            "executions": self.executions,
+            "replays": self.replays,
+            "in_flight_waits": self.waits,
+            "key_reuse_mismatches": self.mismatches,
+            "in_doubt_failures": self.in_doubt,
+        }
+
+
+idempotency_store = IdempotencyStore()
@@ -0,0 +1,153 @@
+from typing import Any, Dict, List, Optional
+import csv
+import io
+
+from fastapi import HTTPException
+from pydantic import ValidationError
+
+from app.config import supabase
+from app.db import run_query
+from app.models.plant import (
+    GRID_WIDTH, GRID_HEIGHT, PlantCreate, PlantImportRow, PlantImportResult, PlantImportResponse, TaskStep
+)
+from app.services.plant_service import PlantService
+from app.services.garden_cache import cell_index
+from app.services.occupancy_index import occupancy_index
+
+MAX_IMPORT_ROWS = GRID_WIDTH * GRID_HEIGHT
+
+# CSV headers accepted for each PlantImportRow field (case-insensitive)
+_CSV_COLUMNS = {
+    "name": "name", "task": "name", "title": "name",
+    "description": "task_description", "task_description": "task_description",
+    "category": "productivity_category", "productivity_category": "productivity_category",
+    "sprite": "plant_sprite", "plant_sprite": "plant_sprite",
+    "x": "position_x", "position_x": "position_x",
+    "y": "position_y", "position_y": "position_y",
+    "steps": "steps",
+}
+_CSV_STEP_SEPARATOR = "|"
+
+
+def _validation_message(error: ValidationError) -> str:
+    return "; ".join(
+        f"{'.'.join(str(part) for part in e['loc']) or 'row'}: {e['msg']}" for e in error.errors()
+    )
+
+
+class ImportService:
+
+    @staticmethod
+    def parse_csv(text: str) -> List[Dict[str, Any]]:
+        """CSV with a header row; steps are '|'-separated titles in one column"""
+        reader = csv.DictReader(io.StringIO(text.lstrip("\ufeff")))
+        if not reader.fieldnames:
+            raise HTTPException(status_code=400, detail="CSV has no header row")
+        
+        rows = []
+        for record in reader:
+            row: Dict[str, Any] = {}
+            for header, value in record.items():
+                field = _CSV_COLUMNS.get((header or "").strip().lower())
+                if field is None or value is None or not value.strip():
+                    continue
+                value = value.strip()
+                if field == "steps":
+                    row[field] = [step.strip() for step in value.split(_CSV_STEP_SEPARATOR) if step.strip()]
+                else:
+                    row[field] = value
+            rows.append(row)
+            if len(rows) > MAX_IMPORT_ROWS:
+                raise HTTPException(status_code=400, detail=f"At most {MAX_IMPORT_ROWS} tasks can be imported at once")
+        
+        if not rows:
+            raise HTTPException(status_code=400, detail="CSV has no tasks")
+        return rows
+
+    @staticmethod
+    async def import_plants(user_id: str, rows: List[Dict[str, Any]], auth_supabase=None) -> PlantImportResponse:
+        """Validate every row, place it on a free cell and create all plants with one insert"""
+        client = auth_supabase or supabase
+        results: List[Optional[PlantImportResult]] = [None] * len(rows)
+        
+        parsed: Dict[int, PlantImportRow] = {}
+        for index, raw in enumerate(rows):
+            try:
+                parsed[index] = PlantImportRow.model_validate(raw)
+            except ValidationError as e:
+                results[index] = PlantImportResult(row=index, success=False, error=_validation_message(e))
+        
+        try:
+            bitmap = await PlantService._get_occupancy(user_id, client)
+        except HTTPException:
+            raise
+        except Exception as e:
+            raise HTTPException(status_code=500, detail=f"Failed to load garden: {str(e)}")
+        
+        # Rows with explicit positions claim their cells first, then the rest fill free cells in order
+        for index, row in parsed.items():
+            if row.position_x is None and row.position_y is None:
+                continue
+            if row.position_x is None or row.position_y is None:
+                results[index] = PlantImportResult(row=index, success=False, error="Give both position_x and position_y, or neither")
+                continue
+            cell = cell_index(row.position_x, row.position_y)
+            if bitmap >> cell & 1:
+                results[index] = PlantImportResult(row=index, success=False, error="Position already occupied")
+                continue
+            bitmap |= 1 << cell
+        
+        free_cells = iter(occupancy_index.free_cells(bitmap))
+        insert_rows = []
+        inserted_indexes = []
+        for index, row in parsed.items():
+            if results[index] is not None:
+                continue
+            if row.position_x is None:
+                cell = next(free_cells, None)
+                if cell is None:
+                    results[index] = PlantImportResult(row=index, success=False, error="Garden is full")
+                    continue
+                row.position_x, row.position_y = cell
+            try:
+                plant_data = PlantCreate(
+                    name=row.name,
+                    task_description=row.task_description,
+                    productivity_category=row.productivity_category,
+                    plant_sprite=row.plant_sprite,
+                    position_x=row.position_x,
+                    position_y=row.position_y,
+                    task_steps=[TaskStep(title=title) for title in row.steps],
+                    is_multi_step=bool(row.steps),
+                )
+            except ValidationError as e:
+                results[index] = PlantImportResult(row=index, success=False, error=_validation_message(e))
+                continue
+            insert_rows.append(PlantService._build_plant_row(user_id, plant_data))
+            inserted_indexes.append(index)
+        
+        if insert_rows:
+            try:
+                result = await run_query(client.table("plants").insert(insert_rows))
+            except Exception as e:
+                if PlantService._is_position_conflict(e):
+                    occupancy_index.invalidate(user_id)
+                    raise HTTPException(status_code=409, detail="Garden changed during import, please retry")
+                raise HTTPException(status_code=500, detail=f"Failed to import plants: {str(e)}")
+            
+            # PostgREST returns a bulk insert's rows in payload order
+            for index, plant_dict in zip(inserted_indexes, result.data or []):
+                results[index] = PlantImportResult(
+                    row=index,
+                    success=True,
+                    plant_id=plant_dict["id"],
+                    position_x=plant_dict["position_x"],
+                    position_y=plant_dict["position_y"],
+                )
+                PlantService._publish_plant_event(user_id, "plant.created", plant_dict)
+            for index in inserted_indexes:
+                if results[index] is None:
+                    results[index] = PlantImportResult(row=index, success=False, error="Not created")
+        
+        created = sum(1 for r in results if r.success)
+        return PlantImportResponse(results=results, created=created, failed=len(results) - created)
@@ -0,0 +1,116 @@
+from typing import Optional
+import math
+import time
+
+# Request classes, matched on method and path. Work logging and garden reads are
+# never shed; low-priority reads go first, everything else only when the
+# database is badly degraded.
+CRITICAL = "critical"
+NORMAL = "normal"
+LOW = "low"
+
+CRITICAL_ROUTES = {
+    ("GET", "/api/plants"),
+    ("GET", "/api/plants/"),
+    ("POST", "/api/plants/work"),
+    ("POST", "/api/batch"),
+}
+CRITICAL_PREFIXES = ("/api/plants/steps/", "/api/events")
+CRITICAL_PATHS = {"/", "/health"}
+LOW_PREFIXES = (
+    "/api/friends/leaderboard",
+    "/api/friends/profile/",
+    "/api/admin/stats",
+    "/api/admin/users",
+    "/api/analytics/",
+)
+
+
+def classify(method: str, path: str) -> str:
+    if (
+        method == "OPTIONS"
+        or path in CRITICAL_PATHS
+        or (method, path) in CRITICAL_ROUTES
+        or path.startswith(CRITICAL_PREFIXES)
+    ):
+        return CRITICAL
+    if path.startswith(LOW_PREFIXES):
+        return LOW
+    return NORMAL
+
+
+class LoadShedder:
+    """Decides whether to reject a request early based on recent database health.
+
+    Database round trips feed an exponentially weighted moving average of their
+    latency (from run_query); the middleware tracks requests in flight. When
+    either crosses the degraded threshold low-priority requests are rejected
+    with 503 and Retry-After, past the severe threshold normal ones are too,
+    and critical ones always run. The average decays while no queries are
+    recorded, so once shedding quiets the database the signal recovers even if
+    little traffic gets through.
+    """
+
+    def __init__(
+        self,
+        degraded_latency: float = 0.8,
+        severe_latency: float = 2.5,
+        degraded_in_flight: int = 64,
+        severe_in_flight: int = 192,
+        alpha: float = 0.2,
+        half_life: float = 5.0,
+    ):
+        self.degraded_latency = degraded_latency
+        self.severe_latency = severe_latency
+        self.degraded_in_flight = degraded_in_flight
+        self.severe_in_flight = severe_in_flight
+        self.alpha = alpha
+        self.half_life = half_life
+        self._latency = 0.0
+        self._sampled_at = 0.0
+        self.in_flight = 0
+        self.samples = 0
+        self.shed = {LOW: 0, NORMAL: 0}
+
+    def record_db_latency(self, seconds: float) -> None:
+        self._latency = self.db_latency() * (1 - self.alpha) + seconds * self.alpha
+        self._sampled_at = time.monotonic()
+        self.samples += 1
+
+    def db_latency(self) -> float:
+        if not self._sampled_at:
+            return 0.0
+        age = time.monotonic() - self._sampled_at
+        return self._latency * 0.5 ** (age / self.half_life)
+
+    def level(self) -> Optional[str]:
+        """Highest request class currently shed: None, LOW, or NORMAL (which includes LOW)"""
+        latency = self.db_latency()
+        if latency >= self.severe_latency or self.in_flight >= self.severe_in_flight:
+            return NORMAL
+        if latency >= self.degraded_latency or self.in_flight >= self.degraded_in_flight:
+            return LOW
+        return None
+
+    def should_shed(self, priority: str) -> Optional[int]:
+        """Seconds for Retry-After if a request of this class should be rejected now"""
+        level = self.level()
+        if level is None or priority == CRITICAL or (priority == NORMAL and level == LOW):
+            return None
+        self.shed[priority] += 1
+        # Low-priority clients are asked to back off longer
+        backoff = 4 if priority == LOW else 2
+        return max(backoff, math.ceil(self.db_latency() * backoff))
+
+    def stats(self) -> dict:
+        level = self.level()
+        return {
+            "db_latency_ms": round(self.db_latency() * 1000, 1),
+            "db_samples": self.samples,
+            "in_flight": self.in_flight,
+            "shedding": level or "none",
+            "shed": dict(self.shed),
+        }
+
+
+load_shedder = LoadShedder()
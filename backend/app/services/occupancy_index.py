@@ -0,0 +1,166 @@
+from collections import OrderedDict
+from typing import Dict, Iterable, List, Optional, Tuple
+import time
+
+from .garden_cache import GRID_CELLS, cell_index, in_bounds
+from ..models.plant import GRID_HEIGHT
+
+
+class _Garden:
+    __slots__ = ("bitmap", "cells", "loaded_at")
+
+    def __init__(self, cells: Dict[str, int]):
+        self.cells = cells  # plant_id -> cell index (-1 off-grid), so moves and removals can be patched
+        self.bitmap = 0
+        for cell in cells.values():
+            if cell >= 0:
+                self.bitmap |= 1 << cell
+        self.loaded_at = time.time()
+
+
+class OccupancyIndex:
+    """Per-user 63-bit bitmap of occupied garden cells.
+
+    Lets create/move requests accept a free cell without a database call.
+    Entries are patched in place by every plant mutation (see
+    PlantService._publish_plant_event) rather than invalidated, expire after
+    ``ttl`` seconds as a backstop, and the least recently used are evicted
+    beyond ``max_users``. A per-user generation stops a load that raced with a
+    write from storing the pre-write layout.
+
+    The index is per process: a plant deleted, harvested or moved by another
+    worker or by the scheduler leaves a stale bit here until the entry expires.
+    An occupied bit is therefore only a hint; callers reload the garden before
+    rejecting a cell on it (PlantService._is_cell_taken), and the partial
+    unique index on active plants' positions is what actually decides.
+    """
+
+    def __init__(self, ttl: float = 300, max_users: int = 5000):
+        self.ttl = ttl
+        self.max_users = max_users
+        self._gardens: "OrderedDict[str, _Garden]" = OrderedDict()
+        self._generations: Dict[str, int] = {}
+        self.hits = 0
+        self.misses = 0
+        self.rejections = 0
+        self.reloads = 0
+        self.patches = 0
+
+    def generation(self, user_id: str) -> int:
+        return self._generations.get(user_id, 0)
+
+    def _bump(self, user_id: str) -> None:
+        self._generations[user_id] = self._generations.get(user_id, 0) + 1
+
+    def is_cached(self, user_id: str) -> bool:
+        """Whether a live entry exists, without counting a lookup"""
+        garden = self._gardens.get(user_id)
+        return garden is not None and time.time() - garden.loaded_at < self.ttl
+
+    def bitmap(self, user_id: str) -> Optional[int]:
+        garden = self._gardens.get(user_id)
+        if garden is None or time.time() - garden.loaded_at >= self.ttl:
+            if garden is not None:
+                del self._gardens[user_id]
+            self.misses += 1
+            return None
+        self._gardens.move_to_end(user_id)
+        self.hits += 1
+        return garden.bitmap
+
+    def positions(self, user_id: str) -> Optional[Dict[str, int]]:
+        """plant_id -> cell for a cached garden (a copy), or None on a miss"""
+        if self.bitmap(user_id) is None:
+            return None
+        return dict(self._gardens[user_id].cells)
+
+    def put(self, user_id: str, positions: Iterable[Tuple[str, int, int]], generation: int) -> int:
+        """Store a garden from (plant_id, position_x, position_y) rows; returns its bitmap"""
+        # Legacy off-grid plants are tracked at -1 and never block a grid cell
+        cells = {str(plant_id): cell_index(x, y) if in_bounds(x, y) else -1 for plant_id, x, y in positions}
+        garden = _Garden(cells)
+        if self._generations.get(user_id, 0) != generation:
+            return garden.bitmap  # A write landed while this garden was loading: use, don't keep
+        self._gardens[user_id] = garden
+        self._gardens.move_to_end(user_id)
+        while len(self._gardens) > self.max_users:
+            self._gardens.popitem(last=False)
+        return garden.bitmap
+
+    def is_occupied(self, user_id: str, bitmap: int, position_x: int, position_y: int, plant_id: Optional[str] = None) -> bool:
+        """True if the cell is known to hold a plant other than ``plant_id``"""
+        if not in_bounds(position_x, position_y):
+            return False
+        cell = cell_index(position_x, position_y)
+        if not bitmap >> cell & 1:
+            return False
+        if plant_id is not None:
+            garden = self._gardens.get(user_id)
+            if garden is None or garden.cells.get(str(plant_id)) == cell:
+                return False  # Its own cell, or owner unknown: leave it to the database
+        return True
+
+    @staticmethod
+    def free_cells(bitmap: int) -> List[Tuple[int, int]]:
+        return [divmod(cell, GRID_HEIGHT) for cell in range(GRID_CELLS) if not bitmap >> cell & 1]
+
+    def place(self, user_id: str, plant_id: str, position_x: Optional[int] = None, position_y: Optional[int] = None) -> None:
+        """Record a plant at a cell (create or move); a missing coordinate keeps its current one"""
+        self._bump(user_id)
+        garden = self._gardens.get(user_id)
+        if garden is None:
+            return
+        plant_id = str(plant_id)
+        current = garden.cells.get(plant_id)
+        if current is not None and position_x is None and position_y is None:
+            return  # Already placed, nothing moved
+        if current is not None and current >= 0:
+            current_x, current_y = divmod(current, GRID_HEIGHT)
+            position_x = current_x if position_x is None else position_x
+            position_y = current_y if position_y is None else position_y
+        if position_x is None or position_y is None:
+            self.invalidate(user_id)  # Unknown plant and partial position: reload on next use
+            return
+        self._remove_cell(garden, plant_id)
+        if in_bounds(position_x, position_y):
+            cell = cell_index(position_x, position_y)
+            garden.cells[plant_id] = cell
+            garden.bitmap |= 1 << cell
+        else:
+            garden.cells[plant_id] = -1
+        self.patches += 1
+
+    def remove(self, user_id: str, plant_id: str) -> None:
+        self._bump(user_id)
+        garden = self._gardens.get(user_id)
+        if garden is None:
+            return
+        self._remove_cell(garden, str(plant_id))
+        self.patches += 1
+
+    @staticmethod
+    def _remove_cell(garden: _Garden, plant_id: str) -> None:
+        cell = garden.cells.pop(plant_id, None)
+        if cell is not None and cell >= 0 and cell not in garden.cells.values():
+            garden.bitmap &= ~(1 << cell)
+
+    def invalidate(self, user_id: str) -> None:
+        self._bump(user_id)
+        self._gardens.pop(user_id, None)
+
+    def stats(self) -> dict:
+        lookups = self.hits + self.misses
+        return {
+            "size": len(self._gardens),
+            "max_users": self.max_users,
+            "ttl_seconds": self.ttl,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0,
+            "patches": self.patches,
+            "rejections": self.rejections,
+            "reloads": self.reloads,
+        }
+
+
+occupancy_index = OccupancyIndex()
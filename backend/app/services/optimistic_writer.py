@@ -0,0 +1,68 @@
+from collections import defaultdict
+from typing import Awaitable, Callable, Dict, TypeVar
+import asyncio
+import logging
+import random
+
+from fastapi import HTTPException
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+
+class VersionConflict(Exception):
+    """A conditional write matched no row: it was changed since it was read"""
+
+
+def check_versioned_write(result, what: str):
+    """Raise VersionConflict if a version-filtered write matched no row"""
+    if not result.data:
+        raise VersionConflict(what)
+    return result
+
+
+class OptimisticWriter:
+    """Bounded retry loop for read-compute-write paths guarded by a row version.
+
+    ``attempt`` reads the row (including ``version``), computes the new state
+    and writes it filtered on the version it read; a migration trigger bumps
+    the version on every update. If another write got there first the filter
+    matches nothing, the attempt raises VersionConflict and is run again from a
+    fresh read after a short jittered pause. No row locks are held between the
+    read and the write. Once ``max_attempts`` are used up the request fails
+    with 409 so the client can retry later.
+    """
+
+    def __init__(self, max_attempts: int = 4, base_delay: float = 0.01):
+        self.max_attempts = max_attempts
+        self.base_delay = base_delay
+        self._counters: Dict[str, Dict[str, int]] = defaultdict(
+            lambda: {"writes": 0, "conflicts": 0, "exhausted": 0}
+        )
+
+    async def run(self, operation: str, attempt: Callable[[], Awaitable[T]]) -> T:
+        counters = self._counters[operation]
+        for n in range(self.max_attempts):
+            try:
+                result = await attempt()
+            except VersionConflict:
+                counters["conflicts"] += 1
+                if n + 1 < self.max_attempts:
+                    await asyncio.sleep(random.uniform(0, self.base_delay * (2 ** n)))
+                continue
+            counters["writes"] += 1
+            return result
+
+        counters["exhausted"] += 1
+        logger.warning(f"{operation}: gave up after {self.max_attempts} conflicting attempts")
+        raise HTTPException(status_code=409, detail="The resource was changed by another request, please retry")
+
+    def stats(self) -> dict:
+        return {
+            "max_attempts": self.max_attempts,
+            "operations": {name: dict(counters) for name, counters in self._counters.items()},
+        }
+
+
+optimistic_writer = OptimisticWriter()
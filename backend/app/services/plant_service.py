@@ -1,10 +1,74 @@
-from typing import List, Optional
-from datetime import datetime, date
+from typing import Dict, List, NamedTuple, Optional, Set
+from contextlib import contextmanager
+from contextvars import ContextVar
+from datetime import datetime, date, timedelta
+import base64
+import logging
 import uuid
 from app.config import supabase
-from app.models.plant import PlantCreate, PlantUpdate, PlantResponse, TaskWorkCreate, TaskWorkResponse, UserProgressResponse, ProductivityCategory, PlantType, DecayStatus
+from app.db import run_query
+from app.models.plant import PlantCreate, PlantUpdate, PlantResponse, TaskWorkCreate, TaskWorkResponse, TaskStepBulk, StepAction, UserProgressResponse, ProductivityCategory, PlantType, DecayStatus, PlantTombstone, PlantChangesResponse, GridCell, FreeCellsResponse, GardenLayoutUpdate, GardenLayoutResponse
 from fastapi import HTTPException
 from app.services.xp_service import XPService
+from app.services.event_service import EventService
+from app.services.version_service import VersionService, PLANTS
+from app.services.garden_cache import garden_cache, cell_index, in_bounds
+from app.services.occupancy_index import occupancy_index
+from app.services.work_log_service import WorkLogService
+from app.services.archive_service import ArchiveService
+from app.services.optimistic_writer import optimistic_writer, check_versioned_write
+from app.services.activity_service import ActivityService
+from app.models.friend import ActivityType
+
+logger = logging.getLogger(__name__)
+
+# PERFORMANCE OPTIMIZATION: Select only necessary fields to reduce data transfer
+# IMPORTANT: Include multi-step task fields for proper task step display
+PLANT_COLUMNS = (
+    "id, user_id, name, task_name, task_description, task_status, plant_type, plant_sprite, "
+    "position_x, position_y, growth_level, experience_points, current_streak, "
+    "last_worked_date, days_without_care, decay_status, is_active, "
+    "created_at, updated_at, completion_date, "
+    "is_multi_step, task_steps, completed_steps, total_steps"
+)
+
+# Columns PlantResponse cannot be built without, always fetched for projections
+PLANT_REQUIRED_COLUMNS = (
+    "id", "user_id", "name", "plant_sprite", "growth_level", "experience_points",
+    "position_x", "position_y", "is_active", "created_at", "updated_at"
+)
+PLANT_DB_COLUMNS = frozenset(c.strip() for c in PLANT_COLUMNS.split(",")) | {"task_level"}
+
+# Columns daily decay reads, plus the version its write is guarded on. Like the
+# garden, decay counts from updated_at and derives task_level from XP (see
+# _normalize_plant_dict), not from the stored last_worked_date/task_level.
+PLANT_DECAY_COLUMNS = (
+    "id, created_at, updated_at, experience_points, current_streak, "
+    "days_without_care, is_active, version"
+)
+
+# Incremental sync: rows per page, and how far before a caught-up cursor the
+# next sync re-reads (longer than any write transaction, see migrations/009)
+SYNC_PAGE_SIZE = 200
+SYNC_OVERLAP = timedelta(seconds=60)
+
+
+class SyncCursor(NamedTuple):
+    updated_at: str
+    id: str
+    mode: str  # "snapshot"/"page": next page of a full or incremental sync; "sync": caught up
+
+
+# Fields left off the wire unless a client asks for them (multi-step task text)
+PLANT_HEAVY_FIELDS = frozenset({"task_steps"})
+
+# Set to False the first time the patch_task_steps RPC turns out not to be
+# installed (migrations/002_patch_task_steps.sql); steps then fall back to
+# whole-array writes for the rest of the process.
+_patch_rpc_available = True
+
+# XP gained while a batch is active, per user; flushed as one progress write
+_deferred_xp: ContextVar[Optional[Dict[str, int]]] = ContextVar("deferred_xp", default=None)
 
 class PlantService:
     
@@ -12,116 +76,361 @@ class PlantService:
     async def create_plant(user_id: str, plant_data: PlantCreate, auth_supabase=None) -> PlantResponse:
         client = auth_supabase or supabase
         try:
-            # First, clear any inactive plants at this position to avoid conflicts
-            client.table("plants").delete().eq("user_id", user_id).eq("position_x", plant_data.position_x).eq("position_y", plant_data.position_y).eq("is_active", False).execute()
-            
-            # Ensure all task steps have proper UUIDs
-            task_steps_with_ids = []
-            if plant_data.task_steps:
-                for step in plant_data.task_steps:
-                    step_dict = step.dict()
-                    if not step_dict.get('id'):
-                        step_dict['id'] = str(uuid.uuid4())
-                    task_steps_with_ids.append(step_dict)
-            
-            # Handle both old plant_type and new productivity_category
-            insert_data = {
-                "user_id": user_id,
-                "name": plant_data.name,
-                "task_name": plant_data.name,  # Task name is the same as plant name
-                "task_description": plant_data.task_description,
-                "task_status": "active",  # Default status for new tasks
-                "plant_sprite": plant_data.plant_sprite,
-                "position_x": plant_data.position_x,
-                "position_y": plant_data.position_y,
-                "growth_level": 0,
-                "experience_points": 0,
-                "is_active": True,
-                "decay_status": DecayStatus.HEALTHY.value,
-                "days_without_care": 0,
-                # Multi-step task fields
-                "is_multi_step": plant_data.is_multi_step,
-                "task_steps": task_steps_with_ids,
-                "completed_steps": 0,
-                "total_steps": len(task_steps_with_ids)
-            }
+            # Occupied cells are rejected before any write (see _is_cell_taken).
+            # Inactive plants no longer hold their cell (the unique index is partial
+            # on is_active), so creating a plant is a single insert.
+            if await PlantService._is_cell_taken(user_id, client, plant_data.position_x, plant_data.position_y):
+                raise HTTPException(status_code=400, detail="Position already occupied")
             
-            if hasattr(plant_data, 'productivity_category') and plant_data.productivity_category:
-                insert_data["plant_type"] = plant_data.productivity_category
-            elif hasattr(plant_data, 'plant_type') and plant_data.plant_type:
-                insert_data["plant_type"] = plant_data.plant_type
-                
-            result = client.table("plants").insert(insert_data).execute()
+            insert_data = PlantService._build_plant_row(user_id, plant_data)
+            result = await run_query(client.table("plants").insert(insert_data))
             
             if not result.data:
                 raise HTTPException(status_code=400, detail="Failed to create plant")
             
             plant_dict = result.data[0]
-            return PlantResponse(**plant_dict)
+            plant = PlantResponse(**plant_dict)
+            PlantService._publish_plant_event(user_id, "plant.created", plant.model_dump(mode="json"))
+            return plant
             
+        except HTTPException:
+            raise
         except Exception as e:
-            if "unique constraint" in str(e).lower():
+            if PlantService._is_position_conflict(e):
+                occupancy_index.invalidate(user_id)  # The index missed a concurrent write
                 raise HTTPException(status_code=400, detail="Position already occupied")
             raise HTTPException(status_code=400, detail=f"Failed to create plant: {str(e)}")
     
+    @staticmethod
+    def _build_plant_row(user_id: str, plant_data: PlantCreate) -> dict:
+        """The plants row inserted for a new plant"""
+        # Ensure all task steps have proper UUIDs
+        task_steps_with_ids = []
+        if plant_data.task_steps:
+            for step in plant_data.task_steps:
+                step_dict = step.dict()
+                if not step_dict.get('id'):
+                    step_dict['id'] = str(uuid.uuid4())
+                task_steps_with_ids.append(step_dict)
+        
+        # Handle both old plant_type and new productivity_category
+        insert_data = {
+            "user_id": user_id,
+            "name": plant_data.name,
+            "task_name": plant_data.name,  # Task name is the same as plant name
+            "task_description": plant_data.task_description,
+            "task_status": "active",  # Default status for new tasks
+            "plant_sprite": plant_data.plant_sprite,
+            "position_x": plant_data.position_x,
+            "position_y": plant_data.position_y,
+            "growth_level": 0,
+            "experience_points": 0,
+            "is_active": True,
+            "decay_status": DecayStatus.HEALTHY.value,
+            "days_without_care": 0,
+            # Multi-step task fields
+            "is_multi_step": plant_data.is_multi_step,
+            "task_steps": task_steps_with_ids,
+            "completed_steps": 0,
+            "total_steps": len(task_steps_with_ids)
+        }
+        
+        if hasattr(plant_data, 'productivity_category') and plant_data.productivity_category:
+            insert_data["plant_type"] = plant_data.productivity_category
+        elif hasattr(plant_data, 'plant_type') and plant_data.plant_type:
+            insert_data["plant_type"] = plant_data.plant_type
+        
+        return insert_data
+    
+    @staticmethod
+    def _is_position_conflict(error: Exception) -> bool:
+        message = str(error).lower()
+        return "23505" in message or "unique constraint" in message
+    
+    @staticmethod
+    async def _get_occupancy(user_id: str, client) -> int:
+        """The user's occupied-cell bitmap, loaded with a positions-only query on a miss"""
+        bitmap = occupancy_index.bitmap(user_id)
+        if bitmap is not None:
+            return bitmap
+        generation = occupancy_index.generation(user_id)
+        result = await run_query(client.table("plants").select("id, position_x, position_y").eq("user_id", user_id).eq("is_active", True))
+        return occupancy_index.put(user_id, [(row["id"], row["position_x"], row["position_y"]) for row in result.data], generation)
+    
+    @staticmethod
+    async def _is_cell_taken(user_id: str, client, position_x: int, position_y: int, plant_id: Optional[str] = None) -> bool:
+        """Whether a live plant other than ``plant_id`` holds the cell.
+
+        A free cell is trusted from the index. An occupied one from a cached
+        entry may be stale (another worker or the scheduler can have freed it),
+        so the garden is reloaded once before the cell is refused.
+        """
+        cached = occupancy_index.is_cached(user_id)
+        bitmap = await PlantService._get_occupancy(user_id, client)
+        if not occupancy_index.is_occupied(user_id, bitmap, position_x, position_y, plant_id):
+            return False
+        if cached:
+            occupancy_index.invalidate(user_id)
+            occupancy_index.reloads += 1
+            bitmap = await PlantService._get_occupancy(user_id, client)
+            if not occupancy_index.is_occupied(user_id, bitmap, position_x, position_y, plant_id):
+                return False
+        occupancy_index.rejections += 1
+        return True
+    
+    @staticmethod
+    async def _get_positions(user_id: str, client) -> dict:
+        """plant_id -> cell of the user's live plants, from the occupancy index when warm"""
+        positions = occupancy_index.positions(user_id)
+        if positions is not None:
+            return positions
+        generation = occupancy_index.generation(user_id)
+        result = await run_query(client.table("plants").select("id, position_x, position_y").eq("user_id", user_id).eq("is_active", True))
+        rows = [(row["id"], row["position_x"], row["position_y"]) for row in result.data]
+        occupancy_index.put(user_id, rows, generation)
+        return {str(plant_id): cell_index(x, y) if in_bounds(x, y) else -1 for plant_id, x, y in rows}
+    
+    @staticmethod
+    async def apply_layout(user_id: str, layout: GardenLayoutUpdate, auth_supabase=None) -> GardenLayoutResponse:
+        """Move/swap any number of plants at once: validated in memory, written by one RPC"""
+        client = auth_supabase or supabase
+        moves = layout.moves
+        
+        plant_ids = [move.plant_id for move in moves]
+        if len(set(plant_ids)) != len(plant_ids):
+            raise HTTPException(status_code=400, detail="Each plant can only be moved once per layout")
+        
+        try:
+            positions = await PlantService._get_positions(user_id, client)
+        except HTTPException:
+            raise
+        except Exception as e:
+            raise HTTPException(status_code=500, detail=f"Failed to load garden: {str(e)}")
+        
+        unknown = [plant_id for plant_id in plant_ids if plant_id not in positions]
+        if unknown:
+            raise HTTPException(status_code=404, detail=f"Plants not found: {', '.join(unknown)}")
+        
+        # Final layout = unmoved plants where they are + moved plants at their targets
+        moving = set(plant_ids)
+        final_cells = {cell for plant_id, cell in positions.items() if plant_id not in moving and cell >= 0}
+        for move in moves:
+            cell = cell_index(move.position_x, move.position_y)
+            if cell in final_cells:
+                raise HTTPException(
+                    status_code=400,
+                    detail=f"Position ({move.position_x}, {move.position_y}) would hold more than one plant"
+                )
+            final_cells.add(cell)
+        
+        try:
+            result = await run_query(client.rpc("apply_garden_layout", {
+                "p_user_id": user_id,
+                "p_moves": [move.model_dump() for move in moves],
+            }))
+        except Exception as e:
+            occupancy_index.invalidate(user_id)  # The index disagreed with the database
+            if PlantService._is_position_conflict(e):
+                raise HTTPException(status_code=409, detail="Layout conflicts with the current garden, please refresh")
+            if "P0002" in str(e):
+                raise HTTPException(status_code=404, detail="Some plants were not found")
+            raise HTTPException(status_code=500, detail=f"Failed to apply layout: {str(e)}")
+        
+        for move in moves:
+            PlantService._publish_plant_event(user_id, "plant.updated", {
+                "id": move.plant_id,
+                "changes": {"position_x": move.position_x, "position_y": move.position_y},
+            })
+        
+        return GardenLayoutResponse(success=True, moved=len(result.data or []), moves=moves)
+    
+    @staticmethod
+    async def get_free_cells(user_id: str, auth_supabase=None) -> FreeCellsResponse:
+        client = auth_supabase or supabase
+        try:
+            bitmap = await PlantService._get_occupancy(user_id, client)
+        except HTTPException:
+            raise
+        except Exception as e:
+            raise HTTPException(status_code=500, detail=f"Failed to get free cells: {str(e)}")
+        cells = [GridCell(position_x=x, position_y=y) for x, y in occupancy_index.free_cells(bitmap)]
+        return FreeCellsResponse(cells=cells, count=len(cells))
+    
     @staticmethod
     async def get_user_plants(user_id: str, auth_supabase=None) -> List[PlantResponse]:
         client = auth_supabase or supabase
+        cached = garden_cache.get(user_id)
+        if cached is not None:
+            return cached
+        
         try:
-            # PERFORMANCE OPTIMIZATION: Select only necessary fields to reduce data transfer
-            # IMPORTANT: Include multi-step task fields for proper task step display
-            result = client.table("plants").select(
-                "id, user_id, name, task_name, task_description, task_status, plant_type, plant_sprite, "
-                "position_x, position_y, growth_level, experience_points, current_streak, "
-                "last_worked_date, days_without_care, decay_status, is_active, "
-                "created_at, updated_at, completion_date, "
-                "is_multi_step, task_steps, completed_steps, total_steps"
-            ).eq("user_id", user_id).eq("is_active", True).order("position_x", desc=False).order("position_y", desc=False).execute()
+            generation = garden_cache.generation(user_id)
+            occupancy_generation = occupancy_index.generation(user_id)
+            result = await run_query(client.table("plants").select(PLANT_COLUMNS).eq("user_id", user_id).eq("is_active", True).order("position_x", desc=False).order("position_y", desc=False))
             
             plants = []
             for plant_dict in result.data:
-                # Set defaults only for missing fields (faster than checking each time)
-                plant_dict.setdefault('decay_status', DecayStatus.HEALTHY.value)
-                plant_dict.setdefault('days_without_care', 0)
-                plant_dict.setdefault('plant_sprite', 'carrot')
-                plant_dict.setdefault('task_name', plant_dict.get('name', 'Unnamed Task'))
-                plant_dict.setdefault('task_description', None)
-                plant_dict.setdefault('task_status', 'active')
-                plant_dict.setdefault('plant_type', PlantType.WORK.value)
-                
-                # Set defaults for multi-step task fields (backwards compatibility)
-                plant_dict.setdefault('is_multi_step', False)
-                plant_dict.setdefault('task_steps', [])
-                plant_dict.setdefault('completed_steps', 0)
-                plant_dict.setdefault('total_steps', 0)
-                
-                # Fix task steps with null IDs by generating UUIDs
-                if plant_dict.get('task_steps'):
-                    fixed_steps = []
-                    for step in plant_dict['task_steps']:
-                        if not step.get('id'):
-                            step['id'] = str(uuid.uuid4())
-                        fixed_steps.append(step)
-                    plant_dict['task_steps'] = fixed_steps
-                
-                # Pre-calculate derived fields once (faster than multiple calculations)
-                experience_points = plant_dict.get('experience_points', 0)
-                plant_dict['task_level'] = PlantService._calculate_task_level(experience_points)
-                plant_dict['current_streak'] = plant_dict.get('current_streak', 0) or 0
-                plant_dict['last_worked_date'] = plant_dict.get('updated_at')
-                    
-                plants.append(PlantResponse(**plant_dict))
+                plants.append(PlantResponse(**PlantService._normalize_plant_dict(plant_dict)))
             
+            garden_cache.put(user_id, plants, generation)
+            occupancy_index.put(user_id, [(p.id, p.position_x, p.position_y) for p in plants], occupancy_generation)
             return plants
             
+        except HTTPException:
+            raise
         except Exception as e:
             raise HTTPException(status_code=500, detail=f"Failed to fetch plants: {str(e)}")
     
     @staticmethod
-    async def get_plant_by_id(user_id: str, plant_id: str, auth_supabase=None) -> PlantResponse:
+    def _normalize_plant_dict(plant_dict: dict) -> dict:
+        """Fill defaults and derived fields on a raw plants row before building a PlantResponse"""
+        # Set defaults only for missing fields (faster than checking each time)
+        plant_dict.setdefault('decay_status', DecayStatus.HEALTHY.value)
+        plant_dict.setdefault('days_without_care', 0)
+        plant_dict.setdefault('plant_sprite', 'carrot')
+        plant_dict.setdefault('task_name', plant_dict.get('name', 'Unnamed Task'))
+        plant_dict.setdefault('task_description', None)
+        plant_dict.setdefault('task_status', 'active')
+        plant_dict.setdefault('plant_type', PlantType.WORK.value)
+        
+        # Set defaults for multi-step task fields (backwards compatibility)
+        plant_dict.setdefault('is_multi_step', False)
+        plant_dict.setdefault('task_steps', [])
+        plant_dict.setdefault('completed_steps', 0)
+        plant_dict.setdefault('total_steps', 0)
+        
+        # Pre-calculate derived fields once (faster than multiple calculations)
+        experience_points = plant_dict.get('experience_points', 0)
+        plant_dict['task_level'] = PlantService._calculate_task_level(experience_points)
+        plant_dict['current_streak'] = plant_dict.get('current_streak', 0) or 0
+        plant_dict['last_worked_date'] = plant_dict.get('updated_at')
+        return plant_dict
+    
+    @staticmethod
+    async def get_plant_changes(user_id: str, since: Optional[str] = None, auth_supabase=None, limit: int = SYNC_PAGE_SIZE) -> PlantChangesResponse:
+        """Return plants changed after a sync cursor plus tombstones for removed ones.
+        
+        Without a cursor this is a full snapshot of the active garden. Rows come
+        in (updated_at, id) order, at most ``limit`` per call; ``has_more`` says
+        the returned cursor continues this sync (or snapshot) exactly where the
+        page ended. Once caught up, the cursor marks the newest row seen and the
+        next sync re-reads SYNC_OVERLAP before it: a write stamped earlier can
+        commit after a later one was served, and must not be skipped.
+        """
         client = auth_supabase or supabase
+        cursor = PlantService._decode_sync_cursor(since) if since else None
+        
         try:
-            result = client.table("plants").select("*").eq("id", plant_id).eq("user_id", user_id).execute()
+            query = client.table("plants").select(PLANT_COLUMNS).eq("user_id", user_id)
+            since_ts = None
+            if cursor is None or cursor.mode == "snapshot":
+                query = query.eq("is_active", True)
+            if cursor is not None and cursor.mode != "sync":
+                query = query.or_(f'updated_at.gt."{cursor.updated_at}",and(updated_at.eq."{cursor.updated_at}",id.gt.{cursor.id})')
+            elif cursor is not None:
+                since_ts = (datetime.fromisoformat(cursor.updated_at.replace('Z', '+00:00')) - SYNC_OVERLAP).isoformat()
+                query = query.gte("updated_at", since_ts)
+            result = await run_query(query.order("updated_at", desc=False).order("id", desc=False).limit(limit))
+            # Plants compacted out of the hot table still owe clients a tombstone
+            # (once per sync: continuation pages already had them)
+            archived = await ArchiveService.get_tombstones_since(user_id, since_ts, client) if since_ts else []
+            
+            plants = []
+            removed = [PlantTombstone(id=row["id"], reason=row["archive_reason"]) for row in archived]
+            for plant_dict in result.data:
+                if plant_dict.get("is_active"):
+                    plants.append(PlantResponse(**PlantService._normalize_plant_dict(plant_dict)))
+                elif plant_dict.get("task_status") == "harvested":
+                    removed.append(PlantTombstone(id=plant_dict["id"], reason="harvested"))
+                elif plant_dict.get("decay_status") == DecayStatus.DEAD.value:
+                    removed.append(PlantTombstone(id=plant_dict["id"], reason="dead"))
+                else:
+                    removed.append(PlantTombstone(id=plant_dict["id"], reason="deleted"))
+            
+            has_more = len(result.data) == limit
+            if has_more:
+                last = result.data[-1]
+                next_cursor = SyncCursor(last["updated_at"], last["id"], "snapshot" if cursor is None or cursor.mode == "snapshot" else "page")
+            else:
+                seen = [(row["updated_at"], row["id"]) for row in result.data[-1:] + archived]
+                if cursor is not None:
+                    seen.append((cursor.updated_at, cursor.id))
+                newest = max(seen, key=lambda item: datetime.fromisoformat(item[0].replace('Z', '+00:00'))) if seen else None
+                next_cursor = SyncCursor(newest[0], newest[1], "sync") if newest else None
+            return PlantChangesResponse(
+                plants=plants,
+                removed=removed,
+                cursor=PlantService._encode_sync_cursor(next_cursor) if next_cursor else None,
+                full_sync=cursor is None or cursor.mode == "snapshot",
+                has_more=has_more
+            )
+            
+        except HTTPException:
+            raise
+        except Exception as e:
+            raise HTTPException(status_code=500, detail=f"Failed to fetch plant changes: {str(e)}")
+    
+    @staticmethod
+    def _encode_sync_cursor(cursor: "SyncCursor") -> str:
+        # Opaque, URL-safe cursor ('+' in raw timestamps breaks unencoded query strings)
+        raw = f"{cursor.updated_at}|{cursor.id}|{cursor.mode}"
+        return base64.urlsafe_b64encode(raw.encode()).decode().rstrip("=")
+    
+    @staticmethod
+    def _decode_sync_cursor(cursor: str) -> "SyncCursor":
+        try:
+            padded = cursor + "=" * (-len(cursor) % 4)
+            parts = base64.urlsafe_b64decode(padded.encode()).decode().split("|")
+            if len(parts) == 1:
+                parts += ["", "sync"]  # Cursors issued before paging: a bare timestamp
+            updated_at, plant_id, mode = parts
+            # Both end up in a filter expression: accept only a timestamp and a uuid
+            datetime.fromisoformat(updated_at.replace('Z', '+00:00'))
+            if mode not in ("snapshot", "page", "sync") or (mode != "sync" and not plant_id):
+                raise ValueError(mode)
+            return SyncCursor(updated_at, str(uuid.UUID(plant_id)) if plant_id else "", mode)
+        except Exception:
+            raise HTTPException(status_code=400, detail="Invalid sync cursor")
+    
+    @staticmethod
+    def resolve_fields(fields: Optional[str]) -> Set[str]:
+        """Parse a ``fields=`` query value into a set of PlantResponse fields.
+        
+        No value means every field except the heavy ones (task_steps); ``*`` means all.
+        """
+        all_fields = set(PlantResponse.model_fields)
+        if not fields:
+            return all_fields - PLANT_HEAVY_FIELDS
+        if fields.strip() == "*":
+            return all_fields
+        
+        requested = {f.strip() for f in fields.split(",") if f.strip()}
+        unknown = requested - all_fields
+        if unknown:
+            raise HTTPException(status_code=400, detail=f"Unknown fields: {', '.join(sorted(unknown))}")
+        return requested | {"id"}
+    
+    @staticmethod
+    def _columns_for_fields(fields: Set[str]) -> str:
+        """Database columns needed to build a PlantResponse and serve the given fields"""
+        columns = list(PLANT_REQUIRED_COLUMNS)
+        columns += sorted((fields & PLANT_DB_COLUMNS) - set(columns))
+        return ", ".join(columns)
+    
+    @staticmethod
+    async def _get_plant_row(client, user_id: str, plant_id: str, columns: str) -> dict:
+        """Fetch only the given columns of one of the user's plants"""
+        result = await run_query(client.table("plants").select(columns).eq("id", plant_id).eq("user_id", user_id))
+        if not result.data:
+            raise HTTPException(status_code=404, detail="Plant not found")
+        return result.data[0]
+    
+    @staticmethod
+    async def get_plant_by_id(user_id: str, plant_id: str, auth_supabase=None, fields: Optional[Set[str]] = None) -> PlantResponse:
+        client = auth_supabase or supabase
+        columns = PlantService._columns_for_fields(fields) if fields else ", ".join(sorted(PLANT_DB_COLUMNS))
+        try:
+            result = await run_query(client.table("plants").select(columns).eq("id", plant_id).eq("user_id", user_id))
             
             if not result.data:
                 raise HTTPException(status_code=404, detail="Plant not found")
@@ -135,15 +444,6 @@ class PlantService:
             if 'plant_sprite' not in plant_dict:
                 plant_dict['plant_sprite'] = 'carrot'  # Default sprite
             
-            # Fix task steps with null IDs by generating UUIDs
-            if plant_dict.get('task_steps'):
-                fixed_steps = []
-                for step in plant_dict['task_steps']:
-                    if not step.get('id'):
-                        step['id'] = str(uuid.uuid4())
-                    fixed_steps.append(step)
-                plant_dict['task_steps'] = fixed_steps
-                
             return PlantResponse(**plant_dict)
             
         except HTTPException:
@@ -178,29 +478,36 @@ class PlantService:
             if not update_data:
                 raise HTTPException(status_code=400, detail="No data to update")
             
-            result = supabase.table("plants").update(update_data).eq("id", plant_id).eq("user_id", user_id).execute()
+            if plant_data.position_x is not None and plant_data.position_y is not None:
+                if await PlantService._is_cell_taken(user_id, supabase, plant_data.position_x, plant_data.position_y, plant_id):
+                    raise HTTPException(status_code=400, detail="Position already occupied")
+            
+            result = await run_query(supabase.table("plants").update(update_data).eq("id", plant_id).eq("user_id", user_id))
             
             if not result.data:
                 raise HTTPException(status_code=404, detail="Plant not found")
             
             plant_dict = result.data[0]
+            PlantService._publish_plant_event(user_id, "plant.updated", {"id": plant_id, "changes": update_data})
             return PlantResponse(**plant_dict)
             
         except HTTPException:
             raise
         except Exception as e:
-            if "unique constraint" in str(e).lower():
+            if PlantService._is_position_conflict(e):
+                occupancy_index.invalidate(user_id)
                 raise HTTPException(status_code=400, detail="Position already occupied")
             raise HTTPException(status_code=400, detail=f"Failed to update plant: {str(e)}")
     
     @staticmethod
     async def delete_plant(user_id: str, plant_id: str) -> bool:
         try:
-            result = supabase.table("plants").update({"is_active": False}).eq("id", plant_id).eq("user_id", user_id).execute()
+            result = await run_query(supabase.table("plants").update({"is_active": False}).eq("id", plant_id).eq("user_id", user_id))
             
             if not result.data:
                 raise HTTPException(status_code=404, detail="Plant not found")
             
+            PlantService._publish_plant_event(user_id, "plant.removed", {"id": plant_id, "reason": "deleted"})
             return True
             
         except HTTPException:
@@ -213,132 +520,104 @@ class PlantService:
     async def log_task_work(user_id: str, work_data: TaskWorkCreate, auth_supabase=None) -> dict:
         client = auth_supabase or supabase
         try:
-            plant_result = client.table("plants").select("experience_points, current_streak, updated_at, is_multi_step, task_name, task_level, task_status, completed_steps, total_steps").eq("id", work_data.plant_id).eq("user_id", user_id).eq("is_active", True).single().execute()
-            
-            if not plant_result.data:
-                raise HTTPException(status_code=404, detail="Plant not found")
-            
-            plant = plant_result.data
             experience_gained = int(work_data.hours_worked * 100)
             
-            if plant.get("is_multi_step"):
+            async def attempt():
+                plant_result = await run_query(client.table("plants").select("experience_points, current_streak, updated_at, is_multi_step, task_name, task_level, task_status, completed_steps, total_steps, plant_type, version").eq("id", work_data.plant_id).eq("user_id", user_id).eq("is_active", True).single())
                 
-                from datetime import date
-                today = date.today()
+                if not plant_result.data:
+                    raise HTTPException(status_code=404, detail="Plant not found")
                 
-                # Calculate streak but don't change task completion
-                if plant["updated_at"]:
-                    last_work_date = date.fromisoformat(plant["updated_at"].split('T')[0]) if isinstance(plant["updated_at"], str) else plant["updated_at"].date()
-                    days_since_work = (today - last_work_date).days
-                    
-                    if days_since_work == 0:
-                        new_streak = plant["current_streak"] or 1
-                    elif days_since_work == 1:
-                        new_streak = (plant["current_streak"] or 0) + 1
-                    else:
-                        new_streak = 1
-                else:
-                    new_streak = 1
+                plant = plant_result.data
+                new_streak = PlantService._calculate_work_streak(plant)
                 
-                # Multi-step update: PRESERVE all task completion fields, only update timestamps and streak
-                update_result = client.table("plants").update({
+                update_data = {
                     "current_streak": new_streak,
-                    "last_worked_date": today.isoformat(),
+                    "last_worked_date": date.today().isoformat(),
                     "days_without_care": 0,
                     "decay_status": DecayStatus.HEALTHY.value,
                     "is_active": True
-                }).eq("id", work_data.plant_id).eq("user_id", user_id).execute()
-                
-                if not update_result.data:
-                    raise HTTPException(status_code=400, detail="Failed to update plant")
-                
-                # Update user XP separately (they still get XP for time worked)
-                try:
-                    await PlantService._update_user_progress_fast(user_id, experience_gained)
-                except Exception:
-                    pass
+                }
+                if not plant.get("is_multi_step"):
+                    # Single-step: normal completion logic
+                    new_experience = plant["experience_points"] + experience_gained
+                    new_growth = PlantService._calculate_task_level(new_experience) * 20
+                    update_data = {"experience_points": new_experience, "growth_level": min(100, new_growth), **update_data}
+                # Multi-step: PRESERVE all task completion fields, only update timestamps and streak
                 
-                from datetime import datetime
-                now = datetime.now()
-                return {
-                    "id": f"work_{work_data.plant_id}_{now.isoformat()}",
-                    "plant_id": work_data.plant_id,
-                    "user_id": user_id,
-                    "hours_worked": work_data.hours_worked,
-                    "experience_gained": experience_gained,
+                update_result = await run_query(client.table("plants").update(update_data).eq("id", work_data.plant_id).eq("user_id", user_id).eq("version", plant["version"]))
+                check_versioned_write(update_result, f"plant {work_data.plant_id}")
+                return plant, update_data
+            
+            plant, update_data = await optimistic_writer.run("plant_work", attempt)
+            
+            PlantService._publish_plant_event(user_id, "plant.updated", {"id": work_data.plant_id, "changes": update_data})
+            
+            # Update user XP (multi-step tasks still get XP for time worked)
+            try:
+                await PlantService._update_user_progress_fast(user_id, experience_gained)
+            except Exception:
+                pass
+            
+            log_id = await PlantService._record_work_log(client, user_id, work_data, experience_gained, plant.get("plant_type"))
+            now = datetime.now()
+            response = {
+                "id": log_id or f"work_{work_data.plant_id}_{now.isoformat()}",
+                "plant_id": work_data.plant_id,
+                "user_id": user_id,
+                "hours_worked": work_data.hours_worked,
+                "experience_gained": experience_gained,
+                "current_streak": update_data["current_streak"],
+                "last_worked_date": update_data["last_worked_date"],
+                "created_at": now.isoformat()
+            }
+            
+            if plant.get("is_multi_step"):
+                response.update({
                     "new_task_level": plant.get("task_level"),  # Keep current task_level unchanged
                     "new_growth_level": plant.get("task_level", 1) * 20,  # Based on current task_level, not updated
-                    "current_streak": new_streak,
-                    "last_worked_date": today.isoformat(),
-                    "created_at": now.isoformat(),
                     "task_completed": False,  # Multi-step tasks never complete from time logging
                     "message": "Multi-step task: time logged, XP gained, task state preserved"
-                }
-            
+                })
             else:
-                
-                # For single-step: proceed with normal completion logic
-                new_experience = plant["experience_points"] + experience_gained
-                new_task_level = PlantService._calculate_task_level(new_experience)
-                new_growth = new_task_level * 20
-                
-                from datetime import date
-                today = date.today()
-                
-                # Calculate new streak based on last work date
-                if plant["updated_at"]:
-                    last_work_date = date.fromisoformat(plant["updated_at"].split('T')[0]) if isinstance(plant["updated_at"], str) else plant["updated_at"].date()
-                    days_since_work = (today - last_work_date).days
-                    
-                    if days_since_work == 0:
-                        new_streak = plant["current_streak"] or 1
-                    elif days_since_work == 1:
-                        new_streak = (plant["current_streak"] or 0) + 1
-                    else:
-                        new_streak = 1
-                else:
-                    new_streak = 1
-                
-                # Single-step update: Normal completion logic
-                update_result = client.table("plants").update({
-                    "experience_points": new_experience,
-                    "growth_level": min(100, new_growth),
-                    "current_streak": new_streak,
-                    "last_worked_date": today.isoformat(),
-                    "days_without_care": 0,
-                    "decay_status": DecayStatus.HEALTHY.value,
-                    "is_active": True
-                }).eq("id", work_data.plant_id).eq("user_id", user_id).execute()
-                
-                if not update_result.data:
-                    raise HTTPException(status_code=400, detail="Failed to update plant")
-                
-                # Update user XP
-                try:
-                    await PlantService._update_user_progress_fast(user_id, experience_gained)
-                except Exception:
-                    pass
-                
-                from datetime import datetime
-                now = datetime.now()
-                return {
-                    "id": f"work_{work_data.plant_id}_{now.isoformat()}",
-                    "plant_id": work_data.plant_id,
-                    "user_id": user_id,
-                    "hours_worked": work_data.hours_worked,
-                    "experience_gained": experience_gained,
-                    "new_task_level": new_task_level,
-                    "new_growth_level": min(100, new_growth),
-                    "current_streak": new_streak,
-                    "last_worked_date": today.isoformat(),
-                    "created_at": now.isoformat()
-                }
+                response.update({
+                    "new_task_level": PlantService._calculate_task_level(update_data["experience_points"]),
+                    "new_growth_level": update_data["growth_level"]
+                })
+            return response
             
         except HTTPException:
             raise
         except Exception as e:
             raise HTTPException(status_code=500, detail=f"Failed to log task work: {str(e)}")
     
+    @staticmethod
+    def _calculate_work_streak(plant: dict) -> int:
+        """Work streak after working on a plant today, from its last update date"""
+        if not plant["updated_at"]:
+            return 1
+        
+        updated_at = plant["updated_at"]
+        last_work_date = date.fromisoformat(updated_at.split('T')[0]) if isinstance(updated_at, str) else updated_at.date()
+        days_since_work = (date.today() - last_work_date).days
+        
+        if days_since_work == 0:
+            return plant["current_streak"] or 1
+        elif days_since_work == 1:
+            return (plant["current_streak"] or 0) + 1
+        return 1
+    
+    @staticmethod
+    async def _record_work_log(client, user_id: str, work_data: TaskWorkCreate, experience_gained: int, category: Optional[str]) -> Optional[str]:
+        logs = await WorkLogService.record(client, user_id, [{
+            "plant_id": work_data.plant_id,
+            "productivity_category": category or PlantType.WORK.value,
+            "source": "work",
+            "hours_worked": work_data.hours_worked,
+            "experience_gained": experience_gained,
+        }])
+        return logs[0]["id"] if logs else None
+    
     @staticmethod
     def _calculate_task_level(experience_points: int) -> int:
         if experience_points <= 0:
@@ -407,65 +686,99 @@ class PlantService:
         """Apply daily XP decay: 20 * task_level per day, reduced by streak protection"""
         client = auth_supabase or supabase
         try:
-            plants = await PlantService.get_user_plants(user_id, auth_supabase)
+            # Fresh rows, not the garden cache: decay is computed from the row it
+            # overwrites and written on that row's version, so work logged in
+            # the meantime is never rolled back (the plant is re-read and, if it
+            # was worked today, left alone).
+            result = await run_query(client.table("plants").select(PLANT_DECAY_COLUMNS).eq("user_id", user_id).eq("is_active", True))
             today = date.today()
             
-            for plant in plants:
-                # Handle new plants that have never been worked on
-                if not plant.last_worked_date:
-                    # New plants start decaying after 1 day of creation
-                    created_date = plant.created_at.date() if isinstance(plant.created_at, datetime) else date.fromisoformat(str(plant.created_at))
-                    days_since_work = (today - created_date).days
-                    if days_since_work <= 0:
-                        continue  # Created today, no decay yet
-                else:
-                    last_worked = plant.last_worked_date.date() if isinstance(plant.last_worked_date, datetime) else date.fromisoformat(str(plant.last_worked_date))
-                    days_since_work = (today - last_worked).days
-                    
-                    if days_since_work <= 0:
-                        continue  # Worked today, no decay
+            for row in result.data or []:
+                pending = [row]
                 
-                # Calculate daily decay: 20 * task_level
-                daily_decay = 20 * plant.task_level
+                async def attempt(pending=pending, plant_id=row["id"]):
+                    plant = pending.pop() if pending else await PlantService._get_plant_row(client, user_id, plant_id, PLANT_DECAY_COLUMNS)
+                    decay_data = PlantService._decay_changes(plant, today) if plant.get("is_active") else None
+                    if decay_data is None:
+                        return None
+                    update_result = await run_query(client.table("plants").update(decay_data).eq("id", plant_id).eq("user_id", user_id).eq("version", plant["version"]))
+                    check_versioned_write(update_result, f"plant {plant_id}")
+                    return decay_data
                 
-                # Streak protection: each streak day prevents 20 XP loss
-                streak_protection = min(plant.current_streak or 0, plant.task_level) * 20
-                actual_decay = max(0, daily_decay - streak_protection)
+                decay_data = await optimistic_writer.run("plant_decay", attempt)
+                if decay_data is None:
+                    continue
                 
-                # Apply decay for each missed day
-                total_decay = actual_decay * days_since_work
-                new_experience = max(0, plant.experience_points - total_decay)
-                new_task_level = PlantService._calculate_task_level(new_experience)
-                new_growth = min(100, new_task_level * 20)
-                
-                # Additional visual decay based on neglect
-                new_days_without_care = (plant.days_without_care or 0) + days_since_work
-                decay_status = PlantService._calculate_decay_status(new_days_without_care)
-                
-                # Apply additional visual decay penalty
-                if decay_status == DecayStatus.WILTED:
-                    new_growth = max(0, new_growth - 20)  # Reduce by 1 stage
-                elif decay_status == DecayStatus.SEVERELY_WILTED:
-                    new_growth = max(0, new_growth - 40)  # Reduce by 2 stages
-                elif decay_status == DecayStatus.DEAD:
-                    new_growth = 0  # Plant appears dead
-                
-                # Reduce streak by number of missed days (but not below 0)
-                current_streak = plant.current_streak or 0
-                new_streak = max(0, current_streak - max(0, days_since_work - 1))
-                
-                client.table("plants").update({
-                    "experience_points": new_experience,
-                    "task_level": new_task_level,
-                    "growth_level": new_growth,
-                    "days_without_care": new_days_without_care,
-                    "decay_status": decay_status.value,
-                    "current_streak": new_streak,
-                    "is_active": decay_status != DecayStatus.DEAD
-                }).eq("id", plant.id).execute()
+                if decay_data["decay_status"] == DecayStatus.DEAD.value:
+                    PlantService._publish_plant_event(user_id, "plant.removed", {"id": row["id"], "reason": "dead"})
+                else:
+                    PlantService._publish_plant_event(user_id, "plant.updated", {"id": row["id"], "changes": decay_data})
                 
-        except Exception:
-            pass
+        except Exception as e:
+            # Decay is retried by the next run; don't fail the caller, but don't hide it either
+            logger.warning(f"Failed to apply plant decay for {user_id}: {str(e)}")
+    
+    @staticmethod
+    def _decay_changes(plant: dict, today: date) -> Optional[dict]:
+        """The decay update for a plants row as of ``today``, or None if it was cared for today"""
+        plant = PlantService._normalize_plant_dict(dict(plant))
+        
+        # Handle new plants that have never been worked on
+        if not plant.get("last_worked_date"):
+            # New plants start decaying after 1 day of creation
+            created_date = datetime.fromisoformat(str(plant["created_at"]).replace('Z', '+00:00')).date()
+            days_since_work = (today - created_date).days
+            if days_since_work <= 0:
+                return None  # Created today, no decay yet
+        else:
+            last_worked = datetime.fromisoformat(str(plant["last_worked_date"]).replace('Z', '+00:00')).date()
+            days_since_work = (today - last_worked).days
+            
+            if days_since_work <= 0:
+                return None  # Worked today, no decay
+        
+        task_level = plant["task_level"]
+        current_streak = plant["current_streak"]
+        
+        # Calculate daily decay: 20 * task_level
+        daily_decay = 20 * task_level
+        
+        # Streak protection: each streak day prevents 20 XP loss
+        streak_protection = min(current_streak, task_level) * 20
+        actual_decay = max(0, daily_decay - streak_protection)
+        
+        # Apply decay for each missed day
+        total_decay = actual_decay * days_since_work
+        new_experience = max(0, (plant.get("experience_points") or 0) - total_decay)
+        new_task_level = PlantService._calculate_task_level(new_experience)
+        new_growth = min(100, new_task_level * 20)
+        
+        # Additional visual decay based on neglect
+        new_days_without_care = (plant.get("days_without_care") or 0) + days_since_work
+        decay_status = PlantService._calculate_decay_status(new_days_without_care)
+        
+        # Apply additional visual decay penalty
+        if decay_status == DecayStatus.WILTED:
+            new_growth = max(0, new_growth - 20)  # Reduce by 1 stage
+        elif decay_status == DecayStatus.SEVERELY_WILTED:
+            new_growth = max(0, new_growth - 40)  # Reduce by 2 stages
+        elif decay_status == DecayStatus.DEAD:
+            new_growth = 0  # Plant appears dead
+        
+        # Reduce streak by number of missed days (but not below 0)
+        new_streak = max(0, current_streak - max(0, days_since_work - 1))
+        
+        return {
+            "experience_points": new_experience,
+            "task_level": new_task_level,
+            "growth_level": new_growth,
+            "days_without_care": new_days_without_care,
+            "decay_status": decay_status.value,
+            "current_streak": new_streak,
+            "is_active": decay_status != DecayStatus.DEAD,
+            # Decay counts from updated_at: stamping it means each day is decayed once
+            "updated_at": datetime.now().isoformat()
+        }
     
     @staticmethod
     async def _update_user_progress(user_id: str, experience_gained: int):
@@ -473,17 +786,53 @@ class PlantService:
         try:
             # Use XP service to properly calculate and update user progress
             await XPService.update_user_xp(user_id, experience_gained)
-        except Exception:
-            pass
+        except Exception as e:
+            logger.warning(f"Failed to grant {experience_gained} XP to {user_id}: {str(e)}")
 
     @staticmethod
     async def _update_user_progress_fast(user_id: str, experience_gained: int):
         """Update user progress using XP service"""
+        deferred = _deferred_xp.get()
+        if deferred is not None:
+            deferred[user_id] = deferred.get(user_id, 0) + experience_gained
+            return
         try:
             # Use XP service to properly calculate and update user progress
             await XPService.update_user_xp(user_id, experience_gained)
-        except Exception:
-            pass
+        except Exception as e:
+            logger.warning(f"Failed to grant {experience_gained} XP to {user_id}: {str(e)}")
+    
+    @staticmethod
+    @contextmanager
+    def deferred_xp():
+        """Collect XP from every plant operation in this block instead of writing it.
+        
+        Yields a dict of user_id -> merged XP delta for the caller to apply once.
+        """
+        deferred: Dict[str, int] = {}
+        token = _deferred_xp.set(deferred)
+        try:
+            yield deferred
+        finally:
+            _deferred_xp.reset(token)
+    
+    @staticmethod
+    def _publish_plant_event(user_id: str, event_type: str, payload: dict):
+        """Invalidate cached garden state and push a compact plant diff to the user's open event streams"""
+        garden_cache.invalidate(user_id)
+        # The occupancy index is patched rather than dropped, so writes keep it warm
+        if event_type == "plant.created":
+            occupancy_index.place(user_id, payload["id"], payload.get("position_x"), payload.get("position_y"))
+        elif event_type == "plant.removed":
+            occupancy_index.remove(user_id, payload["id"])
+        else:
+            changes = payload.get("changes") or {}
+            if changes.get("is_active") is False:
+                occupancy_index.remove(user_id, payload["id"])
+            elif "position_x" in changes or "position_y" in changes or changes.get("is_active"):
+                occupancy_index.place(user_id, payload["id"], changes.get("position_x"), changes.get("position_y"))
+        VersionService.bump(user_id, PLANTS)
+        EventService.publish(user_id, event_type, payload)
     
     @staticmethod
     def _calculate_decay_status(days_without_care: int) -> DecayStatus:
@@ -503,7 +852,7 @@ class PlantService:
     async def get_user_progress(user_id: str, auth_supabase=None) -> UserProgressResponse:
         client = auth_supabase or supabase
         try:
-            result = client.table("user_progress").select("*").eq("user_id", user_id).execute()
+            result = await run_query(client.table("user_progress").select("*").eq("user_id", user_id))
             
             if not result.data:
                 default_progress = {
@@ -524,6 +873,8 @@ class PlantService:
             progress_dict = result.data[0]
             return UserProgressResponse(**progress_dict)
             
+        except HTTPException:
+            raise
         except Exception as e:
             raise HTTPException(status_code=500, detail=f"Failed to fetch user progress: {str(e)}")
     
@@ -533,19 +884,20 @@ class PlantService:
         client = auth_supabase or supabase
         try:
             # Get the plant first to verify it exists and can be harvested
-            plant = await PlantService.get_plant_by_id(user_id, plant_id, auth_supabase)
+            plant = await PlantService._get_plant_row(client, user_id, plant_id, "growth_level")
             
             # Check if plant is mature enough to harvest (stage 4+)
-            plant_stage = min(5, plant.growth_level // 20)
+            plant_stage = min(5, (plant.get("growth_level") or 0) // 20)
             if plant_stage < 4:
                 raise HTTPException(status_code=400, detail="Plant is not mature enough to harvest")
             
             # Remove the plant (soft delete)
-            result = client.table("plants").update({"is_active": False}).eq("id", plant_id).eq("user_id", user_id).execute()
+            result = await run_query(client.table("plants").update({"is_active": False}).eq("id", plant_id).eq("user_id", user_id))
             
             if not result.data:
                 raise HTTPException(status_code=404, detail="Plant not found")
             
+            PlantService._publish_plant_event(user_id, "plant.removed", {"id": plant_id, "reason": "harvested"})
             return {"message": "Plant harvested successfully", "experience_gained": 0}
             
         except HTTPException:
@@ -555,158 +907,206 @@ class PlantService:
     
     @staticmethod
     async def get_todays_work_logs(user_id: str, auth_supabase=None) -> List[TaskWorkResponse]:
-        from app.config import supabase
-        from datetime import datetime, timezone
+        return await WorkLogService.get_logs_for_day(user_id, auth_supabase=auth_supabase)
+
+    @staticmethod
+    def _validate_step_ids(plant_id: str, step_ids: List[str]) -> None:
+        """Reject malformed plant/step IDs before making a database call"""
+        import re
+        uuid_pattern = r'^[0-9a-f]{8}-[0-9a-f]{4}-[1-5][0-9a-f]{3}-[89ab][0-9a-f]{3}-[0-9a-f]{12}$'
         
-        client = auth_supabase or supabase
-        today = datetime.now(timezone.utc).date()
+        if not re.match(uuid_pattern, plant_id, re.IGNORECASE):
+            raise HTTPException(status_code=400, detail=f"Invalid plant ID format: {plant_id}")
         
-        try:
-            # Since there's no task_time_logs table with relationship to plants,
-            # we'll calculate today's work from the plants' last_worked_date
-            result = client.table("plants").select("*").eq("user_id", user_id).eq("is_active", True).execute()
-            
-            work_logs = []
-            for plant_dict in result.data:
-                # Check if plant was worked on today by comparing last_worked_date
-                last_worked = plant_dict.get("last_worked_date")
-                if last_worked:
-                    try:
-                        if isinstance(last_worked, str):
-                            last_worked_date = date.fromisoformat(last_worked.split('T')[0])
-                        else:
-                            last_worked_date = last_worked.date() if hasattr(last_worked, 'date') else last_worked
-                        
-                        # If worked today, create a mock work log entry
-                        if last_worked_date == today:
-                            work_logs.append(TaskWorkResponse(
-                                id=f"today_{plant_dict['id']}",
-                                plant_id=plant_dict["id"],
-                                user_id=plant_dict["user_id"],
-                                hours_worked=1.0,  # Default placeholder
-                                experience_gained=100,  # Default placeholder
-                                description=f"Work on {plant_dict.get('name', 'Task')}",
-                                created_at=plant_dict.get("updated_at", datetime.now())
-                            ))
-                    except:
-                        continue
-            
-            return work_logs
-            
-        except Exception as e:
-            raise HTTPException(status_code=500, detail=f"Failed to get today's work logs: {str(e)}")
+        for step_id in step_ids:
+            if not re.match(uuid_pattern, step_id, re.IGNORECASE):
+                raise HTTPException(status_code=400, detail=f"Invalid step ID format: {step_id}")
 
     @staticmethod
-    async def complete_task_step(user_id: str, step_data, auth_supabase=None):
-        """Complete a task step and update plant growth based on milestone-based system"""
-        client = auth_supabase or supabase
-        try:
-            # Validate UUIDs before making database call
-            import re
-            uuid_pattern = r'^[0-9a-f]{8}-[0-9a-f]{4}-[1-5][0-9a-f]{3}-[89ab][0-9a-f]{3}-[0-9a-f]{12}$'
+    def _apply_step_changes(plant: dict, changes: List[dict]) -> tuple:
+        """Apply step completions/partial work to a plant row in memory.
+        
+        Each change is {"step_id", "action": "complete"|"partial", "hours_worked",
+        "mark_partial"}. Changes are applied in order exactly as the single-step
+        endpoints would apply them one request at a time, so growth, XP and
+        completion come out the same. Returns (update_data, results, touched_steps,
+        experience_gained) for a single plant write and XP update.
+        """
+        # Legacy steps without IDs get one here; the write persists it
+        task_steps = plant.get("task_steps") or []
+        for step in task_steps:
+            if not step.get('id'):
+                step['id'] = str(uuid.uuid4())
+        steps_by_id = {step["id"]: step for step in task_steps}
+        
+        growth_level = plant.get("growth_level", 0)
+        experience_points = plant["experience_points"]
+        completion = None
+        results = []
+        touched = {}
+        total_experience_gained = 0
+        
+        for change in changes:
+            step = steps_by_id.get(change["step_id"])
+            if step is None:
+                raise HTTPException(status_code=404, detail="Task step not found")
+            hours_worked = change.get("hours_worked")
             
-            if not re.match(uuid_pattern, step_data.plant_id, re.IGNORECASE):
-                raise HTTPException(status_code=400, detail=f"Invalid plant ID format: {step_data.plant_id}")
+            if change["action"] == "complete":
+                step["is_completed"] = True
+                step["completed_at"] = datetime.now().isoformat()
+                if hours_worked is not None:
+                    step["work_hours"] = step.get("work_hours", 0) + hours_worked
                 
-            if not re.match(uuid_pattern, step_data.step_id, re.IGNORECASE):
-                raise HTTPException(status_code=400, detail=f"Invalid step ID format: {step_data.step_id}")
-            
-            # Get plant with current steps
-            plant_result = client.table("plants").select(
-                "id, user_id, name, task_name, task_description, task_status, plant_type, plant_sprite, "
-                "position_x, position_y, growth_level, experience_points, current_streak, "
-                "last_worked_date, days_without_care, decay_status, is_active, "
-                "created_at, updated_at, completion_date, "
-                "is_multi_step, task_steps, completed_steps, total_steps"
-            ).eq("id", step_data.plant_id).eq("user_id", user_id).single().execute()
-            
-            if not plant_result.data:
-                raise HTTPException(status_code=404, detail="Plant not found")
-            
-            plant = plant_result.data
-            
-            # Fix task steps with null IDs by generating UUIDs (same as in get_user_plants)
-            if plant.get('task_steps'):
-                fixed_steps = []
-                for step in plant['task_steps']:
-                    if not step.get('id'):
-                        step['id'] = str(uuid.uuid4())
-                    fixed_steps.append(step)
-                plant['task_steps'] = fixed_steps
-            
-            # Update task steps
-            task_steps = plant.get("task_steps", [])
-            step_found = False
-            completed_steps = 0
-            
-            
-            for i, step in enumerate(task_steps):
-                if step.get("id") == step_data.step_id:
-                    step["is_completed"] = True
-                    step["completed_at"] = datetime.now().isoformat()
-                    if hasattr(step_data, 'hours_worked') and step_data.hours_worked is not None:
-                        step["work_hours"] = step.get("work_hours", 0) + step_data.hours_worked
-                    step_found = True
+                completed_steps = sum(1 for s in task_steps if s.get("is_completed"))
+                total_steps = len(task_steps)
                 
-                if step.get("is_completed"):
-                    completed_steps += 1
-            
-            if not step_found:
-                raise HTTPException(status_code=404, detail="Task step not found")
-            
-            
-            # Calculate milestone-based growth
-            total_steps = len(task_steps)
-            
-            # Each completed step = 1 growth stage (up to stage 5)
-            new_growth_stage = min(5, completed_steps)
-            new_growth_level = new_growth_stage * 20  # Convert stage to 0-100 scale
-            
-            # Calculate experience (bonus for completing steps + optional hours)
-            experience_bonus = 50 if completed_steps == total_steps else 25
-            # Only add hours XP if hours were actually worked (allow step completion without time tracking)
-            hours_xp = int((step_data.hours_worked or 0) * 100) if step_data.hours_worked else 0
-            total_experience_gained = hours_xp + experience_bonus
+                # Each completed step = 1 growth stage (up to stage 5)
+                new_growth_stage = min(5, completed_steps)
+                growth_level = new_growth_stage * 20  # Convert stage to 0-100 scale
+                
+                # Calculate experience (bonus for completing steps + optional hours)
+                experience_bonus = 50 if completed_steps == total_steps else 25
+                # Only add hours XP if hours were actually worked (allow step completion without time tracking)
+                hours_xp = int(hours_worked * 100) if hours_worked else 0
+                experience_gained = hours_xp + experience_bonus
+                
+                completion = {
+                    "completed_steps": completed_steps,
+                    "total_steps": total_steps,
+                    "task_level": new_growth_stage,  # Update task level for each completed step
+                }
+                # Mark as completed if all steps done
+                if completed_steps == total_steps:
+                    completion["task_status"] = "completed"
+                    completion["completion_date"] = datetime.now().isoformat()
+                
+                results.append({
+                    "success": True,
+                    "completed_steps": completed_steps,
+                    "total_steps": total_steps,
+                    "new_growth_stage": new_growth_stage,
+                    "new_task_level": new_growth_stage,  # Add this for frontend compatibility
+                    "experience_gained": experience_gained,
+                    "task_completed": completed_steps == total_steps
+                })
+            else:
+                step["is_partial"] = change.get("mark_partial", True)
+                step["work_hours"] = step.get("work_hours", 0) + hours_worked
+                
+                # Calculate experience for work done
+                experience_gained = int(hours_worked * 100)
+                
+                # For single-step tasks or partial work, give small growth boost
+                growth_boost = min(5, hours_worked * 2)  # Small visual progress
+                growth_level = min(100, growth_level + growth_boost)
+                
+                results.append({
+                    "success": True,
+                    "experience_gained": experience_gained,
+                    "new_growth_level": growth_level,
+                    "hours_added": hours_worked
+                })
             
+            experience_points += experience_gained
+            total_experience_gained += experience_gained
+            touched[step["id"]] = step
+        
+        update_data = {
+            "task_steps": task_steps,
+            "growth_level": growth_level,
+            "experience_points": experience_points,
+            "last_worked_date": datetime.now().date().isoformat(),
+            "days_without_care": 0,
+            "decay_status": DecayStatus.HEALTHY.value,
+        }
+        if completion:
+            update_data.update(completion)
+        
+        return update_data, results, list(touched.values()), total_experience_gained
+
+    @staticmethod
+    async def _write_step_changes(user_id: str, plant_id: str, changes: List[dict], auth_supabase=None) -> tuple:
+        """Fetch a plant once, apply step changes, then write it and its XP once"""
+        client = auth_supabase or supabase
+        
+        async def attempt():
+            plant = await PlantService._get_plant_row(client, user_id, plant_id, "name, task_status, task_steps, growth_level, experience_points, plant_type, version")
+            needs_ids = any(not step.get('id') for step in plant.get("task_steps") or [])
+            update_data, results, touched, experience_gained = PlantService._apply_step_changes(plant, changes)
+            
+            if needs_ids:
+                # Steps without IDs can't be patched by id: persist the whole array once
+                update_result = await run_query(client.table("plants").update(update_data).eq("id", plant_id).eq("user_id", user_id).eq("version", plant["version"]))
+            else:
+                update_result = await PlantService._patch_task_steps(client, user_id, plant_id, touched, update_data, plant["version"])
             
-            # Update plant
-            update_data = {
-                "task_steps": task_steps,
-                "completed_steps": completed_steps,
-                "total_steps": total_steps,
-                "task_level": new_growth_stage,  # Update task level for each completed step
-                "growth_level": new_growth_level,
-                "experience_points": plant["experience_points"] + total_experience_gained,
-                "last_worked_date": datetime.now().date().isoformat(),
-                "days_without_care": 0,
-                "decay_status": DecayStatus.HEALTHY.value,
+            check_versioned_write(update_result, f"plant {plant_id}")
+            return plant, update_data, results, touched, experience_gained
+        
+        # Completions computed from a stale read are re-done, never written over a newer row
+        plant, update_data, results, touched, experience_gained = await optimistic_writer.run("plant_steps", attempt)
+        
+        # Only the touched steps go over the push channel, not the whole array
+        event_changes = {k: v for k, v in update_data.items() if k != "task_steps"}
+        event = {"id": plant_id, "changes": event_changes}
+        if len(touched) == 1:
+            event["step"] = touched[0]
+        else:
+            event["steps"] = touched
+        PlantService._publish_plant_event(user_id, "plant.updated", event)
+        if update_data.get("task_status") == "completed" and plant.get("task_status") != "completed":
+            await ActivityService.record(user_id, ActivityType.PLANT_COMPLETED, plant_id=plant_id, plant_name=plant.get("name"))
+        
+        # Update user progress
+        try:
+            await PlantService._update_user_progress_fast(user_id, experience_gained)
+        except Exception:
+            pass
+        
+        await WorkLogService.record(client, user_id, [
+            {
+                "plant_id": plant_id,
+                "productivity_category": plant.get("plant_type") or PlantType.WORK.value,
+                "source": f"step_{change['action']}",
+                "hours_worked": change.get("hours_worked") or 0,
+                "experience_gained": result["experience_gained"],
             }
-            
-            # Mark as completed if all steps done
-            if completed_steps == total_steps:
-                update_data["task_status"] = "completed"
-                update_data["completion_date"] = datetime.now().isoformat()
-            
-            update_result = client.table("plants").update(update_data).eq("id", step_data.plant_id).eq("user_id", user_id).execute()
-            
-            if not update_result.data:
-                raise HTTPException(status_code=400, detail="Failed to update plant")
-            
-            # Update user progress
+            for change, result in zip(changes, results)
+        ])
+        
+        return update_data, results, experience_gained
+
+    @staticmethod
+    async def _patch_task_steps(client, user_id: str, plant_id: str, steps: List[dict], update_data: dict, version: int):
+        """Write only the changed steps (merged by id in the database) plus plant columns, if the row is still at version"""
+        global _patch_rpc_available
+        changes = {k: v for k, v in update_data.items() if k not in ("task_steps", "completed_steps", "total_steps")}
+        if _patch_rpc_available:
             try:
-                await PlantService._update_user_progress_fast(user_id, total_experience_gained)
-            except Exception:
-                pass
-            
-            return {
-                "success": True,
-                "completed_steps": completed_steps,
-                "total_steps": total_steps,
-                "new_growth_stage": new_growth_stage,
-                "new_task_level": new_growth_stage,  # Add this for frontend compatibility
-                "experience_gained": total_experience_gained,
-                "task_completed": completed_steps == total_steps
-            }
+                return await run_query(client.rpc("patch_task_steps", {
+                    "p_plant_id": plant_id,
+                    "p_user_id": user_id,
+                    "p_steps": steps,
+                    "p_changes": changes,
+                    "p_expected_version": version,
+                }))
+            except Exception as e:
+                if "PGRST202" not in str(e) and "Could not find the function" not in str(e):
+                    raise
+                _patch_rpc_available = False
+                logger.warning(f"patch_task_steps RPC unavailable, writing whole task_steps arrays: {str(e)}")
+        
+        return await run_query(client.table("plants").update(update_data).eq("id", plant_id).eq("user_id", user_id).eq("version", version))
+
+    @staticmethod
+    async def complete_task_step(user_id: str, step_data, auth_supabase=None):
+        """Complete a task step and update plant growth based on milestone-based system"""
+        try:
+            PlantService._validate_step_ids(step_data.plant_id, [step_data.step_id])
+            change = {"step_id": step_data.step_id, "action": "complete", "hours_worked": step_data.hours_worked}
+            _, results, _ = await PlantService._write_step_changes(user_id, step_data.plant_id, [change], auth_supabase)
+            return results[0]
             
         except HTTPException:
             raise
@@ -716,66 +1116,49 @@ class PlantService:
     @staticmethod
     async def update_task_step_partial(user_id: str, step_data, auth_supabase=None):
         """Mark a task step as partially complete and add work hours"""
-        client = auth_supabase or supabase
         try:
-            # Get plant with current steps
-            plant_result = client.table("plants").select("*").eq("id", step_data.plant_id).eq("user_id", user_id).single().execute()
-            
-            if not plant_result.data:
-                raise HTTPException(status_code=404, detail="Plant not found")
-            
-            plant = plant_result.data
-            task_steps = plant.get("task_steps", [])
-            step_found = False
-            
-            for step in task_steps:
-                if step.get("id") == step_data.step_id:
-                    step["is_partial"] = step_data.mark_partial
-                    step["work_hours"] = step.get("work_hours", 0) + step_data.hours_worked
-                    step_found = True
-                    break
-            
-            if not step_found:
-                raise HTTPException(status_code=404, detail="Task step not found")
-            
-            # Calculate experience for work done
-            experience_gained = int(step_data.hours_worked * 100)
-            
-            # For single-step tasks or partial work, give small growth boost
-            current_growth = plant.get("growth_level", 0)
-            growth_boost = min(5, step_data.hours_worked * 2)  # Small visual progress
-            new_growth = min(100, current_growth + growth_boost)
-            
-            # Update plant
-            update_result = client.table("plants").update({
-                "task_steps": task_steps,
-                "growth_level": new_growth,
-                "experience_points": plant["experience_points"] + experience_gained,
-                "last_worked_date": datetime.now().date().isoformat(),
-                "days_without_care": 0,
-                "decay_status": DecayStatus.HEALTHY.value,
-            }).eq("id", step_data.plant_id).eq("user_id", user_id).execute()
-            
-            if not update_result.data:
-                raise HTTPException(status_code=400, detail="Failed to update plant")
-            
-            # Update user progress
-            try:
-                await PlantService._update_user_progress_fast(user_id, experience_gained)
-            except Exception:
-                pass
+            change = {
+                "step_id": step_data.step_id,
+                "action": "partial",
+                "hours_worked": step_data.hours_worked,
+                "mark_partial": step_data.mark_partial,
+            }
+            _, results, _ = await PlantService._write_step_changes(user_id, step_data.plant_id, [change], auth_supabase)
+            return results[0]
             
+        except HTTPException:
+            raise
+        except Exception as e:
+            raise HTTPException(status_code=500, detail=f"Failed to update task step: {str(e)}")
+
+    @staticmethod
+    async def update_task_steps_bulk(user_id: str, bulk_data: TaskStepBulk, auth_supabase=None):
+        """Complete and/or add partial work to many steps of one plant in a single write"""
+        try:
+            PlantService._validate_step_ids(bulk_data.plant_id, [item.step_id for item in bulk_data.steps])
+            for item in bulk_data.steps:
+                if item.action == StepAction.PARTIAL and item.hours_worked is None:
+                    raise HTTPException(status_code=400, detail=f"hours_worked is required for partial step {item.step_id}")
+            changes = [item.model_dump(mode="json") for item in bulk_data.steps]
+            update_data, results, experience_gained = await PlantService._write_step_changes(user_id, bulk_data.plant_id, changes, auth_supabase)
+            
+            completed_steps = update_data.get("completed_steps")
+            total_steps = update_data.get("total_steps")
             return {
                 "success": True,
+                "results": results,
+                "completed_steps": completed_steps,
+                "total_steps": total_steps,
+                "new_growth_stage": update_data.get("task_level"),
+                "new_growth_level": update_data["growth_level"],
                 "experience_gained": experience_gained,
-                "new_growth_level": new_growth,
-                "hours_added": step_data.hours_worked
+                "task_completed": completed_steps is not None and completed_steps == total_steps
             }
             
         except HTTPException:
             raise
         except Exception as e:
-            raise HTTPException(status_code=500, detail=f"Failed to update task step: {str(e)}")
+            raise HTTPException(status_code=500, detail=f"Failed to update task steps: {str(e)}")
 
     @staticmethod
     def calculate_milestone_growth_stage(completed_steps: int, total_steps: int) -> int:
@@ -799,7 +1182,7 @@ class PlantService:
         client = auth_supabase or supabase
         try:
             # Get the current plant
-            plant_result = client.table("plants").select("*").eq("id", plant_id).eq("user_id", user_id).single().execute()
+            plant_result = await run_query(client.table("plants").select("is_multi_step").eq("id", plant_id).eq("user_id", user_id).single())
             
             if not plant_result.data:
                 raise HTTPException(status_code=404, detail="Plant not found")
@@ -826,16 +1209,19 @@ class PlantService:
                 steps_with_ids.append(step_dict)
             
             # Update the plant to be multi-step
-            update_result = client.table("plants").update({
+            update_data = {
                 "is_multi_step": True,
                 "task_steps": steps_with_ids,
                 "total_steps": len(steps_with_ids),
                 "completed_steps": 0
-            }).eq("id", plant_id).eq("user_id", user_id).execute()
+            }
+            update_result = await run_query(client.table("plants").update(update_data).eq("id", plant_id).eq("user_id", user_id))
             
             if not update_result.data:
                 raise HTTPException(status_code=400, detail="Failed to convert plant to multi-step")
             
+            PlantService._publish_plant_event(user_id, "plant.updated", {"id": plant_id, "changes": update_data})
+            
             return {
                 "success": True,
                 "message": "Task converted to multi-step successfully",
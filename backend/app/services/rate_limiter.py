@@ -0,0 +1,192 @@
+from collections import OrderedDict, defaultdict
+from typing import Any, Awaitable, Callable, Dict, List, NamedTuple, Optional, Tuple
+import asyncio
+import logging
+import math
+import sqlite3
+import threading
+import time
+
+from fastapi import HTTPException
+
+from ..config import RATE_LIMIT_STORE
+
+logger = logging.getLogger(__name__)
+
+
+class Bucket(NamedTuple):
+    capacity: float  # Burst size
+    refill_per_second: float
+
+
+class RatePolicy(NamedTuple):
+    per_user: Bucket
+    global_: Optional[Bucket] = None  # Shared by all users of the route on this worker (or host, with a shared store)
+
+
+# Write endpoints in front of the database. Generous enough for real use (a
+# burst of step completions, a retry or two) while capping hammering clients.
+RATE_POLICIES: Dict[str, RatePolicy] = {
+    "plants.work": RatePolicy(Bucket(30, 1), Bucket(600, 200)),
+    "plants.steps": RatePolicy(Bucket(30, 1), Bucket(600, 200)),
+    "plants.import": RatePolicy(Bucket(5, 1 / 60), Bucket(20, 1)),
+    "plants.harvest_user": RatePolicy(Bucket(3, 1 / 30), Bucket(20, 2)),
+    "batch": RatePolicy(Bucket(10, 0.5), Bucket(200, 50)),
+}
+
+State = Tuple[float, float]  # (tokens, updated_at)
+
+
+def _refill(state: Optional[State], bucket: Bucket, now: float) -> float:
+    if state is None:
+        return bucket.capacity
+    tokens, updated_at = state
+    return min(bucket.capacity, tokens + max(0.0, now - updated_at) * bucket.refill_per_second)
+
+
+def _take(states: List[Optional[State]], buckets: List[Bucket], now: float) -> Tuple[float, List[State]]:
+    """Take one token from every bucket or from none; returns (retry_after, new states)"""
+    levels = [_refill(state, bucket, now) for state, bucket in zip(states, buckets)]
+    wait = max(
+        ((1 - level) / bucket.refill_per_second for level, bucket in zip(levels, buckets) if level < 1),
+        default=0.0,
+    )
+    if wait > 0:
+        return wait, [(level, now) for level in levels]
+    return 0.0, [(level - 1, now) for level in levels]
+
+
+class _MemoryStore:
+    """Buckets in this process; evicting an idle one only refills it early"""
+
+    def __init__(self, max_keys: int = 50000):
+        self.max_keys = max_keys
+        self._states: "OrderedDict[str, State]" = OrderedDict()
+
+    def take(self, keys: List[str], buckets: List[Bucket], now: float) -> float:
+        retry_after, states = _take([self._states.get(key) for key in keys], buckets, now)
+        for key, state in zip(keys, states):
+            self._states[key] = state
+            self._states.move_to_end(key)
+        while len(self._states) > self.max_keys:
+            self._states.popitem(last=False)
+        return retry_after
+
+    def size(self) -> int:
+        return len(self._states)
+
+
+class _SQLiteStore:
+    """Buckets in a local SQLite file, so every worker on a host shares them.
+
+    Calls block (on the file lock, up to ``busy_timeout``), so RateLimiter runs
+    them in a worker thread; a store that stays locked longer counts as failed.
+    """
+
+    def __init__(self, path: str, busy_timeout: float = 0.25):
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, timeout=busy_timeout, isolation_level=None, check_same_thread=False)
+        self._conn.execute("pragma journal_mode=wal")
+        self._conn.execute(
+            "create table if not exists rate_buckets (key text primary key, tokens real not null, updated_at real not null)"
+        )
+
+    def take(self, keys: List[str], buckets: List[Bucket], now: float) -> float:
+        with self._lock:
+            self._conn.execute("begin immediate")
+            try:
+                rows = dict(
+                    (key, (tokens, updated_at))
+                    for key, tokens, updated_at in self._conn.execute(
+                        f"select key, tokens, updated_at from rate_buckets where key in ({','.join('?' * len(keys))})",
+                        keys,
+                    )
+                )
+                retry_after, states = _take([rows.get(key) for key in keys], buckets, now)
+                self._conn.executemany(
+                    "insert into rate_buckets (key, tokens, updated_at) values (?, ?, ?) "
+                    "on conflict (key) do update set tokens = excluded.tokens, updated_at = excluded.updated_at",
+                    [(key, tokens, updated_at) for key, (tokens, updated_at) in zip(keys, states)],
+                )
+                self._conn.execute("commit")
+            except BaseException:
+                self._conn.execute("rollback")
+                raise
+            return retry_after
+
+    def size(self) -> int:
+        with self._lock:
+            return self._conn.execute("select count(*) from rate_buckets").fetchone()[0]
+
+
+class RateLimiter:
+    """Token-bucket limits per route, for each user and for the route overall.
+
+    A request takes one token from its user's bucket and from the route's
+    global bucket, or from neither; when either is empty it is rejected with
+    429 and a Retry-After of the seconds until a token is back. Buckets live in
+    process memory unless RATE_LIMIT_STORE names a SQLite file, which shares
+    them between the workers of a host. If that store fails the check falls
+    back to this process's buckets rather than failing the request.
+
+    Routes behind the idempotency store check through ``guard`` so that a
+    replayed request doesn't spend a token.
+    """
+
+    def __init__(self, policies: Dict[str, RatePolicy], store_path: Optional[str] = None):
+        self.policies = policies
+        self._memory = _MemoryStore()
+        self._shared: Optional[_SQLiteStore] = None
+        if store_path:
+            try:
+                self._shared = _SQLiteStore(store_path)
+            except Exception as e:
+                logger.warning(f"Rate limit store {store_path} unavailable, using in-process buckets: {str(e)}")
+        self._counters: Dict[str, Dict[str, int]] = defaultdict(lambda: {"allowed": 0, "limited": 0})
+        self.store_errors = 0
+
+    async def check(self, route: str, user_id: str) -> None:
+        policy = self.policies[route]
+        keys, buckets = [f"{route}:user:{user_id}"], [policy.per_user]
+        if policy.global_ is not None:
+            keys.append(f"{route}:global")
+            buckets.append(policy.global_)
+
+        now = time.time()
+        retry_after = None
+        if self._shared is not None:
+            try:
+                retry_after = await asyncio.to_thread(self._shared.take, keys, buckets, now)
+            except Exception as e:
+                self.store_errors += 1
+                logger.warning(f"Rate limit store failed, using in-process buckets: {str(e)}")
+        if retry_after is None:
+            retry_after = self._memory.take(keys, buckets, now)
+
+        counters = self._counters[route]
+        if retry_after > 0:
+            counters["limited"] += 1
+            raise HTTPException(
+                status_code=429,
+                detail="Too many requests, please slow down",
+                headers={"Retry-After": str(math.ceil(retry_after))},
+            )
+        counters["allowed"] += 1
+
+    def guard(self, route: str, user_id: str, handler: Callable[[], Awaitable[Any]]) -> Callable[[], Awaitable[Any]]:
+        """``handler`` with the check in front, for idempotency_store.run: only executions take a token"""
+        async def guarded():
+            await self.check(route, user_id)
+            return await handler()
+        return guarded
+
+    def stats(self) -> dict:
+        return {
+            "store": "sqlite" if self._shared is not None else "memory",
+            "buckets": self._shared.size() if self._shared is not None else self._memory.size(),
+            "store_errors": self.store_errors,
+            "routes": {route: dict(counters) for route, counters in self._counters.items()},
+        }
+
+
+rate_limiter = RateLimiter(RATE_POLICIES, RATE_LIMIT_STORE)
@@ -4,7 +4,10 @@ from datetime import datetime, date
 import logging
 from .plant_service import PlantService
 from .auto_harvest_service import AutoHarvestService
+from .analytics_service import AnalyticsService
+from .archive_service import ArchiveService
 from ..config import supabase
+from ..db import run_query
 
 logger = logging.getLogger(__name__)
 
@@ -29,12 +32,28 @@ class SchedulerService:
             name='Auto Harvest Completed Tasks',
             replace_existing=True
         )
+        
+        self.scheduler.add_job(
+            func=self.run_plant_archive,
+            trigger=CronTrigger(hour=2, minute=15),
+            id='plant_archive',
+            name='Archive Inactive Plants',
+            replace_existing=True
+        )
+        
+        self.scheduler.add_job(
+            func=self.run_rollup_backfill,
+            trigger=CronTrigger(day_of_week='sun', hour=3, minute=30),
+            id='rollup_backfill',
+            name='Rebuild Work Analytics Rollups',
+            replace_existing=True
+        )
 
     async def run_daily_decay(self):
         try:
             logger.info("Starting daily XP decay process")
             
-            result = supabase.table("user_progress").select("user_id").execute()
+            result = await run_query(supabase.table("user_progress").select("user_id"))
             user_ids = [row["user_id"] for row in result.data]
             
             for user_id in user_ids:
@@ -57,6 +76,23 @@ class SchedulerService:
         except Exception as e:
             logger.error(f"Auto-harvest process failed: {str(e)}")
 
+    async def run_plant_archive(self):
+        try:
+            logger.info("Starting inactive plant archive")
+            moved = await ArchiveService.compact()
+            logger.info(f"Archived {moved} inactive plants")
+        except Exception as e:
+            logger.error(f"Plant archive failed: {str(e)}")
+
+    async def run_rollup_backfill(self):
+        # The insert trigger keeps rollups current; this repairs any drift in bulk
+        try:
+            logger.info("Starting work rollup backfill")
+            rows = await AnalyticsService.rebuild_rollups()
+            logger.info(f"Work rollup backfill completed ({rows} category buckets)")
+        except Exception as e:
+            logger.error(f"Work rollup backfill failed: {str(e)}")
+
     def start(self):
         if not self.scheduler.running:
             self.scheduler.start()
@@ -0,0 +1,78 @@
+from collections import defaultdict
+from typing import Any, Awaitable, Callable, Dict, Hashable, TypeVar
+import asyncio
+import contextvars
+
+from .. import deadline
+
+T = TypeVar("T")
+
+
+class SingleFlight:
+    """Coalesce concurrent identical reads into one in-flight computation.
+
+    The first caller for a key starts ``fn``; callers with the same key that
+    arrive before it finishes await the same result (or exception) instead of
+    querying again. Nothing is kept once the flight lands, so this never serves
+    a finished result. Callers put the resource's ETag in the key, so a read
+    that starts after a write never joins a flight that began before it.
+
+    The flight runs in its own task, outside any one caller's request deadline:
+    a caller that is cancelled (deadline, disconnect) just stops waiting, and
+    the others still get the result. If the flight itself is cancelled, the
+    callers still waiting start it again.
+    """
+
+    def __init__(self):
+        self._flights: Dict[Hashable, asyncio.Task] = {}
+        self._counters: Dict[str, Dict[str, int]] = defaultdict(lambda: {"calls": 0, "coalesced": 0, "restarted": 0})
+
+    async def do(self, name: str, key: Hashable, fn: Callable[[], Awaitable[T]]) -> T:
+        counters = self._counters[name]
+        counters["calls"] += 1
+        flight_key = (name, key)
+
+        flight = self._flights.get(flight_key)
+        if flight is not None:
+            counters["coalesced"] += 1
+        while True:
+            if flight is None:
+                flight = self._start(flight_key, fn)
+            try:
+                # shield: a caller being cancelled must not cancel the shared flight
+                return await asyncio.shield(flight)
+            except asyncio.CancelledError:
+                if not flight.cancelled():
+                    raise  # This caller was cancelled; the flight carries on for the rest
+                counters["restarted"] += 1
+                flight = self._flights.get(flight_key)
+
+    def _start(self, flight_key: Hashable, fn: Callable[[], Awaitable[T]]) -> "asyncio.Task[T]":
+        # The starting request's deadline must not bound a result others wait on;
+        # the flight's database calls are still bounded by their own timeouts.
+        context = contextvars.copy_context()
+        context.run(deadline.start, None)
+        flight = context.run(lambda: asyncio.get_running_loop().create_task(fn()))
+        self._flights[flight_key] = flight
+
+        def landed(task: asyncio.Task) -> None:
+            if self._flights.get(flight_key) is task:
+                del self._flights[flight_key]
+            if not task.cancelled():
+                task.exception()  # Mark retrieved when every caller has gone
+
+        flight.add_done_callback(landed)
+        return flight
+
+    def stats(self) -> dict:
+        routes: Dict[str, Any] = {}
+        for name, counters in self._counters.items():
+            calls = counters["calls"]
+            routes[name] = {
+                **counters,
+                "coalesced_fraction": round(counters["coalesced"] / calls, 4) if calls else 0.0,
+            }
+        return {"in_flight": len(self._flights), "routes": routes}
+
+
+single_flight = SingleFlight()
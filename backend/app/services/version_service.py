@@ -0,0 +1,53 @@
+from collections import defaultdict
+from typing import Dict, Iterable, Optional, Tuple
+import hashlib
+import uuid
+
+from fastapi import Request, Response
+
+
+# PERFORMANCE OPTIMIZATION: Per-user version counters for conditional GETs.
+# Every write path bumps the counter of the resources it affects, so an ETag can
+# be computed (and a 304 returned) without touching the database. Counters live
+# in process memory; the boot id makes ETags from a previous process (or another
+# worker) never match, so a restart can only cause a refetch, not a stale 304.
+_boot_id = uuid.uuid4().hex[:8]
+_versions: Dict[Tuple[str, str], int] = defaultdict(int)
+
+PLANTS = "plants"
+PROGRESS = "progress"
+LEADERBOARD = "leaderboard"
+
+
+class VersionService:
+
+    @staticmethod
+    def bump(user_id: str, resource: str) -> None:
+        _versions[(str(user_id), resource)] += 1
+
+    @staticmethod
+    def etag(user_id: str, resource: str, variant: Optional[Iterable[str]] = None) -> str:
+        """ETag for the current version; ``variant`` (e.g. a field projection) tells representations apart"""
+        version = _versions.get((str(user_id), resource), 0)
+        tag = f"{resource}-{_boot_id}-{str(user_id)[:8]}-{version}"
+        if variant is not None:
+            tag += "-" + hashlib.sha1(",".join(sorted(variant)).encode()).hexdigest()[:8]
+        return f'"{tag}"'
+
+    @staticmethod
+    def not_modified(request: Request, etag: str) -> bool:
+        """True if the request's If-None-Match already holds this ETag"""
+        if_none_match = request.headers.get("if-none-match")
+        if not if_none_match:
+            return False
+        candidates = [tag.strip() for tag in if_none_match.split(",")]
+        return etag in candidates or "*" in candidates
+
+    @staticmethod
+    def not_modified_response(etag: str) -> Response:
+        return Response(status_code=304, headers=VersionService.cache_headers(etag))
+
+    @staticmethod
+    def cache_headers(etag: str) -> Dict[str, str]:
+        # no-cache: browsers keep the body but revalidate with If-None-Match every time
+        return {"ETag": etag, "Cache-Control": "private, no-cache", "Vary": "Authorization"}
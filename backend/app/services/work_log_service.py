@@ -0,0 +1,108 @@
+from datetime import date, datetime, timedelta, timezone
+from typing import List, Optional
+import logging
+
+from fastapi import HTTPException
+
+from app.config import supabase
+from app.db import run_query
+from app.models.plant import TaskWorkResponse, DailyWorkSummary, WorkHistoryResponse
+
+logger = logging.getLogger(__name__)
+
+
+# Work history lives in plant_work_logs (append-only, indexed on
+# (user_id, work_date)); the user_daily_work rollup is maintained by a database
+# trigger on insert (migrations/003_plant_work_logs.sql). Dates are UTC days.
+
+
+def utc_today() -> date:
+    return datetime.now(timezone.utc).date()
+
+
+class WorkLogService:
+
+    @staticmethod
+    async def record(client, user_id: str, entries: List[dict]) -> List[dict]:
+        """Append work log rows; each entry has plant_id, hours_worked, experience_gained, source.
+        
+        Best-effort: the plant and XP writes have already happened, so a failed
+        log is reported in the server log rather than failing the request.
+        """
+        if not entries:
+            return []
+        today = utc_today().isoformat()
+        rows = [{"user_id": user_id, "work_date": today, **entry} for entry in entries]
+        try:
+            result = await run_query((client or supabase).table("plant_work_logs").insert(rows))
+            return result.data or []
+        except Exception as e:
+            logger.warning(f"Failed to record {len(rows)} work log(s) for {user_id}: {str(e)}")
+            return []
+
+    @staticmethod
+    async def get_logs_for_day(user_id: str, day: Optional[date] = None, auth_supabase=None) -> List[TaskWorkResponse]:
+        client = auth_supabase or supabase
+        day = day or utc_today()
+        try:
+            result = await run_query(
+                client.table("plant_work_logs")
+                .select("id, plant_id, user_id, hours_worked, experience_gained, description, created_at")
+                .eq("user_id", user_id)
+                .eq("work_date", day.isoformat())
+                .order("created_at")
+            )
+            return [TaskWorkResponse(**row) for row in result.data]
+        except HTTPException:
+            raise
+        except Exception as e:
+            raise HTTPException(status_code=500, detail=f"Failed to get work logs: {str(e)}")
+
+    @staticmethod
+    async def get_daily_totals(user_id: str, start: date, end: date, auth_supabase=None) -> List[DailyWorkSummary]:
+        """Rollup rows for days in [start, end] that have any work, oldest first"""
+        client = auth_supabase or supabase
+        try:
+            result = await run_query(
+                client.table("user_daily_work")
+                .select("work_date, hours_worked, experience_gained, log_count")
+                .eq("user_id", user_id)
+                .gte("work_date", start.isoformat())
+                .lte("work_date", end.isoformat())
+                .order("work_date")
+            )
+            return [DailyWorkSummary(**row) for row in result.data]
+        except HTTPException:
+            raise
+        except Exception as e:
+            raise HTTPException(status_code=500, detail=f"Failed to get work history: {str(e)}")
+
+    @staticmethod
+    async def get_week(user_id: str, auth_supabase=None) -> WorkHistoryResponse:
+        """The last 7 days including today, one entry per day (zero-filled)"""
+        end = utc_today()
+        start = end - timedelta(days=6)
+        by_day = {d.work_date: d for d in await WorkLogService.get_daily_totals(user_id, start, end, auth_supabase)}
+        days = [
+            by_day.get(start + timedelta(days=i)) or DailyWorkSummary(work_date=start + timedelta(days=i))
+            for i in range(7)
+        ]
+        return WorkLogService._history(start, end, days)
+
+    @staticmethod
+    async def get_heatmap(user_id: str, days: int = 365, auth_supabase=None) -> WorkHistoryResponse:
+        """Calendar heatmap: only days with work are returned"""
+        end = utc_today()
+        start = end - timedelta(days=days - 1)
+        totals = await WorkLogService.get_daily_totals(user_id, start, end, auth_supabase)
+        return WorkLogService._history(start, end, totals)
+
+    @staticmethod
+    def _history(start: date, end: date, days: List[DailyWorkSummary]) -> WorkHistoryResponse:
+        return WorkHistoryResponse(
+            start_date=start,
+            end_date=end,
+            days=days,
+            total_hours=round(sum(d.hours_worked for d in days), 2),
+            total_experience=sum(d.experience_gained for d in days),
+        )
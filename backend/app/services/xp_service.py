@@ -1,6 +1,14 @@
 from typing import Dict, Tuple
 from datetime import datetime
+from fastapi import HTTPException
 from ..config import supabase
+from ..db import run_query
+from ..models.friend import ActivityType
+from .activity_service import ActivityService
+from .event_service import EventService
+from .friend_service import FriendService
+from .optimistic_writer import optimistic_writer, check_versioned_write, VersionConflict
+from .version_service import VersionService, PROGRESS, LEADERBOARD
 
 class XPService:
     
@@ -60,24 +68,24 @@ class XPService:
         xp_gained = XPService.hours_to_xp(hours)
         
         try:
-            time_log_result = supabase.table("task_time_logs").insert({
+            time_log_result = await run_query(supabase.table("task_time_logs").insert({
                 "task_id": task_id,
                 "user_id": user_id,
                 "hours": hours,
                 "experience_gained": xp_gained,
                 "date": date.isoformat(),
                 "created_at": datetime.now().isoformat()
-            }).execute()
+            }))
             if not time_log_result.data:
                 raise Exception("Failed to create time log")
-            task_result = supabase.table("tasks").select("total_hours, total_experience").eq("id", task_id).execute()
+            task_result = await run_query(supabase.table("tasks").select("total_hours, total_experience").eq("id", task_id))
             if task_result.data:
                 current_hours = task_result.data[0].get("total_hours", 0) or 0
                 current_xp = task_result.data[0].get("total_experience", 0) or 0
-                supabase.table("tasks").update({
+                await run_query(supabase.table("tasks").update({
                     "total_hours": current_hours + hours,
                     "total_experience": current_xp + xp_gained
-                }).eq("id", task_id).execute()
+                }).eq("id", task_id))
             await XPService.update_user_xp(user_id, xp_gained)
             
             return {
@@ -87,53 +95,119 @@ class XPService:
                 "date": date
             }
             
+        except HTTPException:
+            raise
         except Exception as e:
             raise Exception(f"Failed to log time: {str(e)}")
     
     @staticmethod
     async def update_user_xp(user_id: str, xp_change: int) -> Dict:
         try:
-            progress_result = supabase.table("user_progress").select("*").eq("user_id", user_id).execute()
-            
-            if not progress_result.data:
-                current_xp = max(0, xp_change)
-                level, current_level_xp, xp_to_next = XPService.calculate_level_from_xp(current_xp)
+            async def attempt():
+                progress_result = await run_query(supabase.table("user_progress").select("*").eq("user_id", user_id))
+                
+                if not progress_result.data:
+                    current_xp = max(0, xp_change)
+                    level, current_level_xp, xp_to_next = XPService.calculate_level_from_xp(current_xp)
+                    
+                    try:
+                        result = await run_query(supabase.table("user_progress").insert({
+                            "user_id": user_id,
+                            "total_experience": current_xp,
+                            "level": level,
+                            "current_level_experience": current_level_xp,
+                            "experience_to_next_level": xp_to_next,
+                            "last_activity_date": datetime.now().date().isoformat(),
+                            "updated_at": datetime.now().isoformat()
+                        }))
+                    except Exception as e:
+                        if "23505" not in str(e) and "unique constraint" not in str(e).lower():
+                            raise
+                        # A concurrent request created the row first: add to it instead
+                        raise VersionConflict(f"user_progress {user_id}")
+                    return result, None, current_xp, level, current_level_xp, xp_to_next
+                
+                current_progress = progress_result.data[0]
+                old_level = current_progress["level"]
+                new_total_xp = max(0, current_progress["total_experience"] + xp_change)
+                level, current_level_xp, xp_to_next = XPService.calculate_level_from_xp(new_total_xp)
                 
-                result = supabase.table("user_progress").insert({
-                    "user_id": user_id,
-                    "total_experience": current_xp,
+                result = await run_query(supabase.table("user_progress").update({
+                    "total_experience": new_total_xp,
                     "level": level,
                     "current_level_experience": current_level_xp,
                     "experience_to_next_level": xp_to_next,
                     "last_activity_date": datetime.now().date().isoformat(),
                     "updated_at": datetime.now().isoformat()
-                }).execute()
-                return result.data[0] if result.data else {}
-                
-            current_progress = progress_result.data[0]
-            old_total_xp = current_progress["total_experience"]
-            old_level = current_progress["level"]
-            new_total_xp = max(0, old_total_xp + xp_change)
-            level, current_level_xp, xp_to_next = XPService.calculate_level_from_xp(new_total_xp)
+                }).eq("user_id", user_id).eq("version", current_progress["version"]))
+                check_versioned_write(result, f"user_progress {user_id}")
+                return result, old_level, new_total_xp, level, current_level_xp, xp_to_next
+            
+            # Concurrent XP grants each re-read the total instead of overwriting one another
+            result, old_level, total_xp, level, current_level_xp, xp_to_next = await optimistic_writer.run("user_xp", attempt)
             
-            result = supabase.table("user_progress").update({
-                "total_experience": new_total_xp,
-                "level": level,
-                "current_level_experience": current_level_xp,
-                "experience_to_next_level": xp_to_next,
-                "last_activity_date": datetime.now().date().isoformat(),
-                "updated_at": datetime.now().isoformat()
-            }).eq("user_id", user_id).execute()
+            await XPService._publish_progress_change(user_id, total_xp, level, current_level_xp, xp_to_next)
+            
+            if old_level is not None and level > old_level:
+                await ActivityService.record(user_id, ActivityType.LEVEL_UP, level=level)
             
             return result.data[0] if result.data else {}
             
+        except HTTPException:
+            raise
         except Exception as e:
             raise Exception(f"Failed to update user XP: {str(e)}")
     
+    @staticmethod
+    async def get_progress_summary(user_id: str) -> Dict:
+        """User's XP progress with the level breakdown calculated from total XP"""
+        progress_result = await run_query(supabase.table("user_progress").select("*").eq("user_id", user_id))
+        
+        if not progress_result.data:
+            # Create initial progress record
+            return await XPService.update_user_xp(user_id, 0)
+        
+        progress = progress_result.data[0]
+        stored_total_xp = progress["total_experience"]
+        
+        # Calculate level breakdown
+        level, current_level_xp, xp_to_next = XPService.calculate_level_from_xp(stored_total_xp)
+        
+        return {
+            "user_id": user_id,
+            "total_experience": stored_total_xp,
+            "level": level,  # Return calculated level instead of stored level
+            "current_level_experience": current_level_xp,
+            "experience_to_next_level": xp_to_next,
+            "current_streak": progress.get("current_streak", 0),
+            "longest_streak": progress.get("longest_streak", 0),
+            "tasks_completed": progress.get("tasks_completed", 0),
+            "plants_grown": progress.get("plants_grown", 0)
+        }
+    
+    @staticmethod
+    async def _publish_progress_change(user_id: str, total_xp: int, level: int, current_level_xp: int, xp_to_next: int):
+        """Push the new XP totals to the user and tell friends their leaderboard moved"""
+        VersionService.bump(user_id, PROGRESS)
+        EventService.publish(user_id, "progress.updated", {
+            "total_experience": total_xp,
+            "level": level,
+            "current_level_experience": current_level_xp,
+            "experience_to_next_level": xp_to_next
+        })
+        VersionService.bump(user_id, LEADERBOARD)
+        EventService.publish(user_id, "leaderboard.changed", {"user_id": user_id})
+        try:
+            for friend_id in await FriendService.get_friend_ids(user_id):
+                VersionService.bump(friend_id, LEADERBOARD)
+                EventService.publish(friend_id, "leaderboard.changed", {"user_id": user_id})
+        except Exception:
+            pass
+    
     @staticmethod
     async def apply_daily_decay(user_id: str) -> Dict:
         try:
-            progress_result = supabase.table("user_progress").select("*").eq("user_id", user_id).execute()
+            progress_result = await run_query(supabase.table("user_progress").select("*").eq("user_id", user_id))
             if not progress_result.data:
                 return {"message": "No progress found for user"}
             
@@ -174,5 +248,7 @@ class XPService:
                 "streak_protection": XPService.calculate_streak_protection(current_streak)
             }
             
+        except HTTPException:
+            raise
         except Exception as e:
             raise Exception(f"Failed to apply daily decay: {str(e)}")
\ No newline at end of file
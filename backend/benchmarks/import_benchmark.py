@@ -0,0 +1,112 @@
+"""Creating a 50-task garden: sequential POST /api/plants/ vs one bulk import.
+
+Both paths run the real service code against a small in-memory table whose
+every query sleeps for a fixed round trip (ROUND_TRIP_MS), which is what
+dominates plant creation against a hosted database.
+
+Run from the backend directory:
+
+    python -m benchmarks.import_benchmark
+"""
+import asyncio
+import copy
+import os
+import time
+import uuid
+
+os.environ.setdefault("SUPABASE_URL", "http://localhost")
+os.environ.setdefault("SUPABASE_KEY", "benchmark")
+
+from app.models.plant import PlantCreate, GRID_HEIGHT  # noqa: E402
+from app.services.import_service import ImportService  # noqa: E402
+from app.services.occupancy_index import occupancy_index  # noqa: E402
+from app.services.plant_service import PlantService  # noqa: E402
+
+TASKS = 50
+ROUND_TRIP_MS = 20
+
+
+class _Result:
+    def __init__(self, data):
+        self.data = data
+
+
+class _Query:
+    def __init__(self, client):
+        self.client = client
+        self.rows = None
+
+    def select(self, *args, **kwargs):
+        return self
+
+    def eq(self, *args):
+        return self
+
+    def insert(self, rows):
+        self.rows = rows if isinstance(rows, list) else [rows]
+        return self
+
+    def execute(self):
+        time.sleep(ROUND_TRIP_MS / 1000)
+        self.client.round_trips += 1
+        if self.rows is None:
+            return _Result([])
+        now = "2025-06-01T10:00:00+00:00"
+        return _Result([
+            {**copy.deepcopy(row), "id": str(uuid.uuid4()), "created_at": now, "updated_at": now}
+            for row in self.rows
+        ])
+
+
+class LatencyClient:
+    """Just enough of the Supabase table API for plant creation"""
+
+    def __init__(self):
+        self.round_trips = 0
+
+    def table(self, name):
+        return _Query(self)
+
+
+def tasks():
+    return [{"name": f"Imported task {i}", "steps": ["Plan", "Do", "Review"]} for i in range(TASKS)]
+
+
+async def sequential(client, user_id):
+    for i, task in enumerate(tasks()):
+        await PlantService.create_plant(user_id, PlantCreate(
+            name=task["name"],
+            productivity_category="work",
+            plant_sprite="carrot",
+            position_x=i // GRID_HEIGHT,
+            position_y=i % GRID_HEIGHT,
+            task_steps=[{"title": title} for title in task["steps"]],
+            is_multi_step=True,
+        ), client)
+
+
+async def bulk(client, user_id):
+    response = await ImportService.import_plants(user_id, tasks(), client)
+    assert response.created == TASKS, response
+
+
+def run(label, fn):
+    client = LatencyClient()
+    user_id = str(uuid.uuid4())
+    occupancy_index.invalidate(user_id)
+    start = time.perf_counter()
+    asyncio.run(fn(client, user_id))
+    elapsed_ms = (time.perf_counter() - start) * 1000
+    print(f"{label:<32} {elapsed_ms:9.1f} ms  ({client.round_trips} round trips)")
+    return elapsed_ms
+
+
+def main():
+    print(f"{TASKS} tasks x 3 steps, {ROUND_TRIP_MS} ms per database round trip\n")
+    slow = run("Sequential create_plant", sequential)
+    fast = run("Bulk import", bulk)
+    print(f"\nSpeedup: {slow / fast:.1f}x")
+
+
+if __name__ == "__main__":
+    main()
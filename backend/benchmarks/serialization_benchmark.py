@@ -0,0 +1,109 @@
+"""Serialization cost of one full garden (63 multi-step plants) per request.
+
+Compares the default FastAPI path (build PlantResponse models, re-validate
+against response_model, jsonable_encoder, json.dumps) with the fast path used
+by the garden route (models dumped by a TypeAdapter and encoded with orjson).
+
+Run from the backend directory:
+
+    python -m benchmarks.serialization_benchmark
+"""
+import asyncio
+import json
+import os
+import time
+import uuid
+from typing import List
+
+os.environ.setdefault("SUPABASE_URL", "http://localhost")
+os.environ.setdefault("SUPABASE_KEY", "benchmark")
+
+from fastapi.routing import serialize_response  # noqa: E402
+from fastapi.utils import create_model_field  # noqa: E402
+
+from app.models.plant import PlantResponse, GRID_WIDTH, GRID_HEIGHT  # noqa: E402
+from app.responses import fast_json_response  # noqa: E402
+from app.services.plant_service import PlantService  # noqa: E402
+
+ITERATIONS = 200
+STEPS_PER_PLANT = 5
+
+
+def make_row(index: int) -> dict:
+    timestamp = "2025-06-01T10:00:00.123456+00:00"
+    return {
+        "id": str(uuid.uuid4()),
+        "user_id": str(uuid.uuid4()),
+        "name": f"Task {index}",
+        "task_name": f"Task {index}",
+        "task_description": "Write the quarterly report and send it for review",
+        "task_status": "active",
+        "plant_type": "work",
+        "plant_sprite": "carrot",
+        "position_x": index // GRID_HEIGHT,
+        "position_y": index % GRID_HEIGHT,
+        "growth_level": 40,
+        "experience_points": 250,
+        "current_streak": 2,
+        "last_worked_date": timestamp,
+        "days_without_care": 0,
+        "decay_status": "healthy",
+        "is_active": True,
+        "created_at": timestamp,
+        "updated_at": timestamp,
+        "completion_date": None,
+        "is_multi_step": True,
+        "task_steps": [
+            {
+                "id": str(uuid.uuid4()),
+                "title": f"Step {step}",
+                "description": "Outline, draft and proofread this section",
+                "is_completed": step < 2,
+                "is_partial": False,
+                "completed_at": timestamp if step < 2 else None,
+                "work_hours": 1.5,
+            }
+            for step in range(STEPS_PER_PLANT)
+        ],
+        "completed_steps": 2,
+        "total_steps": STEPS_PER_PLANT,
+    }
+
+
+def timed(label: str, fn, iterations: int = ITERATIONS) -> float:
+    fn()  # warm up
+    start = time.perf_counter()
+    for _ in range(iterations):
+        fn()
+    elapsed_ms = (time.perf_counter() - start) / iterations * 1000
+    print(f"{label:<48} {elapsed_ms:8.3f} ms/garden")
+    return elapsed_ms
+
+
+def main():
+    rows = [make_row(i) for i in range(GRID_WIDTH * GRID_HEIGHT)]
+    plants = [PlantResponse(**PlantService._normalize_plant_dict(dict(row))) for row in rows]
+    response_field = create_model_field(name="Response", type_=List[PlantResponse], mode="serialization")
+
+    def build_models():
+        return [PlantResponse(**PlantService._normalize_plant_dict(dict(row))) for row in rows]
+
+    def default_path():
+        content = asyncio.run(
+            serialize_response(field=response_field, response_content=plants, is_coroutine=True)
+        )
+        return json.dumps(content).encode()
+
+    def fast_path():
+        return fast_json_response(plants, List[PlantResponse]).body
+
+    print(f"Garden of {len(rows)} plants x {STEPS_PER_PLANT} steps, {ITERATIONS} iterations\n")
+    build = timed("Build PlantResponse models (cache miss only)", build_models)
+    default = timed("response_model + jsonable_encoder + json", default_path)
+    fast = timed("TypeAdapter + orjson (fast path)", fast_path)
+    print(f"\nPer-request serialization speedup: {default / fast:.1f}x")
+    print(f"Cache-miss request (build + serialize): {build + default:.3f} -> {build + fast:.3f} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,24 @@
+-- Friend requests are created with a single INSERT ... ON CONFLICT DO NOTHING
+-- on the sorted (user_one_id, user_two_id) pair, which needs a unique index.
+
+-- The old check-then-insert path could store a pair twice. Keep one row per
+-- pair (accepted first, then blocked, pending, the rest; oldest first) so the
+-- index can be built.
+delete from public.friendships f
+using (
+    select ctid,
+           row_number() over (
+               partition by user_one_id, user_two_id
+               order by case status when 'accepted' then 0
+                                    when 'blocked' then 1
+                                    when 'pending' then 2
+                                    else 3 end,
+                        created_at, ctid
+           ) as rn
+    from public.friendships
+) ranked
+where f.ctid = ranked.ctid
+  and ranked.rn > 1;
+
+create unique index if not exists friendships_user_pair_key
+    on public.friendships (user_one_id, user_two_id);
@@ -0,0 +1,73 @@
+-- Step IDs are assigned once at write time instead of on every read: give any
+-- legacy step without an id a permanent one.
+update public.plants p
+set task_steps = (
+    select jsonb_agg(
+        case when coalesce(s.step->>'id', '') = ''
+             then s.step || jsonb_build_object('id', gen_random_uuid()::text)
+             else s.step end
+        order by s.ord)
+    from jsonb_array_elements(p.task_steps) with ordinality as s(step, ord)
+)
+where jsonb_typeof(p.task_steps) = 'array'
+  and exists (
+    select 1 from jsonb_array_elements(p.task_steps) as e(step)
+    where coalesce(e.step->>'id', '') = ''
+  );
+
+-- Per-step write path: merge only the changed steps (matched by id) into the
+-- stored array under a row lock, recount completed/total steps from the merged
+-- array and apply the plant column changes, all in one UPDATE of one row.
+-- Concurrent updates to different steps of the same plant no longer overwrite
+-- each other. p_changes keys are plants columns; absent keys are left as-is.
+create or replace function public.patch_task_steps(
+    p_plant_id uuid,
+    p_user_id uuid,
+    p_steps jsonb,
+    p_changes jsonb default '{}'::jsonb
+)
+returns setof public.plants
+language plpgsql
+security invoker
+as $$
+declare
+    v_steps jsonb;
+begin
+    select coalesce(task_steps, '[]'::jsonb) into v_steps
+    from public.plants
+    where id = p_plant_id and user_id = p_user_id
+    for update;
+
+    if not found then
+        return;
+    end if;
+
+    select coalesce(jsonb_agg(
+               s.step || coalesce(
+                   (select patch from jsonb_array_elements(p_steps) as patch
+                    where patch->>'id' = s.step->>'id' limit 1),
+                   '{}'::jsonb)
+               order by s.ord), '[]'::jsonb)
+    into v_steps
+    from jsonb_array_elements(v_steps) with ordinality as s(step, ord);
+
+    return query
+    update public.plants p set
+        task_steps = v_steps,
+        completed_steps = (select count(*) from jsonb_array_elements(v_steps) as e(step)
+                           where coalesce((e.step->>'is_completed')::boolean, false)),
+        total_steps = jsonb_array_length(v_steps),
+        growth_level = coalesce(c.growth_level, p.growth_level),
+        experience_points = coalesce(c.experience_points, p.experience_points),
+        task_level = coalesce(c.task_level, p.task_level),
+        task_status = coalesce(c.task_status, p.task_status),
+        completion_date = coalesce(c.completion_date, p.completion_date),
+        last_worked_date = coalesce(c.last_worked_date, p.last_worked_date),
+        days_without_care = coalesce(c.days_without_care, p.days_without_care),
+        decay_status = coalesce(c.decay_status, p.decay_status),
+        updated_at = now()
+    from jsonb_populate_record(null::public.plants, p_changes) as c
+    where p.id = p_plant_id and p.user_id = p_user_id
+    returning p.*;
+end;
+$$;
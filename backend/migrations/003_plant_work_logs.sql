@@ -0,0 +1,64 @@
+-- Append-only history of work logged against plants (time logging and step
+-- work). "Today", weekly and heatmap reads are index lookups on
+-- (user_id, work_date) instead of scans over the garden.
+create table if not exists public.plant_work_logs (
+    id uuid primary key default gen_random_uuid(),
+    user_id uuid not null references auth.users (id) on delete cascade,
+    plant_id uuid not null,
+    source text not null default 'work',  -- work | step_complete | step_partial
+    hours_worked numeric not null check (hours_worked >= 0),
+    experience_gained integer not null default 0,
+    description text,
+    work_date date not null default (now() at time zone 'utc')::date,
+    created_at timestamptz not null default now()
+);
+
+create index if not exists plant_work_logs_user_date_idx
+    on public.plant_work_logs (user_id, work_date);
+
+alter table public.plant_work_logs enable row level security;
+
+create policy "Users read own work logs" on public.plant_work_logs
+    for select using (auth.uid() = user_id);
+create policy "Users insert own work logs" on public.plant_work_logs
+    for insert with check (auth.uid() = user_id);
+
+-- One row per user per day, kept current by the trigger below so weekly and
+-- heatmap views read at most one row per day.
+create table if not exists public.user_daily_work (
+    user_id uuid not null references auth.users (id) on delete cascade,
+    work_date date not null,
+    hours_worked numeric not null default 0,
+    experience_gained integer not null default 0,
+    log_count integer not null default 0,
+    updated_at timestamptz not null default now(),
+    primary key (user_id, work_date)
+);
+
+alter table public.user_daily_work enable row level security;
+
+create policy "Users read own daily work" on public.user_daily_work
+    for select using (auth.uid() = user_id);
+
+create or replace function public.roll_up_plant_work_log()
+returns trigger
+language plpgsql
+security definer
+set search_path = public
+as $$
+begin
+    insert into public.user_daily_work as d (user_id, work_date, hours_worked, experience_gained, log_count)
+    values (new.user_id, new.work_date, new.hours_worked, new.experience_gained, 1)
+    on conflict (user_id, work_date) do update set
+        hours_worked = d.hours_worked + excluded.hours_worked,
+        experience_gained = d.experience_gained + excluded.experience_gained,
+        log_count = d.log_count + 1,
+        updated_at = now();
+    return null;
+end;
+$$;
+
+drop trigger if exists plant_work_logs_roll_up on public.plant_work_logs;
+create trigger plant_work_logs_roll_up
+    after insert on public.plant_work_logs
+    for each row execute function public.roll_up_plant_work_log();
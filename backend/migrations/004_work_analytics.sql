@@ -0,0 +1,83 @@
+-- Per-category analytics buckets. Work logs carry the plant's productivity
+-- category at log time, and the insert trigger from 003 now also maintains a
+-- (user, day, category) rollup. Week and month series are summed from these
+-- daily buckets, so a year of history is at most 365 x categories rows.
+alter table public.plant_work_logs
+    add column if not exists productivity_category text not null default 'work';
+
+create table if not exists public.user_category_daily_work (
+    user_id uuid not null references auth.users (id) on delete cascade,
+    work_date date not null,
+    productivity_category text not null,
+    hours_worked numeric not null default 0,
+    experience_gained integer not null default 0,
+    log_count integer not null default 0,
+    updated_at timestamptz not null default now(),
+    primary key (user_id, work_date, productivity_category)
+);
+
+alter table public.user_category_daily_work enable row level security;
+
+create policy "Users read own category work" on public.user_category_daily_work
+    for select using (auth.uid() = user_id);
+
+create or replace function public.roll_up_plant_work_log()
+returns trigger
+language plpgsql
+security definer
+set search_path = public
+as $$
+begin
+    insert into public.user_daily_work as d (user_id, work_date, hours_worked, experience_gained, log_count)
+    values (new.user_id, new.work_date, new.hours_worked, new.experience_gained, 1)
+    on conflict (user_id, work_date) do update set
+        hours_worked = d.hours_worked + excluded.hours_worked,
+        experience_gained = d.experience_gained + excluded.experience_gained,
+        log_count = d.log_count + 1,
+        updated_at = now();
+
+    insert into public.user_category_daily_work as c
+        (user_id, work_date, productivity_category, hours_worked, experience_gained, log_count)
+    values (new.user_id, new.work_date, new.productivity_category, new.hours_worked, new.experience_gained, 1)
+    on conflict (user_id, work_date, productivity_category) do update set
+        hours_worked = c.hours_worked + excluded.hours_worked,
+        experience_gained = c.experience_gained + excluded.experience_gained,
+        log_count = c.log_count + 1,
+        updated_at = now();
+    return null;
+end;
+$$;
+
+-- Backfill: rebuild both rollups from plant_work_logs with one set-based
+-- statement per table, for one user or (p_user_id null) everyone.
+create or replace function public.rebuild_work_rollups(p_user_id uuid default null)
+returns integer
+language plpgsql
+security definer
+set search_path = public
+as $$
+declare
+    v_rows integer;
+begin
+    delete from public.user_daily_work where p_user_id is null or user_id = p_user_id;
+    delete from public.user_category_daily_work where p_user_id is null or user_id = p_user_id;
+
+    insert into public.user_daily_work (user_id, work_date, hours_worked, experience_gained, log_count)
+    select user_id, work_date, sum(hours_worked), sum(experience_gained), count(*)
+    from public.plant_work_logs
+    where p_user_id is null or user_id = p_user_id
+    group by user_id, work_date;
+
+    insert into public.user_category_daily_work
+        (user_id, work_date, productivity_category, hours_worked, experience_gained, log_count)
+    select user_id, work_date, productivity_category, sum(hours_worked), sum(experience_gained), count(*)
+    from public.plant_work_logs
+    where p_user_id is null or user_id = p_user_id
+    group by user_id, work_date, productivity_category;
+    get diagnostics v_rows = row_count;
+
+    return v_rows;
+end;
+$$;
+
+revoke execute on function public.rebuild_work_rollups(uuid) from public, anon, authenticated;
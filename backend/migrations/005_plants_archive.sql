@@ -0,0 +1,69 @@
+-- Harvested, deleted and dead plants are moved out of the hot plants table in
+-- batches so live-garden scans and indexes only cover live rows. The archive
+-- mirrors the plants columns plus when/why the row was archived; columns added
+-- to plants later must be added here too.
+create table if not exists public.plants_archive (
+    like public.plants including defaults,
+    archived_at timestamptz not null default now(),
+    archive_reason text not null,  -- harvested | dead | deleted
+    primary key (id)
+);
+
+-- Archive pages are keyed by (archived_at, id): a batch shares one archived_at
+drop index if exists public.plants_archive_user_archived_idx;
+create index if not exists plants_archive_user_archived_id_idx
+    on public.plants_archive (user_id, archived_at desc, id desc);
+-- Incremental sync (GET /api/plants/changes) reads tombstones by updated_at
+create index if not exists plants_archive_user_updated_idx
+    on public.plants_archive (user_id, updated_at);
+
+alter table public.plants_archive enable row level security;
+
+create policy "Users read own archived plants" on public.plants_archive
+    for select using (auth.uid() = user_id);
+
+-- Keeps the compaction scan cheap without indexing live rows twice
+create index if not exists plants_inactive_updated_idx
+    on public.plants (updated_at) where is_active = false;
+
+-- Move up to p_batch_size inactive plants untouched for p_grace into the
+-- archive; returns how many were moved. SKIP LOCKED lets it run alongside
+-- user writes, and the grace period leaves recent removals in place for a
+-- while (they are still reported as tombstones from either table).
+create or replace function public.archive_inactive_plants(
+    p_batch_size integer default 500,
+    p_grace interval default interval '1 day'
+)
+returns integer
+language plpgsql
+security definer
+set search_path = public
+as $$
+declare
+    v_moved integer;
+begin
+    with batch as (
+        select id from public.plants
+        where is_active = false and updated_at < now() - p_grace
+        order by updated_at
+        limit p_batch_size
+        for update skip locked
+    ), moved as (
+        delete from public.plants p
+        using batch
+        where p.id = batch.id
+        returning p.*
+    )
+    insert into public.plants_archive
+    select moved.*,
+           now(),
+           case when moved.task_status = 'harvested' then 'harvested'
+                when moved.decay_status = 'dead' then 'dead'
+                else 'deleted' end
+    from moved;
+    get diagnostics v_moved = row_count;
+    return v_moved;
+end;
+$$;
+
+revoke execute on function public.archive_inactive_plants(integer, interval) from public, anon, authenticated;
@@ -0,0 +1,42 @@
+-- Only live plants hold a garden cell. With the position unique index partial
+-- on is_active, create_plant no longer has to DELETE inactive plants at the
+-- target cell before inserting, and inactive rows can wait for the archive job.
+do $$
+declare
+    r record;
+begin
+    -- Drop whole-table unique constraints on (user_id, position_x, position_y)
+    for r in
+        select c.conname
+        from pg_constraint c
+        where c.conrelid = 'public.plants'::regclass
+          and c.contype = 'u'
+          and (select array_agg(a.attname::text order by a.attname)
+               from pg_attribute a
+               where a.attrelid = c.conrelid and a.attnum = any (c.conkey))
+              = array['position_x', 'position_y', 'user_id']
+    loop
+        execute format('alter table public.plants drop constraint %I', r.conname);
+    end loop;
+
+    -- ...and any standalone non-partial unique index on the same columns
+    for r in
+        select i.indexrelid::regclass::text as index_name
+        from pg_index i
+        where i.indrelid = 'public.plants'::regclass
+          and i.indisunique
+          and i.indpred is null
+          and not exists (select 1 from pg_constraint c where c.conindid = i.indexrelid)
+          and (select array_agg(a.attname::text order by a.attname)
+               from pg_attribute a
+               where a.attrelid = i.indrelid and a.attnum = any (i.indkey))
+              = array['position_x', 'position_y', 'user_id']
+    loop
+        execute format('drop index %s', r.index_name);
+    end loop;
+end;
+$$;
+
+create unique index if not exists plants_active_position_key
+    on public.plants (user_id, position_x, position_y)
+    where is_active;
@@ -0,0 +1,39 @@
+-- Bulk garden rearrangement in one transaction. The position unique index is
+-- partial on is_active (006) and cannot be deferred, so moved plants are first
+-- taken out of it (is_active = false) and then written to their new cells in a
+-- second statement; swaps and rotations never collide mid-update. Any clash
+-- with an unmoved plant, or a plant that is missing or not the caller's, rolls
+-- back the whole layout.
+create or replace function public.apply_garden_layout(
+    p_user_id uuid,
+    p_moves jsonb  -- [{"plant_id": uuid, "position_x": int, "position_y": int}, ...]
+)
+returns setof public.plants
+language plpgsql
+security invoker
+as $$
+declare
+    v_expected integer := jsonb_array_length(p_moves);
+    v_lifted integer;
+begin
+    update public.plants p
+    set is_active = false
+    from jsonb_to_recordset(p_moves) as m(plant_id uuid, position_x integer, position_y integer)
+    where p.id = m.plant_id and p.user_id = p_user_id and p.is_active;
+    get diagnostics v_lifted = row_count;
+
+    if v_lifted <> v_expected then
+        raise exception 'apply_garden_layout: % of % plants not found or inactive', v_expected - v_lifted, v_expected
+            using errcode = 'P0002';
+    end if;
+
+    return query
+    update public.plants p
+    set position_x = m.position_x,
+        position_y = m.position_y,
+        is_active = true
+    from jsonb_to_recordset(p_moves) as m(plant_id uuid, position_x integer, position_y integer)
+    where p.id = m.plant_id and p.user_id = p_user_id
+    returning p.*;
+end;
+$$;
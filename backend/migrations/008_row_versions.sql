@@ -0,0 +1,135 @@
+-- Optimistic concurrency: every UPDATE of a plant or progress row bumps its
+-- version, whoever writes it. Read-compute-write paths send the version they
+-- read as a filter, so a write based on a stale read matches no row and the
+-- service re-reads and retries instead of overwriting the other write.
+alter table public.plants
+    add column if not exists version integer not null default 0;
+
+alter table public.user_progress
+    add column if not exists version integer not null default 0;
+
+-- The archive mirrors plants, but its new column lands after archived_at and
+-- archive_reason, so archiving now copies rows by column name, not position.
+alter table public.plants_archive
+    add column if not exists version integer not null default 0;
+
+create or replace function public.archive_inactive_plants(
+    p_batch_size integer default 500,
+    p_grace interval default interval '1 day'
+)
+returns integer
+language plpgsql
+security definer
+set search_path = public
+as $$
+declare
+    v_moved integer;
+begin
+    with batch as (
+        select id from public.plants
+        where is_active = false and updated_at < now() - p_grace
+        order by updated_at
+        limit p_batch_size
+        for update skip locked
+    ), moved as (
+        delete from public.plants p
+        using batch
+        where p.id = batch.id
+        returning p.*
+    )
+    insert into public.plants_archive
+    select r.*
+    from moved,
+         jsonb_populate_record(null::public.plants_archive, to_jsonb(moved) || jsonb_build_object(
+             'archived_at', now(),
+             'archive_reason', case when moved.task_status = 'harvested' then 'harvested'
+                                    when moved.decay_status = 'dead' then 'dead'
+                                    else 'deleted' end)) as r;
+    get diagnostics v_moved = row_count;
+    return v_moved;
+end;
+$$;
+
+revoke execute on function public.archive_inactive_plants(integer, interval) from public, anon, authenticated;
+
+create or replace function public.bump_row_version()
+returns trigger
+language plpgsql
+as $$
+begin
+    new.version := old.version + 1;
+    return new;
+end;
+$$;
+
+drop trigger if exists plants_bump_version on public.plants;
+create trigger plants_bump_version
+    before update on public.plants
+    for each row execute function public.bump_row_version();
+
+drop trigger if exists user_progress_bump_version on public.user_progress;
+create trigger user_progress_bump_version
+    before update on public.user_progress
+    for each row execute function public.bump_row_version();
+
+-- patch_task_steps gains p_expected_version: when given and the row has moved
+-- on, nothing is written and no row is returned.
+drop function if exists public.patch_task_steps(uuid, uuid, jsonb, jsonb);
+
+create or replace function public.patch_task_steps(
+    p_plant_id uuid,
+    p_user_id uuid,
+    p_steps jsonb,
+    p_changes jsonb default '{}'::jsonb,
+    p_expected_version integer default null
+)
+returns setof public.plants
+language plpgsql
+security invoker
+as $$
+declare
+    v_steps jsonb;
+    v_version integer;
+begin
+    select coalesce(task_steps, '[]'::jsonb), version into v_steps, v_version
+    from public.plants
+    where id = p_plant_id and user_id = p_user_id
+    for update;
+
+    if not found then
+        return;
+    end if;
+
+    if p_expected_version is not null and v_version <> p_expected_version then
+        return;
+    end if;
+
+    select coalesce(jsonb_agg(
+               s.step || coalesce(
+                   (select patch from jsonb_array_elements(p_steps) as patch
+                    where patch->>'id' = s.step->>'id' limit 1),
+                   '{}'::jsonb)
+               order by s.ord), '[]'::jsonb)
+    into v_steps
+    from jsonb_array_elements(v_steps) with ordinality as s(step, ord);
+
+    return query
+    update public.plants p set
+        task_steps = v_steps,
+        completed_steps = (select count(*) from jsonb_array_elements(v_steps) as e(step)
+                           where coalesce((e.step->>'is_completed')::boolean, false)),
+        total_steps = jsonb_array_length(v_steps),
+        growth_level = coalesce(c.growth_level, p.growth_level),
+        experience_points = coalesce(c.experience_points, p.experience_points),
+        task_level = coalesce(c.task_level, p.task_level),
+        task_status = coalesce(c.task_status, p.task_status),
+        completion_date = coalesce(c.completion_date, p.completion_date),
+        last_worked_date = coalesce(c.last_worked_date, p.last_worked_date),
+        days_without_care = coalesce(c.days_without_care, p.days_without_care),
+        decay_status = coalesce(c.decay_status, p.decay_status),
+        updated_at = now()
+    from jsonb_populate_record(null::public.plants, p_changes) as c
+    where p.id = p_plant_id and p.user_id = p_user_id
+    returning p.*;
+end;
+$$;
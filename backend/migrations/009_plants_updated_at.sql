@@ -0,0 +1,22 @@
+-- Incremental sync (GET /api/plants/changes) pages through plants by
+-- (updated_at, id), so every write must move updated_at, whoever makes it and
+-- whatever the client sent. The stamp is the writing transaction's start
+-- time; a transaction can commit after a later-stamped one was already
+-- served, which the sync covers by re-reading a short overlap window.
+create or replace function public.touch_updated_at()
+returns trigger
+language plpgsql
+as $$
+begin
+    new.updated_at := now();
+    return new;
+end;
+$$;
+
+drop trigger if exists plants_touch_updated_at on public.plants;
+create trigger plants_touch_updated_at
+    before update on public.plants
+    for each row execute function public.touch_updated_at();
+
+create index if not exists plants_user_updated_id_idx
+    on public.plants (user_id, updated_at, id);
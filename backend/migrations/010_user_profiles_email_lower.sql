@@ -0,0 +1,32 @@
+-- Friend requests resolve an address with an exact match on the lowercased,
+-- trimmed email (FriendService._resolve_user_id_by_email), which keeps the
+-- lookup on the email index. Profiles written before that, or by anything that
+-- kept the user's spelling, are brought to the same form, and a trigger keeps
+-- every later write there.
+create or replace function public.normalize_profile_email()
+returns trigger
+language plpgsql
+as $$
+begin
+    new.email := lower(btrim(new.email));
+    return new;
+end;
+$$;
+
+-- Skip a row whose lowercased address another profile already holds: that
+-- one is what the lookup finds, and rewriting this one could break a unique
+-- constraint on email.
+update public.user_profiles p
+set email = lower(btrim(p.email))
+where p.email <> lower(btrim(p.email))
+  and not exists (
+      select 1
+      from public.user_profiles o
+      where o.email = lower(btrim(p.email))
+        and o.user_id <> p.user_id
+  );
+
+drop trigger if exists user_profiles_normalize_email on public.user_profiles;
+create trigger user_profiles_normalize_email
+    before insert or update of email on public.user_profiles
+    for each row execute function public.normalize_profile_email();
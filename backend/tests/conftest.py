@@ -0,0 +1,35 @@
+import os
+import sys
+import uuid
+
+import pytest
+
+os.environ.setdefault("SUPABASE_URL", "http://localhost")
+os.environ.setdefault("SUPABASE_KEY", "test")
+
+from tests.fake_supabase import FakeSupabase  # noqa: E402
+
+
+@pytest.fixture
+def anyio_backend():
+    return "asyncio"
+
+
+@pytest.fixture
+def db(monkeypatch) -> FakeSupabase:
+    """A fresh in-memory database wired into every module that holds the client"""
+    import app.main  # noqa: F401  (imports every service module)
+    from app.db import breaker
+
+    client = FakeSupabase()
+    for module in list(sys.modules.values()):
+        if getattr(module, "__name__", "").startswith("app.") and hasattr(module, "supabase"):
+            monkeypatch.setattr(module, "supabase", client)
+    monkeypatch.setattr(breaker, "state", breaker.CLOSED)
+    monkeypatch.setattr(breaker, "_failures", 0)
+    return client
+
+
+@pytest.fixture
+def user_id() -> str:
+    return str(uuid.uuid4())
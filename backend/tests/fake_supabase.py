@@ -0,0 +1,264 @@
+"""In-memory stand-in for the synchronous supabase client.
+
+Covers the query-builder calls the services make (filters, ordering, limits,
+insert/upsert/update/delete, rpc) closely enough to exercise service logic
+without a database. Updates behave as if the row-version and updated_at
+triggers were installed: ``version`` is bumped and ``updated_at`` restamped
+from ``now`` on every write.
+"""
+import copy
+import datetime
+import itertools
+import re
+import uuid
+from typing import Callable, Dict, List, Optional
+
+
+def _clock() -> Callable[[], str]:
+    ticks = itertools.count(1)
+    base = datetime.datetime(2026, 1, 1, tzinfo=datetime.timezone.utc)
+    return lambda: (base + datetime.timedelta(seconds=next(ticks))).isoformat()
+
+
+class Response:
+    def __init__(self, data, count=None):
+        self.data = data
+        self.count = count
+
+
+def _compare(op: str, left, right: str) -> bool:
+    if left is None:
+        return op == "is" and right == "null"
+    left = str(left).lower() if isinstance(left, bool) else str(left)
+    right = right.strip('"')
+    if op == "eq":
+        return left == right
+    if op == "neq":
+        return left != right
+    if op == "gt":
+        return left > right
+    if op == "gte":
+        return left >= right
+    if op == "lt":
+        return left < right
+    if op == "lte":
+        return left <= right
+    raise NotImplementedError(op)
+
+
+def _split_top_level(expr: str) -> List[str]:
+    parts, depth, quoted, current = [], 0, False, ""
+    for char in expr:
+        if char == '"':
+            quoted = not quoted
+        elif not quoted and char == "(":
+            depth += 1
+        elif not quoted and char == ")":
+            depth -= 1
+        elif not quoted and char == "," and depth == 0:
+            parts.append(current)
+            current = ""
+            continue
+        current += char
+    parts.append(current)
+    return parts
+
+
+def _logic_filter(expr: str, combine=any) -> Callable[[dict], bool]:
+    """Parse a PostgREST logic tree such as ``a.lt.1,and(a.eq.1,id.lt.x)``"""
+    checks = []
+    for part in _split_top_level(expr):
+        nested = re.fullmatch(r"(and|or)\((.*)\)", part)
+        if nested:
+            checks.append(_logic_filter(nested.group(2), all if nested.group(1) == "and" else any))
+        else:
+            column, op, value = part.split(".", 2)
+            checks.append(lambda row, c=column, o=op, v=value: _compare(o, row.get(c), v))
+    return lambda row: combine(check(row) for check in checks)
+
+
+class Query:
+    def __init__(self, db: "FakeSupabase", table: str):
+        self.db = db
+        self.table = table
+        self.filters: List[Callable[[dict], bool]] = []
+        self.op = "select"
+        self.http_method = "GET"
+        self.payload = None
+        self.columns = "*"
+        self.on_conflict: Optional[str] = None
+        self.ignore_duplicates = False
+        self._order = []
+        self._limit = None
+        self._single = False
+
+    def select(self, columns="*", count=None, head=None):
+        if self.op == "select":
+            self.columns = columns
+        return self
+
+    def _write(self, op, payload=None, method="POST"):
+        self.op, self.payload, self.http_method = op, payload, method
+        return self
+
+    def insert(self, data, **kwargs):
+        return self._write("insert", data)
+
+    def upsert(self, data, on_conflict="", ignore_duplicates=False, **kwargs):
+        self.on_conflict, self.ignore_duplicates = on_conflict, ignore_duplicates
+        return self._write("upsert", data)
+
+    def update(self, data, **kwargs):
+        return self._write("update", data, "PATCH")
+
+    def delete(self, **kwargs):
+        return self._write("delete", None, "DELETE")
+
+    def _filter(self, column, op, value):
+        self.filters.append(lambda row: _compare(op, row.get(column), str(value) if not isinstance(value, bool) else str(value).lower()))
+        return self
+
+    def eq(self, column, value):
+        return self._filter(column, "eq", value)
+
+    def neq(self, column, value):
+        return self._filter(column, "neq", value)
+
+    def gt(self, column, value):
+        return self._filter(column, "gt", value)
+
+    def gte(self, column, value):
+        return self._filter(column, "gte", value)
+
+    def lt(self, column, value):
+        return self._filter(column, "lt", value)
+
+    def lte(self, column, value):
+        return self._filter(column, "lte", value)
+
+    def in_(self, column, values):
+        values = {str(v) for v in values}
+        self.filters.append(lambda row: str(row.get(column)) in values)
+        return self
+
+    def ilike(self, column, pattern):
+        regex = re.compile("^" + re.escape(pattern).replace("%", ".*").replace("_", ".") + "$", re.IGNORECASE)
+        self.filters.append(lambda row: row.get(column) is not None and bool(regex.match(str(row.get(column)))))
+        return self
+
+    def match(self, values: dict):
+        for column, value in values.items():
+            self.eq(column, value)
+        return self
+
+    def or_(self, expr):
+        self.filters.append(_logic_filter(expr))
+        return self
+
+    def order(self, column, desc=False):
+        self._order.append((column, desc))
+        return self
+
+    def limit(self, n):
+        self._limit = n
+        return self
+
+    def single(self):
+        self._single = True
+        return self
+
+    maybe_single = single
+
+    def _matching(self) -> List[dict]:
+        return [row for row in self.db.tables.setdefault(self.table, []) if all(f(row) for f in self.filters)]
+
+    def _project(self, row: dict) -> dict:
+        if self.columns in ("*", None) or "(" in self.columns or ":" in self.columns:
+            return copy.deepcopy(row)
+        return {c.strip(): copy.deepcopy(row.get(c.strip())) for c in self.columns.split(",")}
+
+    def execute(self):
+        self.db.calls.append((self.table, self.op))
+        if self.db.fail is not None:
+            error, self.db.fail = self.db.fail, None
+            raise error
+        rows = self.db.tables.setdefault(self.table, [])
+        if self.op == "select":
+            out = self._matching()
+            for column, desc in reversed(self._order):
+                out.sort(key=lambda r: (r.get(column) is None, str(r.get(column))), reverse=desc)
+            if self._limit is not None:
+                out = out[: self._limit]
+            out = [self._project(row) for row in out]
+        elif self.op in ("insert", "upsert"):
+            out = []
+            for item in self.payload if isinstance(self.payload, list) else [self.payload]:
+                item = copy.deepcopy(item)
+                if self.op == "upsert" and self.on_conflict:
+                    keys = [k.strip() for k in self.on_conflict.split(",")]
+                    existing = [r for r in rows if all(str(r.get(k)) == str(item.get(k)) for k in keys)]
+                    if existing:
+                        if not self.ignore_duplicates:
+                            existing[0].update(item)
+                            existing[0]["updated_at"] = self.db.now()
+                            out.append(copy.deepcopy(existing[0]))
+                        continue
+                for columns, applies in self.db.unique.get(self.table, []):
+                    if applies(item) and any(
+                        applies(r) and all(str(r.get(k)) == str(item.get(k)) for k in columns) for r in rows
+                    ):
+                        raise Exception("23505: duplicate key value violates unique constraint")
+                stamp = self.db.now()
+                item.setdefault("id", str(uuid.uuid4()))
+                item.setdefault("version", 0)
+                item.setdefault("created_at", stamp)
+                item.setdefault("updated_at", stamp)
+                rows.append(item)
+                out.append(copy.deepcopy(item))
+        elif self.op == "update":
+            out = []
+            for row in self._matching():
+                row.update(copy.deepcopy(self.payload))
+                row["updated_at"] = self.db.now()
+                row["version"] = row.get("version", 0) + 1
+                out.append(copy.deepcopy(row))
+        else:
+            out = self._matching()
+            self.db.tables[self.table] = [r for r in rows if r not in out]
+        if self._single:
+            if not out:
+                raise Exception("PGRST116: no rows")
+            return Response(out[0])
+        return Response(out)
+
+
+class RPC:
+    http_method = "POST"
+
+    def __init__(self, db: "FakeSupabase", name: str, params: dict):
+        self.db, self.name, self.params = db, name, params
+
+    def execute(self):
+        self.db.calls.append(("rpc", self.name))
+        handler = self.db.rpcs.get(self.name)
+        if handler is None:
+            raise Exception(f"PGRST202: Could not find the function {self.name}")
+        return Response(handler(self.db, **self.params))
+
+
+class FakeSupabase:
+    def __init__(self):
+        self.tables: Dict[str, List[dict]] = {}
+        self.calls: list = []
+        self.unique: Dict[str, list] = {}
+        self.rpcs: Dict[str, Callable] = {}
+        self.now: Callable[[], str] = _clock()
+        self.fail: Optional[BaseException] = None  # Raised by the next execute()
+
+    def table(self, name: str) -> Query:
+        return Query(self, name)
+
+    from_ = table
+
+    def rpc(self, name: str, params: Optional[dict] = None) -> RPC:
+        return RPC(self, name, params or {})
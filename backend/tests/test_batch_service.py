@@ -0,0 +1,75 @@
+import asyncio
+
+import pytest
+
+from app import deadline
+from app.db import DatabaseUnavailable
+from app.models.plant import BatchOperation
+from app.services.batch_service import BatchService
+from app.services.plant_service import PlantService
+from app.services.xp_service import XPService
+
+pytestmark = pytest.mark.anyio
+
+
+def work(plant_id: str) -> BatchOperation:
+    return BatchOperation(op="work", plant_id=plant_id, hours_worked=1)
+
+
+@pytest.fixture
+def granted(monkeypatch):
+    """XP grants that reach user_progress, per user"""
+    grants = []
+
+    async def update_user_xp(user_id, xp_change):
+        deadline.check()
+        grants.append((user_id, xp_change))
+        return {}
+
+    monkeypatch.setattr(XPService, "update_user_xp", staticmethod(update_user_xp))
+    return grants
+
+
+@pytest.fixture
+def operations(monkeypatch):
+    """Each work operation commits 100 XP; plant 'stop' aborts the batch"""
+
+    async def dispatch(user_id, operation, auth_supabase):
+        if operation.plant_id == "stop":
+            raise asyncio.CancelledError()
+        await PlantService._update_user_progress_fast(user_id, 100)
+        return {"plant_id": operation.plant_id}
+
+    monkeypatch.setattr(BatchService, "_dispatch", staticmethod(dispatch))
+
+
+async def test_xp_from_all_operations_is_granted_once(user_id, operations, granted):
+    response = await BatchService.run(user_id, [work("a"), work("b"), work("c")])
+
+    assert granted == [(user_id, 300)]
+    assert response.experience_gained == 300
+    assert response.xp_applied and response.xp_error is None
+
+
+async def test_failed_xp_grant_is_reported(user_id, operations, monkeypatch, caplog):
+    async def unavailable(user_id, xp_change):
+        raise DatabaseUnavailable("Database unavailable: timeout")
+
+    monkeypatch.setattr(XPService, "update_user_xp", staticmethod(unavailable))
+    response = await BatchService.run(user_id, [work("a"), work("b")])
+
+    assert response.succeeded == 2
+    assert not response.xp_applied
+    assert "Database unavailable" in response.xp_error
+    assert "Failed to grant 200 batch XP" in caplog.text
+
+
+async def test_committed_operations_keep_xp_when_batch_is_cut_short(user_id, operations, granted):
+    token = deadline.start(0)  # The request's deadline has already passed
+    try:
+        with pytest.raises(asyncio.CancelledError):
+            await BatchService.run(user_id, [work("a"), work("b"), work("stop"), work("c")])
+    finally:
+        deadline.reset(token)
+
+    assert granted == [(user_id, 200)]
@@ -0,0 +1,82 @@
+import time
+
+import httpx
+import pytest
+from postgrest.exceptions import APIError
+
+from app import db as db_module
+from app.db import CircuitBreaker, DatabaseUnavailable, run_query
+
+pytestmark = pytest.mark.anyio
+
+
+@pytest.fixture(autouse=True)
+def no_backoff(monkeypatch):
+    monkeypatch.setattr(db_module, "_retry_delay", lambda attempt: 0)
+
+
+def transient():
+    return httpx.ConnectError("connection refused")
+
+
+async def test_transient_read_failure_is_retried(db):
+    db.tables["plants"] = [{"id": "p1"}]
+    db.fail = transient()
+
+    result = await run_query(db.table("plants").select("id"))
+
+    assert result.data == [{"id": "p1"}]
+
+
+async def test_transient_write_failure_is_not_retried(db):
+    db.fail = transient()
+
+    with pytest.raises(DatabaseUnavailable) as error:
+        await run_query(db.table("plants").insert({"name": "a"}))
+
+    assert error.value.status_code == 503
+    assert db.tables.get("plants", []) == []
+
+
+async def test_query_errors_pass_through_and_do_not_trip_the_breaker(db):
+    db.fail = APIError({"code": "23505", "message": "duplicate key"})
+
+    with pytest.raises(APIError):
+        await run_query(db.table("plants").insert({"name": "a"}))
+
+    assert db_module.breaker.state == CircuitBreaker.CLOSED
+    assert db_module.breaker.stats()["consecutive_failures"] == 0
+
+
+def test_breaker_opens_then_lets_one_probe_through(monkeypatch):
+    breaker = CircuitBreaker(failure_threshold=2, reset_timeout=10)
+    for _ in range(2):
+        breaker.before_call()
+        breaker.record_failure(transient())
+
+    assert breaker.state == CircuitBreaker.OPEN
+    with pytest.raises(DatabaseUnavailable):
+        breaker.before_call()
+
+    opened_at = time.monotonic()
+    monkeypatch.setattr(db_module.time, "monotonic", lambda: opened_at + 11)
+    breaker.before_call()  # The probe
+    with pytest.raises(DatabaseUnavailable):
+        breaker.before_call()  # Everyone else while it is out
+    breaker.record_success()
+
+    assert breaker.state == CircuitBreaker.CLOSED
+
+
+def test_failed_probe_opens_the_circuit_again(monkeypatch):
+    breaker = CircuitBreaker(failure_threshold=1, reset_timeout=10)
+    breaker.before_call()
+    breaker.record_failure(transient())
+    opened_at = time.monotonic()
+    monkeypatch.setattr(db_module.time, "monotonic", lambda: opened_at + 11)
+
+    breaker.before_call()
+    breaker.record_failure(transient())
+
+    assert breaker.state == CircuitBreaker.OPEN
+    assert breaker.opened == 2
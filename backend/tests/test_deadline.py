@@ -0,0 +1,36 @@
+import pytest
+
+from app import deadline
+from app.db import run_query
+from app.deadline import DeadlineExceeded
+
+pytestmark = pytest.mark.anyio
+
+
+async def test_expired_deadline_fails_before_the_call(db):
+    token = deadline.start(0)
+    try:
+        with pytest.raises(DeadlineExceeded) as error:
+            await run_query(db.table("plants").select("id"))
+    finally:
+        deadline.reset(token)
+
+    assert error.value.status_code == 504
+    assert db.calls == []
+
+
+@pytest.mark.parametrize("header, budget", [
+    (None, deadline.DEFAULT_BUDGET),
+    ("2.5", 2.5),
+    ("600", deadline.DEFAULT_BUDGET),  # A header can only shorten the budget
+    ("0", deadline.MIN_BUDGET),
+    ("nan", deadline.DEFAULT_BUDGET),
+    ("soon", deadline.DEFAULT_BUDGET),
+])
+def test_request_budget(header, budget):
+    assert deadline.request_budget("GET", "/api/plants/", header) == budget
+
+
+def test_event_stream_has_no_deadline():
+    assert deadline.request_budget("GET", "/api/events", "5") is None
+
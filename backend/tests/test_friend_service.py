@@ -0,0 +1,68 @@
+import uuid
+
+import pytest
+
+import app.services.friend_service as friend_module
+from app.services.friend_service import FriendService
+
+pytestmark = pytest.mark.anyio
+
+
+@pytest.fixture(autouse=True)
+def empty_caches(monkeypatch):
+    monkeypatch.setattr(friend_module, "_friend_ids_cache", {})
+    monkeypatch.setattr(friend_module, "_email_index", friend_module.OrderedDict())
+
+
+def add_user(db, email, total_experience):
+    user_id = str(uuid.uuid4())
+    db.tables.setdefault("user_profiles", []).append({"user_id": user_id, "email": email})
+    db.tables.setdefault("user_progress", []).append({
+        "user_id": user_id,
+        "total_experience": total_experience,
+        "level": 1,
+        "tasks_completed": 0,
+        "plants_grown": 0,
+        "longest_streak": 0,
+        "current_streak": 0,
+    })
+    return user_id
+
+
+def befriend(db, one, two):
+    db.tables.setdefault("friendships", []).append(
+        {"user_one_id": one, "user_two_id": two, "action_user_id": one, "status": "accepted"}
+    )
+
+
+async def test_leaderboard_ranks_only_the_user_and_friends(db):
+    me = add_user(db, "me@example.com", 500)
+    friend = add_user(db, "friend@example.com", 900)
+    add_user(db, "stranger@example.com", 5000)
+    befriend(db, me, friend)
+
+    board = await FriendService.get_leaderboard(me)
+
+    assert [(entry.rank, entry.email) for entry in board] == [(1, "friend@example.com"), (2, "me@example.com")]
+
+
+async def test_email_lookup_ignores_case_and_whitespace(db):
+    user = add_user(db, "ada@example.com", 0)
+
+    assert await FriendService._resolve_user_id_by_email("  Ada@Example.COM ") == user
+
+
+async def test_full_email_index_evicts_least_recently_used(db, monkeypatch):
+    monkeypatch.setattr(friend_module, "_email_index_max_size", 2)
+    first = add_user(db, "first@example.com", 0)
+    add_user(db, "second@example.com", 0)
+    add_user(db, "third@example.com", 0)
+
+    await FriendService._resolve_user_id_by_email("first@example.com")
+    await FriendService._resolve_user_id_by_email("second@example.com")
+    await FriendService._resolve_user_id_by_email("first@example.com")  # Now the most recent
+    await FriendService._resolve_user_id_by_email("third@example.com")
+
+    assert list(friend_module._email_index) == ["first@example.com", "third@example.com"]
+    db.tables["user_profiles"].clear()
+    assert await FriendService._resolve_user_id_by_email("first@example.com") == first
@@ -0,0 +1,115 @@
+import asyncio
+
+import pytest
+from fastapi import HTTPException, Response
+from starlette.requests import Request
+
+from app.db import DatabaseUnavailable
+from app.deadline import DeadlineExceeded
+from app.services.idempotency_store import IdempotencyStore, REPLAYED_HEADER
+
+pytestmark = pytest.mark.anyio
+
+
+def make_request(key: str = "key-1") -> Request:
+    return Request({
+        "type": "http",
+        "method": "POST",
+        "scheme": "http",
+        "server": ("testserver", 80),
+        "path": "/api/plants/work",
+        "query_string": b"",
+        "headers": [(b"idempotency-key", key.encode())],
+    })
+
+
+class Handler:
+    """Counts executions; each one 'writes' and then fails or succeeds"""
+
+    def __init__(self, *outcomes):
+        self.outcomes = list(outcomes)
+        self.writes = 0
+
+    async def __call__(self):
+        self.writes += 1
+        outcome = self.outcomes.pop(0) if self.outcomes else {"xp": 100}
+        if isinstance(outcome, BaseException):
+            raise outcome
+        return outcome
+
+
+async def run(store, handler, payload=None, key="key-1"):
+    response = Response()
+    result = await store.run(make_request(key), response, "user-1", payload or {"hours": 1}, handler)
+    return result, response
+
+
+async def test_replay_returns_stored_result_without_running_again():
+    store, handler = IdempotencyStore(), Handler()
+
+    first, _ = await run(store, handler)
+    second, response = await run(store, handler)
+
+    assert first == second == {"xp": 100}
+    assert handler.writes == 1
+    assert response.headers[REPLAYED_HEADER] == "true"
+
+
+@pytest.mark.parametrize("failure", [
+    DatabaseUnavailable("Database unavailable: connection reset"),
+    DeadlineExceeded(),
+    HTTPException(status_code=500, detail="Failed to log task work"),
+    asyncio.CancelledError(),
+])
+async def test_replay_after_in_doubt_failure_does_not_write_again(failure):
+    store, handler = IdempotencyStore(), Handler(failure)
+
+    with pytest.raises(type(failure)):
+        await run(store, handler)
+    with pytest.raises(HTTPException) as replay:
+        await run(store, handler)
+
+    assert replay.value.status_code == 409
+    assert handler.writes == 1
+    assert store.stats()["in_doubt_failures"] == 1
+
+
+async def test_retry_after_client_error_runs_again():
+    store, handler = IdempotencyStore(), Handler(HTTPException(status_code=404, detail="Plant not found"))
+
+    with pytest.raises(HTTPException):
+        await run(store, handler)
+    result, response = await run(store, handler)
+
+    assert result == {"xp": 100}
+    assert handler.writes == 2
+    assert REPLAYED_HEADER not in response.headers
+
+
+async def test_waiter_on_in_doubt_request_gets_conflict():
+    store = IdempotencyStore()
+    started = asyncio.Event()
+
+    async def slow_then_unavailable():
+        started.set()
+        await asyncio.sleep(0.01)
+        raise DatabaseUnavailable("Database unavailable: timeout")
+
+    first = asyncio.create_task(run(store, slow_then_unavailable))
+    await started.wait()
+    with pytest.raises(HTTPException) as waiter:
+        await run(store, Handler())
+    with pytest.raises(DatabaseUnavailable):
+        await first
+
+    assert waiter.value.status_code == 409
+
+
+async def test_same_key_with_different_body_is_rejected():
+    store = IdempotencyStore()
+    await run(store, Handler(), {"hours": 1})
+
+    with pytest.raises(HTTPException) as mismatch:
+        await run(store, Handler(), {"hours": 2})
+
+    assert mismatch.value.status_code == 422
@@ -0,0 +1,49 @@
+import pytest
+from fastapi import HTTPException
+
+from app.services.optimistic_writer import OptimisticWriter, VersionConflict, check_versioned_write
+
+pytestmark = pytest.mark.anyio
+
+
+class Attempts:
+    """Conflicts the first ``conflicts`` times, then writes"""
+
+    def __init__(self, conflicts: int):
+        self.conflicts = conflicts
+        self.calls = 0
+
+    async def __call__(self):
+        self.calls += 1
+        if self.calls <= self.conflicts:
+            raise VersionConflict("plant p1")
+        return "written"
+
+
+async def test_conflicting_attempt_is_rerun_from_a_fresh_read():
+    writer, attempt = OptimisticWriter(base_delay=0), Attempts(conflicts=2)
+
+    assert await writer.run("plant_work", attempt) == "written"
+    assert attempt.calls == 3
+    assert writer.stats()["operations"]["plant_work"] == {"writes": 1, "conflicts": 2, "exhausted": 0}
+
+
+async def test_gives_up_with_409_after_max_attempts():
+    writer, attempt = OptimisticWriter(max_attempts=3, base_delay=0), Attempts(conflicts=10)
+
+    with pytest.raises(HTTPException) as error:
+        await writer.run("plant_work", attempt)
+
+    assert error.value.status_code == 409
+    assert attempt.calls == 3
+    assert writer.stats()["operations"]["plant_work"]["exhausted"] == 1
+
+
+async def test_versioned_write_on_stale_row_is_a_conflict(db):
+    db.tables["plants"] = [{"id": "p1", "experience_points": 0, "version": 1}]
+
+    with pytest.raises(VersionConflict):
+        check_versioned_write(db.table("plants").update({"experience_points": 100}).eq("id", "p1").eq("version", 0).execute(), "plant p1")
+    result = check_versioned_write(db.table("plants").update({"experience_points": 100}).eq("id", "p1").eq("version", 1).execute(), "plant p1")
+
+    assert result.data[0]["version"] == 2
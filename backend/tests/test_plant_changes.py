@@ -0,0 +1,105 @@
+import base64
+import uuid
+
+import pytest
+from fastapi import HTTPException
+
+from app.services.plant_service import PlantService
+
+pytestmark = pytest.mark.anyio
+
+STAMP = "2026-03-02T12:00:00+00:00"
+
+
+def add_plant(db, user_id, updated_at=STAMP, **fields):
+    row = {
+        "id": str(uuid.uuid4()),
+        "user_id": user_id,
+        "name": "plant",
+        "plant_sprite": "sprout",
+        "growth_level": 0,
+        "experience_points": 0,
+        "position_x": 0,
+        "position_y": 0,
+        "is_active": True,
+        "is_multi_step": False,
+        "completed_steps": 0,
+        "total_steps": 0,
+        "created_at": STAMP,
+        "updated_at": updated_at,
+    }
+    row.update(fields)
+    db.tables.setdefault("plants", []).append(row)
+    return row
+
+
+async def sync_all(user_id, since=None, limit=2):
+    """Follow has_more to the end; returns the ids delivered and the final cursor"""
+    delivered, pages = [], 0
+    while True:
+        page = await PlantService.get_plant_changes(user_id, since, limit=limit)
+        delivered += [p.id for p in page.plants] + [t.id for t in page.removed]
+        since, pages = page.cursor, pages + 1
+        if not page.has_more:
+            return delivered, since, pages
+
+
+async def test_pages_through_rows_sharing_one_timestamp(db, user_id):
+    rows = [add_plant(db, user_id) for _ in range(5)]
+
+    delivered, _, pages = await sync_all(user_id)
+
+    assert sorted(delivered) == sorted(row["id"] for row in rows)
+    assert len(delivered) == len(set(delivered))
+    assert pages == 3
+
+
+async def test_page_is_capped_and_continues(db, user_id):
+    for _ in range(3):
+        add_plant(db, user_id)
+
+    page = await PlantService.get_plant_changes(user_id, limit=2)
+
+    assert len(page.plants) == 2
+    assert page.has_more and page.full_sync
+    rest = await PlantService.get_plant_changes(user_id, page.cursor, limit=2)
+    assert len(rest.plants) == 1 and not rest.has_more and rest.full_sync
+
+
+async def test_late_commit_stamped_before_cursor_is_delivered(db, user_id):
+    add_plant(db, user_id, updated_at="2026-03-02T12:00:10+00:00")
+    _, cursor, _ = await sync_all(user_id)
+
+    # A write stamped a few seconds earlier commits after that sync was served
+    late = add_plant(db, user_id, updated_at="2026-03-02T12:00:05+00:00")
+    delivered, _, _ = await sync_all(user_id, cursor)
+
+    assert late["id"] in delivered
+
+
+async def test_deactivated_plant_becomes_tombstone(db, user_id):
+    plant = add_plant(db, user_id)
+    _, cursor, _ = await sync_all(user_id)
+
+    plant.update(is_active=False, task_status="harvested", updated_at="2026-03-02T13:00:00+00:00")
+    page = await PlantService.get_plant_changes(user_id, cursor)
+
+    assert [(t.id, t.reason) for t in page.removed] == [(plant["id"], "harvested")]
+    assert not page.full_sync
+
+
+async def test_cursor_from_before_paging_is_accepted(db, user_id):
+    plant = add_plant(db, user_id, updated_at="2026-03-02T13:00:00+00:00")
+    bare = base64.urlsafe_b64encode(STAMP.encode()).decode().rstrip("=")
+
+    page = await PlantService.get_plant_changes(user_id, bare)
+
+    assert [p.id for p in page.plants] == [plant["id"]]
+
+
+@pytest.mark.parametrize("cursor", ["not-a-cursor", "MjAyNi0wMy0wMlQxMjowMDowMHwxKTtkcm9wfHBhZ2U"])
+async def test_invalid_cursor_is_rejected(db, user_id, cursor):
+    with pytest.raises(HTTPException) as error:
+        await PlantService.get_plant_changes(user_id, cursor)
+
+    assert error.value.status_code == 400
@@ -0,0 +1,105 @@
+from datetime import date, datetime, timedelta
+
+import pytest
+
+import app.services.plant_service as plant_module
+from app.services.plant_service import PlantService
+
+pytestmark = pytest.mark.anyio
+
+DAY0 = date(2026, 3, 2)
+
+
+@pytest.fixture
+def calendar(monkeypatch, db):
+    """Moves plant_service's idea of today, and the database's clock, together"""
+    state = {"today": DAY0}
+
+    class FakeDate(date):
+        @classmethod
+        def today(cls):
+            return state["today"]
+
+    class FakeDatetime(datetime):
+        @classmethod
+        def now(cls, tz=None):
+            return datetime.combine(state["today"], datetime.min.time()).replace(hour=12)
+
+    monkeypatch.setattr(plant_module, "date", FakeDate)
+    monkeypatch.setattr(plant_module, "datetime", FakeDatetime)
+    db.now = lambda: f"{state['today'].isoformat()}T12:00:00+00:00"
+    return state
+
+
+def add_plant(db, user_id, **fields):
+    row = {
+        "user_id": user_id,
+        "name": "plant",
+        "experience_points": 1000,
+        "current_streak": 0,
+        "days_without_care": 0,
+        "is_active": True,
+        "decay_status": "healthy",
+        "position_x": 0,
+        "position_y": 0,
+        "created_at": f"{DAY0.isoformat()}T09:00:00+00:00",
+        "updated_at": f"{DAY0.isoformat()}T09:00:00+00:00",
+        "version": 0,
+    }
+    row.update(fields)
+    db.tables.setdefault("plants", []).append(row)
+    return row
+
+
+async def test_decay_over_consecutive_days_is_one_day_each(db, user_id, calendar):
+    plant = add_plant(db, user_id, id="p1")
+
+    history = []
+    for day in range(1, 4):
+        calendar["today"] = DAY0 + timedelta(days=day)
+        expected_loss = 20 * PlantService._calculate_task_level(plant["experience_points"])
+        before = plant["experience_points"]
+        await PlantService.apply_daily_decay(user_id, db)
+        history.append((before - plant["experience_points"], expected_loss, plant["days_without_care"]))
+
+    assert [loss for loss, _, _ in history] == [expected for _, expected, _ in history]
+    assert [days for _, _, days in history] == [1, 2, 3]
+
+
+async def test_decay_runs_once_per_day(db, user_id, calendar):
+    plant = add_plant(db, user_id, id="p1")
+    calendar["today"] = DAY0 + timedelta(days=1)
+
+    await PlantService.apply_daily_decay(user_id, db)
+    after_first = dict(plant)
+    await PlantService.apply_daily_decay(user_id, db)
+
+    assert plant["experience_points"] == after_first["experience_points"]
+    assert plant["days_without_care"] == 1
+
+
+async def test_decay_uses_level_from_xp_not_stored_task_level(db, user_id, calendar):
+    plant = add_plant(db, user_id, id="p1", task_level=9)
+    calendar["today"] = DAY0 + timedelta(days=1)
+
+    await PlantService.apply_daily_decay(user_id, db)
+
+    assert plant["experience_points"] == 1000 - 20 * PlantService._calculate_task_level(1000)
+
+
+async def test_work_logged_during_decay_is_not_rolled_back(db, user_id, calendar, monkeypatch):
+    plant = add_plant(db, user_id, id="p1")
+    calendar["today"] = DAY0 + timedelta(days=2)
+    decay_changes = PlantService._decay_changes
+
+    def work_lands_first(row, today):
+        if plant["version"] == 0:
+            # Another request logs work between decay's read and its write
+            plant.update(experience_points=1500, version=1, updated_at=db.now())
+        return decay_changes(row, today)
+
+    monkeypatch.setattr(PlantService, "_decay_changes", staticmethod(work_lands_first))
+    await PlantService.apply_daily_decay(user_id, db)
+
+    assert plant["experience_points"] == 1500
+    assert plant["days_without_care"] == 0
@@ -0,0 +1,79 @@
+import uuid
+
+import pytest
+
+import app.services.activity_service as activity_module
+import app.services.friend_service as friend_module
+from app.models.friend import ActivityType
+from app.models.plant import TaskStepBulk, TaskStepComplete
+from app.services.activity_service import ActivityService
+from app.services.plant_service import PlantService
+
+pytestmark = pytest.mark.anyio
+
+
+@pytest.fixture
+def friend(db, user_id, monkeypatch):
+    """A friend of user_id, with empty feeds and friend caches"""
+    monkeypatch.setattr(activity_module, "_timelines", activity_module.OrderedDict())
+    monkeypatch.setattr(friend_module, "_friend_ids_cache", {})
+    friend_id = str(uuid.uuid4())
+    db.tables["friendships"] = [
+        {"user_one_id": user_id, "user_two_id": friend_id, "action_user_id": user_id, "status": "accepted"}
+    ]
+    return friend_id
+
+
+def add_plant(db, user_id, steps=2, completed=0):
+    row = {
+        "id": str(uuid.uuid4()),
+        "user_id": user_id,
+        "name": "Write report",
+        "task_status": "active",
+        "plant_type": "work",
+        "growth_level": 0,
+        "experience_points": 0,
+        "is_active": True,
+        "task_steps": [
+            {"id": str(uuid.uuid4()), "title": f"step {i}", "is_completed": i < completed}
+            for i in range(steps)
+        ],
+        "version": 0,
+    }
+    db.tables.setdefault("plants", []).append(row)
+    return row
+
+
+def completions(friend_id):
+    return [event for event in ActivityService.get_feed(friend_id) if event.type == ActivityType.PLANT_COMPLETED]
+
+
+async def test_completing_the_last_step_records_activity(db, user_id, friend):
+    plant = add_plant(db, user_id, completed=1)
+
+    result = await PlantService.complete_task_step(
+        user_id, TaskStepComplete(plant_id=plant["id"], step_id=plant["task_steps"][1]["id"])
+    )
+
+    assert result["task_completed"]
+    assert [(event.plant_id, event.plant_name) for event in completions(friend)] == [(plant["id"], "Write report")]
+
+
+async def test_bulk_completion_records_activity_once(db, user_id, friend):
+    plant = add_plant(db, user_id, steps=3)
+    bulk = TaskStepBulk(plant_id=plant["id"], steps=[{"step_id": step["id"]} for step in plant["task_steps"]])
+
+    result = await PlantService.update_task_steps_bulk(user_id, bulk)
+
+    assert result["task_completed"]
+    assert len(completions(friend)) == 1
+
+
+async def test_unfinished_task_records_no_completion(db, user_id, friend):
+    plant = add_plant(db, user_id, steps=3)
+
+    await PlantService.complete_task_step(
+        user_id, TaskStepComplete(plant_id=plant["id"], step_id=plant["task_steps"][0]["id"])
+    )
+
+    assert completions(friend) == []
@@ -0,0 +1,64 @@
+import pytest
+from fastapi import HTTPException
+
+import app.services.rate_limiter as rate_module
+from app.services.rate_limiter import Bucket, RateLimiter, RatePolicy
+
+pytestmark = pytest.mark.anyio
+
+POLICIES = {"writes": RatePolicy(Bucket(2, 1), Bucket(3, 1))}
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    now = {"t": 1000.0}
+    monkeypatch.setattr(rate_module.time, "time", lambda: now["t"])
+    return now
+
+
+@pytest.fixture(params=["memory", "sqlite"])
+def limiter(request, tmp_path):
+    store = str(tmp_path / "buckets.db") if request.param == "sqlite" else None
+    return RateLimiter(POLICIES, store)
+
+
+async def limited(limiter, user):
+    try:
+        await limiter.check("writes", user)
+    except HTTPException as e:
+        assert e.status_code == 429
+        return int(e.headers["Retry-After"])
+    return None
+
+
+async def test_user_bucket_allows_a_burst_then_refills(limiter, clock):
+    assert [await limited(limiter, "a") for _ in range(3)] == [None, None, 1]
+
+    clock["t"] += 1
+    assert await limited(limiter, "a") is None
+
+
+async def test_global_bucket_is_shared_by_all_users(limiter, clock):
+    assert [await limited(limiter, user) for user in ("a", "a", "b")] == [None, None, None]
+
+    assert await limited(limiter, "c") == 1
+
+
+async def test_rejected_request_takes_no_token(limiter, clock):
+    await limited(limiter, "a")
+    await limited(limiter, "a")
+    assert await limited(limiter, "a") == 1  # User bucket empty; global keeps its token
+
+    assert await limited(limiter, "b") is None
+    assert limiter.stats()["routes"]["writes"] == {"allowed": 3, "limited": 1}
+
+
+async def test_failing_shared_store_falls_back_to_process_buckets(tmp_path, clock):
+    limiter = RateLimiter(POLICIES, str(tmp_path / "buckets.db"))
+
+    def broken(*args):
+        raise OSError("database is locked")
+
+    limiter._shared.take = broken
+    assert await limited(limiter, "a") is None
+    assert limiter.stats()["store_errors"] == 1
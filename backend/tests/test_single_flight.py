@@ -0,0 +1,105 @@
+import asyncio
+
+import pytest
+
+from app import deadline
+from app.services.single_flight import SingleFlight
+
+pytestmark = pytest.mark.anyio
+
+
+class SlowRead:
+    def __init__(self):
+        self.calls = 0
+        self.release = asyncio.Event()
+        self.deadlines = []
+
+    async def __call__(self):
+        self.calls += 1
+        self.deadlines.append(deadline.remaining())
+        await self.release.wait()
+        return ["plant"]
+
+
+async def wait_for_flight(flights: SingleFlight):
+    while not flights.stats()["in_flight"]:
+        await asyncio.sleep(0)
+
+
+async def test_concurrent_callers_share_one_call():
+    flights, read = SingleFlight(), SlowRead()
+
+    callers = [asyncio.create_task(flights.do("plants", ("u", 1), read)) for _ in range(3)]
+    await wait_for_flight(flights)
+    read.release.set()
+
+    assert await asyncio.gather(*callers) == [["plant"]] * 3
+    assert read.calls == 1
+    assert flights.stats()["routes"]["plants"]["coalesced"] == 2
+
+
+async def test_follower_gets_result_when_leader_is_cancelled():
+    flights, read = SingleFlight(), SlowRead()
+
+    leader = asyncio.create_task(flights.do("plants", ("u", 1), read))
+    await wait_for_flight(flights)
+    follower = asyncio.create_task(flights.do("plants", ("u", 1), read))
+    await asyncio.sleep(0)
+    leader.cancel()  # e.g. DeadlineMiddleware giving up on the leader's request
+    with pytest.raises(asyncio.CancelledError):
+        await leader
+    read.release.set()
+
+    assert await follower == ["plant"]
+    assert read.calls == 1
+
+
+async def test_flight_does_not_inherit_the_leaders_deadline():
+    flights, read = SingleFlight(), SlowRead()
+
+    async def leader():
+        token = deadline.start(0.5)
+        try:
+            return await flights.do("plants", ("u", 1), read)
+        finally:
+            deadline.reset(token)
+
+    task = asyncio.create_task(leader())
+    await wait_for_flight(flights)
+    read.release.set()
+    await task
+
+    assert read.deadlines == [None]
+
+
+async def test_followers_restart_a_cancelled_flight():
+    flights, read = SingleFlight(), SlowRead()
+
+    follower = asyncio.create_task(flights.do("plants", ("u", 1), read))
+    while not read.calls:
+        await asyncio.sleep(0)
+    next(iter(flights._flights.values())).cancel()  # e.g. shutdown cancelling tasks
+    while read.calls < 2:
+        await asyncio.sleep(0)
+    read.release.set()
+
+    assert await follower == ["plant"]
+    assert read.calls == 2
+    assert flights.stats()["routes"]["plants"]["restarted"] == 1
+
+
+async def test_errors_reach_every_caller_and_nothing_is_kept():
+    flights = SingleFlight()
+    release = asyncio.Event()
+
+    async def failing():
+        await release.wait()
+        raise RuntimeError("boom")
+
+    callers = [asyncio.create_task(flights.do("plants", ("u", 1), failing)) for _ in range(2)]
+    await wait_for_flight(flights)
+    release.set()
+    results = await asyncio.gather(*callers, return_exceptions=True)
+
+    assert all(isinstance(r, RuntimeError) for r in results)
+    assert flights.stats()["in_flight"] == 0
@@ -159,11 +159,12 @@ export const api = {
   },
 
   async getPlants(): Promise<PlantResponse[]> {
-    return this.get<PlantResponse[]>("/plants");
+    // Multi-step task text is opt-in on the API; the garden renders steps inline
+    return this.get<PlantResponse[]>("/plants?fields=*");
   },
 
   async getPlant(plantId: string): Promise<PlantResponse> {
-    return this.get<PlantResponse>(`/plants/${plantId}`);
+    return this.get<PlantResponse>(`/plants/${plantId}?fields=*`);
   },
 
   async deletePlant(plantId: string): Promise<{ message: string }> {